@@ -0,0 +1,91 @@
+r"""
+Micro-benchmark of the future event sets in :mod:`omnetpypy.backends.event_sets` under the classic hold model.
+
+The event set is first filled with ``size`` events. Then, every hold operation pops the next event and pushes a new
+one, at the time of the popped event plus an increment drawn from a given distribution, so the size of the event set
+stays constant. The benchmark reports the average time of a hold operation for each event set, size and distribution.
+
+Usage::
+
+    python benchmarks/event_sets.py --sizes 1000 100000 --holds 200000
+"""
+import argparse
+import random
+import time
+
+from omnetpypy.backends.event_sets import EVENT_SETS, make_event_set
+
+# increment distributions, as functions of a random.Random instance
+DISTRIBUTIONS = {
+    "exponential": lambda rng: rng.expovariate(1.0),
+    "uniform": lambda rng: rng.uniform(0.0, 2.0),
+    "bimodal": lambda rng: rng.uniform(0.0, 0.1) if rng.random() < 0.9 else rng.uniform(90.0, 100.0),
+    "constant": lambda rng: 1.0,
+}
+
+
+def hold(event_set_name, size, holds, distribution, seed=42):
+    r"""
+    Run the hold model on an event set.
+
+    Parameters
+    ----------
+    event_set_name : str
+        The name of the event set, a key of :data:`~omnetpypy.backends.event_sets.EVENT_SETS`.
+    size : int
+        The number of pending events.
+    holds : int
+        The number of hold operations to time.
+    distribution : str
+        The name of the increment distribution, a key of ``DISTRIBUTIONS``.
+    seed : int, optional
+        The seed of the random number generator. Defaults to 42.
+
+    Returns
+    -------
+    float
+        The average time of a hold operation, in nanoseconds.
+    """
+    rng = random.Random(seed)
+    increment = DISTRIBUTIONS[distribution]
+    event_set = make_event_set(event_set_name)
+    seq = 0
+    for _ in range(size):
+        event_set.push((increment(rng), seq, None, None, None))
+        seq += 1
+
+    # pre-draw the increments, so that only the event set operations are timed
+    increments = [increment(rng) for _ in range(holds)]
+
+    push = event_set.push
+    pop = event_set.pop
+    start = time.perf_counter()
+    for inc in increments:
+        event = pop()
+        push((event[0] + inc, seq, None, None, None))
+        seq += 1
+    elapsed = time.perf_counter() - start
+
+    return elapsed / holds * 1e9
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 1000000])
+    arg_parser.add_argument("--holds", type=int, default=100000)
+    arg_parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS.keys()),
+                            choices=list(DISTRIBUTIONS.keys()))
+    arg_parser.add_argument("--event-sets", nargs="+", default=list(EVENT_SETS.keys()),
+                            choices=list(EVENT_SETS.keys()))
+    args = arg_parser.parse_args()
+
+    print(f"{'distribution':<12} {'size':>9} " + " ".join(f"{name:>10}" for name in args.event_sets)
+          + "   (ns per hold)")
+    for distribution in args.distributions:
+        for size in args.sizes:
+            results = [hold(name, size, args.holds, distribution) for name in args.event_sets]
+            print(f"{distribution:<12} {size:>9} " + " ".join(f"{result:>10.0f}" for result in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,6 @@ The backends sub-package provides the necessary tools to connect the user API to
 and to run the simulation.
 """
 
-from omnetpypy.backends.connector import Connector
+from omnetpypy.backends.connector import Connector, Timer
 
-__all__ = ["Connector"]
+__all__ = ["Connector", "Timer"]
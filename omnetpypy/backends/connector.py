@@ -7,7 +7,64 @@ supporting event generation and management.
 import os
 from abc import abstractmethod
 import abc
-import pandas as pd
+
+from omnetpypy.backends.metric_buffers import MetricBuffer, MetricHandle, DEFAULT_FLUSH_BYTES
+from omnetpypy.front_end.sim_entity import SimulatedEntity
+
+__all__ = ["Connector", "Timer"]
+
+
+class Timer:
+    r"""
+    A handle to a self message scheduled by an entity. It is returned by
+    :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.schedule_message`, and it can be used to check or cancel
+    the scheduled message in constant time.
+
+    Parameters
+    ----------
+    message : :class:`~omnetpypy.front_end.message.Message`
+        The scheduled message.
+    entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+        The entity that will receive the message.
+    time : int or float
+        The simulation time at which the message will be delivered.
+
+    Attributes
+    ----------
+    message : :class:`~omnetpypy.front_end.message.Message`
+        The scheduled message.
+    entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+        The entity that will receive the message.
+    time : int or float
+        The simulation time at which the message will be delivered.
+    pending : bool
+        ``True`` until the message is delivered or cancelled.
+    event : object
+        The engine-specific event associated with the timer, if any.
+    """
+
+    __slots__ = ("message", "entity", "time", "pending", "event")
+
+    def __init__(self, message, entity, time):
+        self.message = message
+        self.entity = entity
+        self.time = time
+        self.pending = True
+        self.event = None
+
+    def cancel(self):
+        r"""
+        Cancel the scheduled message. If the message was already delivered or cancelled, nothing happens.
+        """
+        self.entity.cancel_scheduled(self)
+
+    def __repr__(self):
+        return f"Timer(message={self.message}, time={self.time}, pending={self.pending})"
+
+    def __deepcopy__(self, memo):
+        # a timer is a handle to an event owned by the connector: copying the state of an entity does not
+        # schedule anything, so the copy refers to the same timer
+        return self
 
 
 class Connector(abc.ABC):
@@ -27,7 +84,16 @@ class Connector(abc.ABC):
         simulation data will not be stored.
     repetition : int, optional
         The repetition index of the simulation. Default is 0.
-
+    num_init_stages : int, optional
+        The number of initialization stages. The
+        :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.initialize` method of the entities is called with
+        the stages from 0 to ``num_init_stages - 1``. Default is 6.
+    metric_flush_bytes : int, optional
+        The size of the samples of a metric held in memory before they are dumped to the temporary output file.
+        Default is 1 MiB. See :class:`~omnetpypy.backends.metric_buffers.MetricBuffer`.
+    output_format : str, optional
+        The format of the temporary output files of the vectors, either "csv" or "npy" (binary, only for "number"
+        metrics). Default is "csv". See :class:`~omnetpypy.backends.metric_buffers.MetricBuffer`.
 
     Attributes
     ----------
@@ -40,10 +106,18 @@ class Connector(abc.ABC):
         The output directory where the simulation data will be stored.
     repetition : int
         The repetition index of the simulation.
+    num_init_stages : int
+        The number of initialization stages.
+    output_format : str
+        The format of the temporary output files of the vectors.
+    metric_buffers : dict of :class:`~omnetpypy.backends.metric_buffers.MetricBuffer`
+        The buffers of the samples of the metrics not yet dumped, indexed by metric name.
     """
 
-    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0):
+    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0, num_init_stages=6,
+                 metric_flush_bytes=DEFAULT_FLUSH_BYTES, output_format="csv"):
         self.simulation = simulation
+        self.num_init_stages = num_init_stages
         self.metrics = metrics
 
         self.output_dir = output_dir
@@ -52,23 +126,14 @@ class Connector(abc.ABC):
             os.makedirs(self.output_dir, exist_ok=True)
 
         self.repetition = repetition
+        self.output_format = output_format
 
-        # allocate a dict of numpy dataframes indexed by metric name
-        if metrics is not None:
-            metrics_numbers_str = [metric for metric in metrics if metric.type == "number" or metric.type == "str"]
-            metrics_dict = [metric for metric in metrics if metric.type == "dict"]
-            self.metrics_dict = metrics_dict
-            self.metrics_data = {metric.name: pd.DataFrame(columns=["sample", "timestamp"]) for metric in metrics_numbers_str}
-            self.metrics_columns = {metric.name: ["sample", "timestamp"] for metric in metrics_numbers_str}
-            for metric in metrics_dict:
-                self.metrics_data[metric.name] = pd.DataFrame(columns=metric.columns)
-                self.metrics_columns[metric.name] = metric.columns
-
-            self.metrics_headers = {metric.name: False for metric in metrics}
-        else:
-            self.metrics_data = {}
-            self.metrics_dict = []
-            self.metrics_columns = {}
+        # pending timers indexed by (entity identifier, message id), see register_timer
+        self._timers = {}
+
+        # columnar buffers of the samples, indexed by metric name
+        self.metric_buffers = {metric.name: MetricBuffer(metric, metric_flush_bytes, output_format)
+                               for metric in metrics or []}
 
     @abstractmethod
     def start_simulation(self, until=None):
@@ -83,6 +148,24 @@ class Connector(abc.ABC):
         """
         raise NotImplementedError("to be implemented by subclasses")
 
+    def resume_simulation(self, until=None):
+        r"""
+        Continue a simulation previously started with
+        :meth:`~omnetpypy.backends.connector.Connector.start_simulation`, possibly restored from a snapshot.
+
+        Parameters
+        ----------
+        until : float or None, optional
+            The simulation time at which the simulation should stop.
+            If None, the simulation will run until there are no more events to process.
+
+        Raises
+        ------
+        NotImplementedError
+            If the engine cannot resume a simulation.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot resume a simulation")
+
     @abstractmethod
     def add_entity(self, entity):
         r"""
@@ -121,7 +204,7 @@ class Connector(abc.ABC):
         return self.simulation.rng
 
     @abstractmethod
-    def schedule_port_input(self, port, message):
+    def schedule_port_input(self, port, message, delay=0):
         r"""
         Schedule the event of a message received by a port.
 
@@ -131,6 +214,8 @@ class Connector(abc.ABC):
             The port that receives the message.
         message : :class:`~omnetpypy.front_end.message.Message`
             The message that received by the port.
+        delay : int or float, optional
+            The time, from the current simulation time, at which the message is received. Defaults to 0.
         """
         raise NotImplementedError("to be implemented by subclasses")
 
@@ -151,32 +236,107 @@ class Connector(abc.ABC):
         delay : float or None, optional
             The time delay from the current simulation time at which the message should be processed.
             If None, the ``at`` parameter will be used.
+
+        Returns
+        -------
+        :class:`~omnetpypy.backends.connector.Timer`
+            The handle of the scheduled self message. Subclasses should create it and register it with
+            :meth:`~omnetpypy.backends.connector.Connector.register_timer`.
         """
         raise NotImplementedError("to be implemented by subclasses")
 
-    @abstractmethod
     def is_scheduled(self, message, entity):
         r"""
-        Check if a message is scheduled as a self message for an entity.
+        Check if a message is scheduled as a self message for an entity. This takes constant time.
 
         Parameters
         ----------
-        message : :class:`~omnetpypy.front_end.message.Message`
-            The message to be checked.
+        message : :class:`~omnetpypy.front_end.message.Message` or :class:`~omnetpypy.backends.connector.Timer`
+            The message to be checked, or the timer handle returned when it was scheduled.
         entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
             The entity to check, that should receive the self message.
+
+        Returns
+        -------
+        bool
+            True if the message is scheduled, False otherwise.
         """
-        raise NotImplementedError("to be implemented by subclasses")
+        if isinstance(message, Timer):
+            return message.pending
+        return (entity.identifier, id(message)) in self._timers
 
-    @abstractmethod
     def cancel_scheduled(self, message, entity):
         r"""
-        Cancel a scheduled self message for an entity.
+        Cancel a scheduled self message for an entity. This takes constant time.
         If the message is not scheduled, nothing happens.
+
+        Parameters
+        ----------
+        message : :class:`~omnetpypy.front_end.message.Message` or :class:`~omnetpypy.backends.connector.Timer`
+            The message to be cancelled, or the timer handle returned when it was scheduled.
+            If a message is passed, all the pending timers of that message are cancelled.
+        entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+            The entity that should receive the self message.
+        """
+        if isinstance(message, Timer):
+            timers = [message] if message.pending else []
+        else:
+            timers = self._timers.get((entity.identifier, id(message)), [])[:]
+
+        for timer in timers:
+            self.release_timer(timer)
+            self.discard_timer(timer)
+
+    def register_timer(self, timer):
+        r"""
+        Register a new pending timer, so that it can be looked up by message.
+        Called by subclasses when a self message is scheduled.
+
+        Parameters
+        ----------
+        timer : :class:`~omnetpypy.backends.connector.Timer`
+            The timer to register.
+        """
+        key = (timer.entity.identifier, id(timer.message))
+        timers = self._timers.get(key)
+        if timers is None:
+            self._timers[key] = [timer]
+        else:
+            timers.append(timer)
+
+    def release_timer(self, timer):
+        r"""
+        Mark a timer as not pending anymore and forget it. Called by subclasses right before the self message is
+        delivered, and by :meth:`~omnetpypy.backends.connector.Connector.cancel_scheduled`.
+
+        Parameters
+        ----------
+        timer : :class:`~omnetpypy.backends.connector.Timer`
+            The timer to release.
+        """
+        timer.pending = False
+        key = (timer.entity.identifier, id(timer.message))
+        timers = self._timers.get(key)
+        if timers is not None:
+            # the same message is rarely scheduled more than once, so this list has usually one element
+            timers.remove(timer)
+            if not timers:
+                del self._timers[key]
+
+    @abstractmethod
+    def discard_timer(self, timer):
+        r"""
+        Remove the event of a cancelled timer from the simulation engine, or make sure that it will be ignored.
+        The timer has already been released when this method is called.
+
+        Parameters
+        ----------
+        timer : :class:`~omnetpypy.backends.connector.Timer`
+            The cancelled timer.
         """
         raise NotImplementedError("to be implemented by subclasses")
 
-    def record_metric(self, metric, value):
+    def record_metric(self, metric, value, timestamp=None):
         """
         Record a metric value for the current simulation.
 
@@ -188,41 +348,82 @@ class Connector(abc.ABC):
             The value of the metric to be recorded.
             If value is a dict or a list and the output file format is csv,
             it will be turned into a string and stored as is under the "sample" column.
+        timestamp : int or float or None, optional
+            The simulation time of the sample. If ``None`` (default), the current simulation time is used.
         """
+        if timestamp is None:
+            timestamp = self.get_time()
+
         if self.metrics is not None and self.output_dir is not None:
-            # add the value to the metric dataframe by simply appending a new row using loc
+            buffer = self.metric_buffers.get(metric)
+            if buffer is None:
+                return
+            buffer.validate(value)
+            # dump the samples to the output file when the buffer is full
+            if buffer.append(value, timestamp):
+                self.dump_metric(metric)
 
-            if metric in self.metrics_data:
+        elif self.metrics is None:
+            raise Exception("No metrics have been defined for this simulation")
 
-                index_dict = -1
-                for i, metric_dict in enumerate(self.metrics_dict):
-                    if metric_dict.name == metric:
-                        index_dict = i
-                        break
-                is_dict = True if index_dict != -1 else False
+    def metric_handle(self, metric, validate=False):
+        r"""
+        Return a handle to record the samples of a metric without looking it up at every sample.
 
-                if not is_dict:
-                    self.metrics_data[metric].loc[len(self.metrics_data[metric].index)] = [value, self.get_time()]
+        Parameters
+        ----------
+        metric : str
+            The name of the metric.
+        validate : bool, optional
+            Whether the handle checks every sample against the schema of the metric. Defaults to ``False``.
 
-                else:
-                    assert isinstance(value, dict), "The value of a dict metric must be a dict"
-                    assert set(value.keys()) == set(self.metrics_dict[index_dict].columns).difference({"timestamp"}), \
-                        "The keys of the dict value must match the columns of the metric"
-                    assert "timestamp" not in value.keys(), "The key 'timestamp' is reserved for the timestamp"
-                    assert all([isinstance(value[key], (int, float, str)) for key in value.keys()]), \
-                        "The values of the dict must be int, float or str"
+        Returns
+        -------
+        :class:`~omnetpypy.backends.metric_buffers.MetricHandle`
+            The handle of the metric.
+
+        Raises
+        ------
+        Exception
+            If no metrics have been defined for this simulation.
+        KeyError
+            If the metric is not defined.
+        """
+        if self.metrics is None:
+            raise Exception("No metrics have been defined for this simulation")
+        if metric not in self.metric_buffers:
+            raise KeyError(f"Metric {metric} is not defined in the simulation configuration")
+        return MetricHandle(self, self.metric_buffers[metric], validate)
 
-                    # get the row as a list of values whose keys are ordered alphabetically
-                    value["timestamp"] = self.get_time()
+    def reset_metrics(self):
+        r"""
+        Discard all the metric samples recorded so far, both in memory and in the temporary output files, and their
+        statistics. The "time_weighted" metrics keep the current value of their state, from the current time on.
+        """
+        for metric, buffer in self.metric_buffers.items():
+            buffer.reset(self.get_time())
+            if self.output_dir is not None and os.path.exists(self.vector_file(metric)):
+                os.remove(self.vector_file(metric))
 
-                    self.metrics_data[metric].loc[len(self.metrics_data[metric].index)] = value
+    def vector_file(self, metric):
+        r"""
+        Return the path of the temporary file where the samples of a metric are dumped for this repetition: a csv
+        file, or a binary file with the extension "bin" if the samples are written in the binary format (see
+        :func:`~omnetpypy.backends.metric_buffers.read_vector`).
 
-                # append the metrics to the output file if the dataframes are too big
-                if len(self.metrics_data[metric].index) > 1000:
-                    self.dump_metric(metric)
+        Parameters
+        ----------
+        metric : str
+            The name of the metric.
 
-        elif self.metrics is None:
-            raise Exception("No metrics have been defined for this simulation")
+        Returns
+        -------
+        str
+            The path of the file.
+        """
+        buffer = self.metric_buffers.get(metric)
+        extension = "bin" if buffer is not None and buffer.binary else "csv"
+        return f"{self.output_dir}/.{metric}_vector_rep{self.repetition}.{extension}"
 
     def dump_metric(self, metric):
         """
@@ -234,15 +435,68 @@ class Connector(abc.ABC):
             The name of the metric to be dumped.
         """
         if self.metrics is not None and self.output_dir is not None:
-            if metric in self.metrics_data:
-                if not self.metrics_headers[metric]:
-                    self.metrics_data[metric].to_csv(f"{self.output_dir}/.{metric}_vector_rep{self.repetition}.csv", mode="w", header=True, index=False)
-                    self.metrics_headers[metric] = True
-                else:
-                    self.metrics_data[metric].to_csv(f"{self.output_dir}/.{metric}_vector_rep{self.repetition}.csv", mode="a", header=False, index=False)
-
-                self.metrics_data[metric] = pd.DataFrame(columns=self.metrics_columns[metric])
+            if metric in self.metric_buffers:
+                self.metric_buffers[metric].flush(self.vector_file(metric))
 
         elif self.metrics is None:
             raise Exception("No metrics have been defined for this simulation")
 
+
+def initialization_schedule(entity, num_stages):
+    r"""
+    Compute, once, the entities to initialize at each initialization stage.
+
+    Only the entities that override :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.initialize` are
+    scheduled, and only at the stages listed in their
+    :attr:`~omnetpypy.front_end.sim_entity.SimulatedEntity.init_stages` (all the stages if it is ``None``).
+    Within a stage, sub-entities come before their parent, as in :func:`initialize_entity_with_step`.
+
+    Parameters
+    ----------
+    entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity` or list
+        The root entity to initialize, or a flat list of entities (already in initialization order).
+    num_stages : int
+        The number of initialization stages.
+
+    Returns
+    -------
+    list of tuple
+        A list of ``(stage, entities)`` pairs, in increasing stage order, only for the stages with at least one entity
+        to initialize.
+    """
+    entities = entity if isinstance(entity, list) else list(_walk_entities(entity))
+    stages = [[] for _ in range(num_stages)]
+    for entity in entities:
+        if type(entity).initialize is SimulatedEntity.initialize:
+            # the entity does nothing at initialization
+            continue
+        used = range(num_stages) if entity.init_stages is None else entity.init_stages
+        for stage in used:
+            if 0 <= stage < num_stages:
+                stages[stage].append(entity)
+    return [(stage, entities) for stage, entities in enumerate(stages) if entities]
+
+
+def _walk_entities(entity):
+    # yield an entity and all the entities nested in it, sub-entities first (the initialization order)
+    for sub_entity in getattr(entity, "sub_modules", {}).values():
+        yield from _walk_entities(sub_entity)
+    yield entity
+
+
+def initialize_entity_with_step(entity, step):
+    r"""
+    Call the :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.initialize` method of an entity and all its
+    sub-entities (recursively) for a given initialization step. Sub-entities are initialized before their parent.
+
+    Parameters
+    ----------
+    entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+        The root entity to initialize.
+    step : int
+        The initialization step.
+    """
+    if hasattr(entity, "sub_modules"):
+        for sub_entity in entity.sub_modules.values():
+            initialize_entity_with_step(sub_entity, step)
+    entity.initialize(step)
@@ -0,0 +1,421 @@
+r"""
+This module implements the future event sets that can be used by the
+:class:`~omnetpypy.backends.native_connector.NativeConnector` to store the pending events.
+
+Events are tuples whose first two elements are the event time and a unique sequence number.
+Every event set returns the events in increasing ``(time, seq)`` order, also when events earlier than the last popped
+one are pushed (e.g. an event pushed back, or the events rolled back by an optimistic engine), so all the
+implementations produce the same simulation. They only differ in their performance, which depends on the number of pending events and on the
+distribution of their timestamps:
+
+    - "heap": :class:`~omnetpypy.backends.event_sets.BinaryHeap`, a binary heap with :math:`O(\log n)` operations.
+      It is the default, and the fastest choice for small and medium event sets.
+    - "calendar": :class:`~omnetpypy.backends.event_sets.CalendarQueue`, a calendar queue with :math:`O(1)` expected
+      operations when the event times are evenly spread.
+    - "ladder": :class:`~omnetpypy.backends.event_sets.LadderQueue`, a ladder queue with :math:`O(1)` amortized
+      operations, also robust to skewed event time distributions.
+"""
+import abc
+import bisect
+import heapq
+from abc import abstractmethod
+from functools import partial
+
+__all__ = ["EventSet", "BinaryHeap", "CalendarQueue", "LadderQueue", "EVENT_SETS", "make_event_set"]
+
+
+class EventSet(abc.ABC):
+    r"""
+    The interface of a future event set, i.e. a priority queue of events ordered by ``(time, seq)``.
+    """
+
+    @abstractmethod
+    def push(self, event):
+        r"""
+        Insert an event in the set.
+
+        Parameters
+        ----------
+        event : tuple
+            The event to insert. Its first two elements must be the event time and a unique sequence number.
+        """
+        raise NotImplementedError("to be implemented by subclasses")
+
+    @abstractmethod
+    def pop(self):
+        r"""
+        Remove and return the event with the smallest ``(time, seq)``.
+
+        Returns
+        -------
+        tuple
+            The next event.
+
+        Raises
+        ------
+        IndexError
+            If the set is empty.
+        """
+        raise NotImplementedError("to be implemented by subclasses")
+
+    @abstractmethod
+    def peek(self):
+        r"""
+        Return the event with the smallest ``(time, seq)``, without removing it.
+
+        Returns
+        -------
+        tuple
+            The next event.
+
+        Raises
+        ------
+        IndexError
+            If the set is empty.
+        """
+        raise NotImplementedError("to be implemented by subclasses")
+
+    @abstractmethod
+    def __len__(self):
+        raise NotImplementedError("to be implemented by subclasses")
+
+
+class BinaryHeap(EventSet):
+    r"""
+    An event set implemented as a binary heap on a Python list, through the :mod:`heapq` module.
+
+    Attributes
+    ----------
+    heap : list
+        The underlying heap.
+    """
+
+    def __init__(self):
+        self.heap = []
+        # bind the heapq functions to the heap list, so that the engine calls them without an extra python frame
+        self.push = partial(heapq.heappush, self.heap)
+        self.pop = partial(heapq.heappop, self.heap)
+
+    def push(self, event):
+        heapq.heappush(self.heap, event)
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+    def peek(self):
+        if not self.heap:
+            raise IndexError("peek from an empty event set")
+        return self.heap[0]
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class CalendarQueue(EventSet):
+    r"""
+    An event set implemented as a calendar queue [Brown1988]_.
+
+    Events are hashed by time into an array of buckets, each one covering a time interval of fixed width,
+    like the days of a calendar year. Each bucket is a sorted list. The number of buckets doubles (halves) when
+    the number of events grows above twice (shrinks below half) the number of buckets, and the bucket width is
+    recomputed from the average separation of the events at the head of the queue.
+
+    Parameters
+    ----------
+    num_buckets : int, optional
+        The initial number of buckets. Defaults to 2.
+    width : float, optional
+        The initial bucket width. Defaults to 1.
+
+    References
+    ----------
+    .. [Brown1988] R. Brown, "Calendar queues: a fast O(1) priority queue implementation for the simulation event
+       set problem", Communications of the ACM, 31(10), 1988.
+    """
+
+    def __init__(self, num_buckets=2, width=1.0):
+        self._size = 0
+        self._last_time = 0
+        self._setup(num_buckets, width)
+
+    def _setup(self, num_buckets, width):
+        self._num_buckets = num_buckets
+        self._width = width
+        self._buckets = [[] for _ in range(num_buckets)]
+        # the current day, i.e. the index of the time interval of the bucket where the search of the next event
+        # starts. Days are integers, so that they match the buckets where the events are hashed exactly
+        self._day = int(self._last_time / width)
+        self._last_bucket = self._day % num_buckets
+        self._grow_threshold = 2 * num_buckets
+        self._shrink_threshold = num_buckets // 2 - 2
+
+    def push(self, event):
+        time = event[0]
+        day = int(time / self._width)
+        if day < self._day:
+            # the event is before the current day: rewind the calendar to its day, so the next pop starts from it
+            self._day = day
+            self._last_bucket = day % self._num_buckets
+        if time < self._last_time:
+            self._last_time = time
+        bisect.insort(self._buckets[day % self._num_buckets], event)
+        self._size += 1
+        if self._size > self._grow_threshold:
+            self._resize(2 * self._num_buckets)
+
+    def pop(self):
+        if self._size == 0:
+            raise IndexError("pop from an empty event set")
+        return self._take(*self._find())
+
+    def peek(self):
+        if self._size == 0:
+            raise IndexError("peek from an empty event set")
+        i, day = self._find()
+        # the calendar can start from the bucket of the next event
+        self._last_bucket = i
+        self._day = day
+        return self._buckets[i][0]
+
+    def _find(self):
+        # bucket of the next event, and its day
+        buckets = self._buckets
+        num_buckets = self._num_buckets
+        width = self._width
+        i = self._last_bucket
+        day = self._day
+        for _ in range(num_buckets):
+            bucket = buckets[i]
+            if bucket and int(bucket[0][0] / width) <= day:
+                return i, day
+            i += 1
+            day += 1
+            if i == num_buckets:
+                i = 0
+
+        # no event in the current year, look for the minimum event directly
+        i = min((b[0], j) for j, b in enumerate(buckets) if b)[1]
+        return i, int(buckets[i][0][0] / width)
+
+    def _take(self, i, day):
+        event = self._buckets[i].pop(0)
+        self._size -= 1
+        self._last_bucket = i
+        self._day = day
+        self._last_time = event[0]
+        if self._size < self._shrink_threshold:
+            self._resize(self._num_buckets // 2)
+        return event
+
+    def _resize(self, num_buckets):
+        events = [event for bucket in self._buckets for event in bucket]
+        events.sort()
+        self._setup(num_buckets, self._new_width(events))
+        for event in events:
+            bisect.insort(self._buckets[int(event[0] / self._width) % self._num_buckets], event)
+
+    def _new_width(self, events):
+        # three times the average separation of the first events, ignoring the outliers
+        sample = [event[0] for event in events[:25]]
+        gaps = [b - a for a, b in zip(sample, sample[1:])]
+        if not gaps:
+            return self._width
+        average = sum(gaps) / len(gaps)
+        gaps = [gap for gap in gaps if gap <= 2 * average]
+        average = sum(gaps) / len(gaps) if gaps else 0
+        return 3 * average if average > 0 else self._width
+
+    def __len__(self):
+        return self._size
+
+
+class _Rung:
+    # one rung of a ladder queue, an array of unsorted buckets of equal width starting at time ``start``
+
+    __slots__ = ("start", "width", "buckets", "current")
+
+    def __init__(self, start, width, num_buckets):
+        self.start = start
+        self.width = width
+        self.buckets = [[] for _ in range(num_buckets)]
+        self.current = 0
+
+    def insert(self, event):
+        i = int((event[0] - self.start) / self.width)
+        if i >= len(self.buckets):
+            i = len(self.buckets) - 1
+        elif i < self.current:
+            # floating point rounding at the bucket boundary
+            i = self.current
+        self.buckets[i].append(event)
+
+
+class LadderQueue(EventSet):
+    r"""
+    An event set implemented as a ladder queue [Tang2005]_.
+
+    Events far in the future are appended, unsorted, to the *top* list. When the near future is exhausted, the top
+    events are spread over the buckets of a *rung*, and buckets with too many events are recursively spread over finer
+    rungs, forming a ladder. Only the events of the first non-empty bucket of the finest rung are sorted, into the
+    *bottom* list, from which events are dequeued.
+
+    Parameters
+    ----------
+    threshold : int, optional
+        The maximum number of events sorted at once into the bottom list. Buckets with more events are spread over
+        a new rung. Defaults to 50.
+    max_rungs : int, optional
+        The maximum number of rungs. Defaults to 8.
+
+    References
+    ----------
+    .. [Tang2005] W. T. Tang, R. S. M. Goh and I. L.-J. Thng, "Ladder queue: An O(1) priority queue structure for
+       large-scale discrete event simulation", ACM Transactions on Modeling and Computer Simulation, 15(3), 2005.
+    """
+
+    def __init__(self, threshold=50, max_rungs=8):
+        self.threshold = threshold
+        self.max_rungs = max_rungs
+        self._size = 0
+
+        self._top = []
+        self._top_min = float("inf")
+        self._top_max = float("-inf")
+        # events after this time are appended to the top list
+        self._top_start = float("-inf")
+
+        self._rungs = []
+
+        # sorted list of the next events, consumed from index _bottom_pos
+        self._bottom = []
+        self._bottom_pos = 0
+
+    def push(self, event):
+        self._size += 1
+        time = event[0]
+        # the events at the start of the top list may already be in the ladder or in the bottom list, with smaller
+        # sequence numbers, so only later events are appended to the top list
+        if time > self._top_start:
+            self._top.append(event)
+            if time < self._top_min:
+                self._top_min = time
+            if time > self._top_max:
+                self._top_max = time
+            return
+
+        for rung in self._rungs:
+            if time >= rung.start + rung.current * rung.width:
+                rung.insert(event)
+                return
+
+        bisect.insort(self._bottom, event, lo=self._bottom_pos)
+
+    def pop(self):
+        if self._bottom_pos == len(self._bottom):
+            if self._size == 0:
+                raise IndexError("pop from an empty event set")
+            self._refill_bottom()
+
+        event = self._bottom[self._bottom_pos]
+        self._bottom_pos += 1
+        self._size -= 1
+        return event
+
+    def peek(self):
+        if self._bottom_pos == len(self._bottom):
+            if self._size == 0:
+                raise IndexError("peek from an empty event set")
+            self._refill_bottom()
+        return self._bottom[self._bottom_pos]
+
+    def _refill_bottom(self):
+        while True:
+            if not self._rungs:
+                self._top_to_ladder()
+                if not self._rungs:
+                    # the top events have been sorted directly into the bottom list
+                    return
+
+            rung = self._rungs[-1]
+            buckets = rung.buckets
+            while rung.current < len(buckets) and not buckets[rung.current]:
+                rung.current += 1
+            if rung.current == len(buckets):
+                # exhausted rung
+                self._rungs.pop()
+                continue
+
+            bucket = buckets[rung.current]
+            buckets[rung.current] = []
+            bucket_start = rung.start + rung.current * rung.width
+            rung.current += 1
+
+            if len(bucket) > self.threshold and len(self._rungs) < self.max_rungs:
+                min_time = min(event[0] for event in bucket)
+                max_time = max(event[0] for event in bucket)
+                if max_time > min_time:
+                    # spread the bucket over a finer rung
+                    new_rung = _Rung(bucket_start, rung.width / len(bucket), len(bucket))
+                    for event in bucket:
+                        new_rung.insert(event)
+                    self._rungs.append(new_rung)
+                    continue
+
+            bucket.sort()
+            self._bottom = bucket
+            self._bottom_pos = 0
+            return
+
+    def _top_to_ladder(self):
+        top = self._top
+        self._top = []
+        if self._top_max == self._top_min or len(top) <= self.threshold:
+            top.sort()
+            self._bottom = top
+            self._bottom_pos = 0
+            self._top_start = self._top_max
+        else:
+            width = (self._top_max - self._top_min) / len(top)
+            rung = _Rung(self._top_min, width, len(top) + 1)
+            for event in top:
+                rung.insert(event)
+            self._rungs.append(rung)
+            self._top_start = rung.start + width * len(rung.buckets)
+        self._top_min = float("inf")
+        self._top_max = float("-inf")
+
+    def __len__(self):
+        return self._size
+
+
+EVENT_SETS = {"heap": BinaryHeap, "calendar": CalendarQueue, "ladder": LadderQueue}
+r"""
+The available event set implementations, indexed by the name used in the configuration file.
+"""
+
+
+def make_event_set(event_set):
+    r"""
+    Instantiate an event set from its name.
+
+    Parameters
+    ----------
+    event_set : str or :class:`~omnetpypy.backends.event_sets.EventSet`
+        The name of the event set (a key of :data:`~omnetpypy.backends.event_sets.EVENT_SETS`),
+        or an event set instance, which is returned as is.
+
+    Returns
+    -------
+    :class:`~omnetpypy.backends.event_sets.EventSet`
+        The new, empty event set.
+
+    Raises
+    ------
+    ValueError
+        If the name does not correspond to any event set.
+    """
+    if isinstance(event_set, EventSet):
+        return event_set
+    if event_set not in EVENT_SETS:
+        raise ValueError(f"Invalid event set {event_set}. It must be one of {list(EVENT_SETS.keys())}")
+    return EVENT_SETS[event_set]()
@@ -0,0 +1,317 @@
+r"""
+This module implements the in-memory buffers where the connectors collect the samples of the metrics before dumping
+them to the temporary output files of the repetition.
+
+Samples are stored by column: numeric samples and timestamps in :class:`array.array` objects of doubles, the other
+values in lists. Appending a sample is then a couple of list-like appends, and the buffers are written to the output
+file in bulk when they reach a size in bytes, or at the end of the simulation.
+
+The samples of "number" and "time_weighted" metrics can also be written in a binary format ("npy"), as raw records of two little-endian
+doubles, "sample" and "timestamp" (see ``VECTOR_DTYPE``), that are appended to the output file as they are and read
+back with :func:`~omnetpypy.backends.metric_buffers.read_vector`, without formatting or parsing any text.
+
+The buffers of the "number" and "time_weighted" metrics also fold their samples into the accumulators of the
+statistics of the metric (see :class:`~omnetpypy.backends.metric_statistics.MetricStatistics` and
+:class:`~omnetpypy.backends.metric_statistics.TimeWeightedStatistics`) when they are flushed. The samples of the metrics
+that do not collect the "vector" are never written to a file.
+
+Modules can obtain a :class:`~omnetpypy.backends.metric_buffers.MetricHandle` once, with
+:meth:`~omnetpypy.front_end.simple_module.SimpleModule.metric`, to record samples straight into the buffer of a metric
+without looking it up by name.
+"""
+from array import array
+from numbers import Real
+
+import numpy as np
+import pandas as pd
+
+from omnetpypy.backends.metric_statistics import MetricStatistics, TimeWeightedStatistics
+
+__all__ = ["MetricBuffer", "MetricHandle", "read_vector", "DEFAULT_FLUSH_BYTES", "NUMERIC_TYPES", "OUTPUT_FORMATS",
+           "VECTOR_DTYPE"]
+
+# default size of the samples held in memory by every metric before they are dumped
+DEFAULT_FLUSH_BYTES = 1 << 20
+
+# formats of the output files of the vectors
+OUTPUT_FORMATS = ("csv", "npy")
+
+# the types of the metrics whose samples are numbers
+NUMERIC_TYPES = ("number", "time_weighted")
+
+# records of the binary output files of the numeric metrics
+VECTOR_DTYPE = np.dtype([("sample", "<f8"), ("timestamp", "<f8")])
+
+
+class MetricBuffer:
+    r"""
+    A columnar buffer for the samples of a metric.
+
+    Parameters
+    ----------
+    metric : :class:`~omnetpypy.utilities.FutureMetric`
+        The metric whose samples are buffered.
+    flush_bytes : int, optional
+        The size of the samples held in memory before the buffer asks to be flushed. Every value is counted as 8
+        bytes, i.e. a double or a reference to an object. Defaults to 1 MiB.
+    output_format : str, optional
+        The format of the output file, either "csv" or "npy". The "npy" format only applies to "number" and
+        "time_weighted" metrics, the other ones are always written as csv. Defaults to "csv".
+
+    Attributes
+    ----------
+    metric : :class:`~omnetpypy.utilities.FutureMetric`
+        The metric whose samples are buffered.
+    columns : list of str
+        The columns of the output file: "sample" and "timestamp", or the columns of a "dict" metric.
+    capacity : int
+        The number of samples held in memory before the buffer asks to be flushed.
+    binary : bool
+        Whether the samples are written in the binary format, as records of ``VECTOR_DTYPE``.
+    statistics : :class:`~omnetpypy.backends.metric_statistics.MetricStatistics` or \
+    :class:`~omnetpypy.backends.metric_statistics.TimeWeightedStatistics` or None
+        The accumulators of the statistics of the samples flushed so far, for the "number" and "time_weighted"
+        metrics.
+    header_written : bool
+        Whether the output file has already been created, with its header.
+
+    Raises
+    ------
+    ValueError
+        If ``flush_bytes`` is not positive, or ``output_format`` is not a known format.
+    """
+
+    def __init__(self, metric, flush_bytes=DEFAULT_FLUSH_BYTES, output_format="csv"):
+        if flush_bytes < 1:
+            raise ValueError(f"The flush threshold must be at least 1 byte, got {flush_bytes}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"The output format must be one of {OUTPUT_FORMATS}, got {output_format}")
+        self.metric = metric
+        self.binary = output_format == "npy" and metric.type in NUMERIC_TYPES
+        self.statistics = None
+        self._new_statistics()
+        self.columns = list(metric.columns) if metric.type == "dict" else ["sample", "timestamp"]
+        self.capacity = max(1, flush_bytes // (8 * len(self.columns)))
+        self.header_written = False
+        self.clear()
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def clear(self):
+        r"""
+        Discard the buffered samples.
+        """
+        if self.metric.type in NUMERIC_TYPES:
+            self.samples = array("d")
+        elif self.metric.type == "dict":
+            self.samples = {column: [] for column in self.columns if column != "timestamp"}
+        else:
+            self.samples = []
+        self.timestamps = array("d")
+
+    def reset(self, time=None):
+        r"""
+        Discard the buffered samples and the statistics, and start a new output file at the next flush.
+
+        Parameters
+        ----------
+        time : float or None, optional
+            The current simulation time. The statistics of a "time_weighted" metric restart from this time with the
+            current value of the state, if given. Defaults to ``None``.
+        """
+        if self.metric.type == "time_weighted" and time is not None:
+            self._fold()
+            self.statistics.restart(time)
+        else:
+            self._new_statistics()
+        self.clear()
+        self.header_written = False
+
+    def _new_statistics(self):
+        if self.metric.type == "number":
+            self.statistics = MetricStatistics(self.metric)
+        elif self.metric.type == "time_weighted":
+            self.statistics = TimeWeightedStatistics(self.metric)
+
+    def _fold(self):
+        # fold the buffered samples into the statistics
+        if self.statistics is None or not self.samples:
+            return
+        samples = np.frombuffer(self.samples, dtype=np.float64)
+        if self.metric.type == "time_weighted":
+            self.statistics.update(samples, np.frombuffer(self.timestamps, dtype=np.float64))
+        else:
+            self.statistics.update(samples)
+
+    def validate(self, value):
+        r"""
+        Check that a sample matches the schema of the metric. The samples of "str" metrics are not checked.
+
+        Parameters
+        ----------
+        value : float or str or dict
+            The sample.
+
+        Raises
+        ------
+        ValueError
+            If the sample of a "number" or "time_weighted" metric is not a real number, or the sample of a "dict"
+            metric is not a dictionary with a key for every column except "timestamp", and int, float or str values.
+        """
+        if self.metric.type in NUMERIC_TYPES:
+            if not isinstance(value, Real):
+                raise ValueError(f"The value of the {self.metric.type} metric {self.metric.name} must be a real "
+                                 f"number, got {value!r}")
+            return
+        if self.metric.type != "dict":
+            return
+        if not isinstance(value, dict):
+            raise ValueError(f"The value of the dict metric {self.metric.name} must be a dict")
+        if "timestamp" in value:
+            raise ValueError("The key 'timestamp' is reserved for the timestamp")
+        if set(value) != set(self.samples):
+            raise ValueError(f"The keys of the dict value must match the columns of the metric {self.metric.name}")
+        if not all(isinstance(item, (int, float, str)) for item in value.values()):
+            raise ValueError("The values of the dict must be int, float or str")
+
+    def append(self, value, timestamp):
+        r"""
+        Append a sample to the buffer, without checking it (see
+        :meth:`~omnetpypy.backends.metric_buffers.MetricBuffer.validate`).
+
+        Parameters
+        ----------
+        value : float or str or dict
+            The sample. The values of a "dict" metric must have a key for every column except "timestamp".
+        timestamp : int or float
+            The simulation time of the sample.
+
+        Returns
+        -------
+        bool
+            ``True`` if the buffer is full and should be flushed.
+        """
+        if self.metric.type == "dict":
+            for column, values in self.samples.items():
+                values.append(value[column])
+        else:
+            self.samples.append(value)
+        self.timestamps.append(timestamp)
+        return len(self.timestamps) >= self.capacity
+
+    def to_frame(self):
+        r"""
+        Return the buffered samples as a data frame with the columns of the output file.
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            The buffered samples.
+        """
+        if self.metric.type == "dict":
+            data = dict(self.samples)
+        elif self.metric.type in NUMERIC_TYPES:
+            data = {"sample": np.frombuffer(self.samples, dtype=np.float64) if self.samples else []}
+        else:
+            data = {"sample": self.samples}
+        data["timestamp"] = np.frombuffer(self.timestamps, dtype=np.float64) if self.timestamps else []
+        return pd.DataFrame(data, columns=self.columns)
+
+    def flush(self, filename):
+        r"""
+        Fold the buffered samples into the statistics, append them to an output file and clear the buffer. The first
+        flush creates the file and writes its header (if the file is a csv), even if the buffer is empty. Nothing is
+        written if the metric does not collect the "vector".
+
+        Parameters
+        ----------
+        filename : str
+            The path of the output file.
+        """
+        self._fold()
+        if not self.metric.vector:
+            self.clear()
+            return
+        if self.header_written and not self.timestamps:
+            return
+        if self.binary:
+            records = np.empty(len(self.timestamps), dtype=VECTOR_DTYPE)
+            records["sample"] = self.samples
+            records["timestamp"] = self.timestamps
+            with open(filename, "ab" if self.header_written else "wb") as f:
+                records.tofile(f)
+            self.header_written = True
+            self.clear()
+            return
+        self.to_frame().to_csv(filename, mode="a" if self.header_written else "w", header=not self.header_written,
+                               index=False)
+        self.header_written = True
+        self.clear()
+
+
+class MetricHandle:
+    r"""
+    A handle to record the samples of a metric, bound once to its buffer, so that recording a sample does not look
+    up the metric by name. Handles are returned by :meth:`~omnetpypy.backends.connector.Connector.metric_handle`,
+    usually through :meth:`~omnetpypy.front_end.simple_module.SimpleModule.metric`.
+
+    Parameters
+    ----------
+    connector : :class:`~omnetpypy.backends.connector.Connector`
+        The connector that dumps the buffer.
+    buffer : :class:`~omnetpypy.backends.metric_buffers.MetricBuffer`
+        The buffer of the metric.
+    validate : bool, optional
+        Whether every sample is checked against the schema of the metric before being recorded (see
+        :meth:`~omnetpypy.backends.metric_buffers.MetricBuffer.validate`). Defaults to ``False``.
+
+    Attributes
+    ----------
+    name : str
+        The name of the metric.
+    """
+
+    __slots__ = ("name", "_connector", "_buffer", "_validate")
+
+    def __init__(self, connector, buffer, validate=False):
+        self.name = buffer.metric.name
+        self._connector = connector
+        self._buffer = buffer
+        self._validate = validate
+
+    def record(self, value, timestamp=None):
+        r"""
+        Record a sample of the metric.
+
+        Parameters
+        ----------
+        value : float or str or dict
+            The sample.
+        timestamp : int or float or None, optional
+            The simulation time of the sample. If ``None`` (default), the current simulation time is used.
+        """
+        connector = self._connector
+        if connector.output_dir is None:
+            return
+        if self._validate:
+            self._buffer.validate(value)
+        if self._buffer.append(value, connector.get_time() if timestamp is None else timestamp):
+            connector.dump_metric(self.name)
+
+
+def read_vector(filename):
+    r"""
+    Read the samples of a numeric metric from an output file written in the binary format.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the output file.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The records of the file, with the fields "sample" and "timestamp" (see ``VECTOR_DTYPE``).
+    """
+    return np.fromfile(filename, dtype=VECTOR_DTYPE)
@@ -0,0 +1,339 @@
+r"""
+This module implements the accumulators of the scalar statistics of the metrics, that are updated while the
+simulation runs, so that the statistics do not require the samples to be stored.
+
+The samples are folded into the accumulators in batches, whenever the buffer of a metric is flushed (see
+:class:`~omnetpypy.backends.metric_buffers.MetricBuffer`): the count, the minimum, the maximum, the mean and the
+variance are exact (the mean and the variance are merged with the numerically stable update of Chan et al., the
+batched form of Welford's algorithm), while the median and the percentiles are estimated with a
+:class:`~omnetpypy.backends.metric_statistics.TDigest`, whose memory is bounded regardless of the number of samples.
+
+The samples of a "time_weighted" metric are the values of a state, e.g. the length of a queue, that holds from the
+time of a sample to the time of the next one. Their accumulators
+(:class:`~omnetpypy.backends.metric_statistics.TimeWeightedStatistics`) integrate the value over time.
+"""
+import numpy as np
+
+__all__ = ["MetricStatistics", "TimeWeightedStatistics", "TDigest", "PERCENTILES"]
+
+# the percentiles reported for the metrics that collect "percentiles"
+PERCENTILES = (1, 5, 25, 75, 95, 99)
+
+
+class TDigest:
+    r"""
+    A merging t-digest, a sketch to estimate the quantiles of a stream of samples with bounded memory
+    (T. Dunning and O. Ertl, "Computing extremely accurate quantiles using t-digests", 2019).
+
+    The samples are summarized by at most about ``compression / 2`` centroids, i.e. weighted means of adjacent
+    samples. Centroids are smaller near the extremes of the distribution, so the tail quantiles are estimated more
+    accurately than the central ones. Small sets of samples are kept exactly.
+
+    Parameters
+    ----------
+    compression : int, optional
+        The compression parameter: the larger, the more accurate and the larger the digest. Defaults to 200.
+
+    Attributes
+    ----------
+    means : :class:`numpy.ndarray`
+        The means of the centroids, in increasing order.
+    weights : :class:`numpy.ndarray`
+        The number of samples in each centroid.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def __len__(self):
+        return int(self.weights.sum())
+
+    def update(self, samples):
+        r"""
+        Add a batch of samples to the digest.
+
+        Parameters
+        ----------
+        samples : :class:`numpy.ndarray`
+            The samples.
+        """
+        if len(samples) == 0:
+            return
+        self.min = min(self.min, samples.min())
+        self.max = max(self.max, samples.max())
+
+        means = np.concatenate((self.means, samples))
+        weights = np.concatenate((self.weights, np.ones(len(samples))))
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # merge the adjacent centroids that fall in the same unit of the scale function
+        # k(q) = compression / (2 pi) * asin(2q - 1), evaluated at the center of every centroid
+        cumulative = np.cumsum(weights)
+        centers = (cumulative - weights / 2) / cumulative[-1]
+        groups = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * centers - 1))
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(groups)) + 1))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        r"""
+        Estimate quantiles of the samples.
+
+        Parameters
+        ----------
+        q : float or array_like of float
+            The quantiles, between 0 and 1.
+
+        Returns
+        -------
+        float or :class:`numpy.ndarray`
+            The estimated quantiles, or ``nan`` if the digest is empty.
+        """
+        if len(self.weights) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        # interpolate between the centers of the centroids, and between the extreme centroids and the extreme samples
+        cumulative = np.cumsum(self.weights)
+        centers = np.concatenate(([0], cumulative - self.weights / 2, [cumulative[-1]]))
+        means = np.concatenate(([self.min], self.means, [self.max]))
+        return np.interp(np.asarray(q) * cumulative[-1], centers, means)
+
+
+class MetricStatistics:
+    r"""
+    The accumulators of the statistics of a "number" metric (see
+    :class:`~omnetpypy.backends.metric_statistics`).
+
+    Parameters
+    ----------
+    metric : :class:`~omnetpypy.utilities.FutureMetric`
+        The metric, whose flags tell which statistics to report.
+    compression : int, optional
+        The compression parameter of the :class:`~omnetpypy.backends.metric_statistics.TDigest` that estimates the
+        median and the percentiles, if any. Defaults to 200.
+
+    Attributes
+    ----------
+    count : int
+        The number of samples.
+    mean : float
+        The mean of the samples.
+    m2 : float
+        The sum of the squared differences between the samples and their mean.
+    min : float
+        The minimum sample, or ``inf`` if there are no samples.
+    max : float
+        The maximum sample, or ``-inf`` if there are no samples.
+    digest : :class:`~omnetpypy.backends.metric_statistics.TDigest` or None
+        The sketch of the distribution of the samples, if the metric collects the median or the percentiles.
+    """
+
+    def __init__(self, metric, compression=200):
+        self.metric = metric
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.digest = TDigest(compression) if metric.median or metric.percentiles else None
+
+    def update(self, samples):
+        r"""
+        Fold a batch of samples into the accumulators.
+
+        Parameters
+        ----------
+        samples : :class:`numpy.ndarray`
+            The samples.
+        """
+        n = len(samples)
+        if n == 0:
+            return
+        batch_mean = samples.mean()
+        batch_m2 = np.square(samples - batch_mean).sum()
+        delta = batch_mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, samples.min())
+        self.max = max(self.max, samples.max())
+        if self.digest is not None:
+            self.digest.update(samples)
+
+    def results(self):
+        r"""
+        Return the statistics collected by the metric.
+
+        Returns
+        -------
+        dict
+            The statistics, indexed by their names ("mean", "median", "std", "var", "min", "max", "count",
+            "percentiles"). The percentiles are a list with the percentiles in ``PERCENTILES``. Without samples, the
+            mean, the standard deviation and the variance are 0, and the median and the percentiles are empty lists.
+        """
+        metric = self.metric
+        final = {}
+        if metric.mean:
+            final["mean"] = float(self.mean)
+        if metric.median:
+            final["median"] = float(self.digest.quantile(0.5)) if self.count else []
+        if metric.std:
+            final["std"] = float(np.sqrt(self.m2 / self.count)) if self.count else 0
+        if metric.var:
+            final["var"] = float(self.m2 / self.count) if self.count else 0
+        if metric.min:
+            final["min"] = float(self.min)
+        if metric.max:
+            final["max"] = float(self.max)
+        if metric.count:
+            final["count"] = self.count
+        if metric.percentiles:
+            final["percentiles"] = [float(p) for p in self.digest.quantile(np.array(PERCENTILES) / 100)] \
+                if self.count else []
+        return final
+
+
+class TimeWeightedStatistics:
+    r"""
+    The accumulators of the statistics of a "time_weighted" metric, whose samples are the values of a state that
+    holds until the next sample (see :class:`~omnetpypy.backends.metric_statistics`). Every value is weighted by the
+    time it holds, i.e. the integral of the value over time is accumulated, so a sample is needed only when the
+    state changes.
+
+    Parameters
+    ----------
+    metric : :class:`~omnetpypy.utilities.FutureMetric`
+        The metric, whose flags tell which statistics to report, and whose ``bins`` are the edges of the bins of the
+        histogram, if it collects the "histogram".
+
+    Attributes
+    ----------
+    count : int
+        The number of samples.
+    start : float or None
+        The time from which the values are integrated, i.e. the time of the first sample or of the last restart.
+    last_time : float or None
+        The time up to which the values are integrated.
+    last_value : float or None
+        The value of the state from ``last_time`` on.
+    integral : float
+        The integral of the value over time.
+    min : float
+        The minimum value, or ``inf`` if there are no samples.
+    max : float
+        The maximum value, or ``-inf`` if there are no samples.
+    histogram : :class:`numpy.ndarray` or None
+        The time spent in each bin, if the metric collects the "histogram". Values outside the bins are not counted.
+    """
+
+    def __init__(self, metric):
+        self.metric = metric
+        self.count = 0
+        self.start = None
+        self.last_time = None
+        self.last_value = None
+        self.integral = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.histogram = np.zeros(len(metric.bins) - 1) if metric.histogram else None
+
+    def update(self, samples, timestamps):
+        r"""
+        Fold a batch of samples into the accumulators. The timestamps must not decrease, also across batches.
+
+        Parameters
+        ----------
+        samples : :class:`numpy.ndarray`
+            The values of the state.
+        timestamps : :class:`numpy.ndarray`
+            The times at which the state takes the values.
+        """
+        if len(samples) == 0:
+            return
+        if self.last_time is None:
+            self.start = timestamps[0]
+            values, times = samples, timestamps
+        else:
+            # the previous value holds until the first sample of the batch
+            values = np.concatenate(([self.last_value], samples))
+            times = np.concatenate(([self.last_time], timestamps))
+        self._integrate(values[:-1], np.diff(times))
+        self.count += len(samples)
+        self.min = min(self.min, samples.min())
+        self.max = max(self.max, samples.max())
+        self.last_time = float(timestamps[-1])
+        self.last_value = float(samples[-1])
+
+    def advance(self, time):
+        r"""
+        Integrate the current value of the state up to a time, e.g. the end of the simulation.
+
+        Parameters
+        ----------
+        time : float
+            The time, not before the last sample.
+        """
+        if self.last_time is None or time <= self.last_time:
+            return
+        self._integrate(np.array([self.last_value]), np.array([time - self.last_time]))
+        self.last_time = time
+
+    def restart(self, time):
+        r"""
+        Discard the statistics accumulated so far and integrate again from a time, e.g. the end of a warm-up, with
+        the current value of the state.
+
+        Parameters
+        ----------
+        time : float
+            The time, not before the last sample.
+        """
+        last_value = self.last_value
+        self.__init__(self.metric)
+        if last_value is not None:
+            self.update(np.array([last_value]), np.array([time], dtype=np.float64))
+            self.count = 0
+
+    def _integrate(self, values, durations):
+        self.integral += float(np.dot(values, durations))
+        if self.histogram is not None:
+            self.histogram += np.histogram(values, bins=self.metric.bins, weights=durations)[0]
+
+    def results(self):
+        r"""
+        Return the statistics collected by the metric, up to the time of the last sample or of the last call to
+        :meth:`~omnetpypy.backends.metric_statistics.TimeWeightedStatistics.advance`.
+
+        Returns
+        -------
+        dict
+            The statistics, indexed by their names: "mean" is the time average of the value, "min" and "max" the
+            extreme values, "count" the number of samples and "histogram" the list of the fractions of time spent in
+            each bin. Without samples, the mean is 0 and the histogram is an empty list. If no time has elapsed
+            since the first sample, the mean and the fractions are ``nan``.
+        """
+        metric = self.metric
+        duration = self.last_time - self.start if self.last_time is not None else 0
+        final = {}
+        if metric.mean:
+            if self.last_time is None:
+                final["mean"] = 0
+            else:
+                final["mean"] = self.integral / duration if duration > 0 else float("nan")
+        if metric.min:
+            final["min"] = float(self.min)
+        if metric.max:
+            final["max"] = float(self.max)
+        if metric.count:
+            final["count"] = self.count
+        if metric.histogram:
+            if self.last_time is None:
+                final["histogram"] = []
+            else:
+                final["histogram"] = [float(t / duration) if duration > 0 else float("nan") for t in self.histogram]
+        return final
@@ -0,0 +1,244 @@
+r"""
+This module implements a native discrete event engine, that does not depend on any external simulation library.
+
+Pending events are stored in a future event set of ``(time, seq, target, port_name, message)`` tuples (a binary heap by
+default, see :mod:`~omnetpypy.backends.event_sets`) and are dispatched
+straight to the :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.handle_message` method of their target entity,
+without any intermediate generator, store or process object.
+"""
+from itertools import count
+
+from omnetpypy.backends.connector import Connector, Timer, initialization_schedule
+from omnetpypy.backends.metric_buffers import DEFAULT_FLUSH_BYTES
+from omnetpypy.backends.event_sets import make_event_set
+
+__all__ = ["NativeConnector"]
+
+
+class NativeConnector(Connector):
+    r"""
+    This class is a connector to the native simulation engine.
+
+    Every event is a tuple ``(time, seq, target, port_name, message)``, where ``seq`` is a monotonically increasing
+    counter that breaks ties between events scheduled at the same time in FIFO order, ``target`` is the entity that
+    will handle the message, and ``port_name`` is the name of the receiving port. Self messages have ``port_name`` set
+    to ``None`` and carry their :class:`~omnetpypy.backends.connector.Timer` instead of the message: cancelled timers
+    are left in the event set as tombstones and skipped when popped.
+    The ordering of events with the same timestamp is the same as with the SimPy engine.
+
+    Parameters
+    ----------
+    simulation : :class:`~omnetpypy.simulation.Simulation`
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metrics : list of :class:`~omnetpypy.utilities.FutureMetric` or None, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_dir : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    repetition : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    event_set : str or :class:`~omnetpypy.backends.event_sets.EventSet`, optional
+        The future event set implementation: "heap", "calendar" or "ladder". Defaults to "heap".
+        See :mod:`~omnetpypy.backends.event_sets`.
+    num_init_stages : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metric_flush_bytes : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_format : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+
+    Attributes
+    ----------
+    now : int or float
+        The current simulation time.
+    entities : dict of :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+        All the entities added to the simulation, indexed by their names.
+
+    See Also
+    --------
+    :class:`~omnetpypy.backends.connector.Connector`
+    """
+
+    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0, event_set="heap", num_init_stages=6,
+                 metric_flush_bytes=DEFAULT_FLUSH_BYTES, output_format="csv"):
+        super().__init__(simulation, metrics, output_dir, repetition, num_init_stages, metric_flush_bytes,
+                         output_format)
+        self.now = 0
+        self.entities = {}
+
+        # the future event set of (time, seq, target, port_name, message) tuples
+        self._events = make_event_set(event_set)
+        self._seq = count()
+
+        # entities to initialize at each initialization stage, see initialization_schedule
+        self._init_schedule = {}
+
+    def start_simulation(self, until=None):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.start_simulation`
+        """
+        # the initialization steps are events themselves, so that the events scheduled at time zero during one step
+        # are processed before the next step begins
+        self._schedule_initialization()
+        self.resume_simulation(until)
+
+    def resume_simulation(self, until=None):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.resume_simulation`
+        """
+        self._run(until)
+        if until is not None:
+            self.now = until
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # itertools.count objects cannot be pickled, so the sequence counter is saved as the next number
+        state["_seq"] = next(self._seq)
+        self._seq = count(state["_seq"])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._seq = count(state["_seq"])
+
+    def _schedule_initialization(self, entities=None):
+        # the schedule is computed once, the stages where no entity has to be initialized are skipped
+        if entities is None:
+            entities = self.simulation.network
+        self._init_schedule = dict(initialization_schedule(entities, self.num_init_stages))
+        if self._init_schedule:
+            initializer = _InitializationStep(self, list(self._init_schedule))
+            self._push(self.now, initializer, None, Timer(initializer.stages[0], initializer, self.now))
+
+    def initialize_step(self, step):
+        r"""
+        Run an initialization step on the entities that are initialized at that step.
+
+        Parameters
+        ----------
+        step : int
+            The initialization step.
+        """
+        for entity in self._init_schedule.get(step, ()):
+            entity.initialize(step)
+
+    def _run(self, until=None):
+        # main event loop, dispatches events until the event set is empty or the next event is at time >= until
+        events = self._events
+        pop = events.pop
+        peek = events.peek
+        if until is None:
+            until = float("inf")
+        while True:
+            try:
+                time = peek()[0]
+            except IndexError:
+                break
+            if time >= until:
+                break
+            time, seq, target, port_name, message = pop()
+            if port_name is None:
+                # self message, the event carries its timer
+                if not message.pending:
+                    continue
+                self.release_timer(message)
+                message = message.message
+            self.now = time
+            target.handle_message(message, port_name)
+
+    def _next_time(self):
+        # time of the next event in the event set (possibly a cancelled timer), or infinity if it is empty
+        try:
+            return self._events.peek()[0]
+        except IndexError:
+            return float("inf")
+
+    def _push(self, time, target, port_name, message):
+        self._events.push((time, next(self._seq), target, port_name, message))
+
+    def add_entity(self, entity):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.add_entity`
+        """
+        super().add_entity(entity)
+
+        self.entities[entity.name] = entity
+
+    def get_time(self):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.get_time`
+        """
+        return self.now
+
+    def schedule_port_input(self, port, message, delay=0):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.schedule_port_input`
+
+        Raises
+        ------
+        ValueError
+            If the delay is negative.
+        """
+        if delay < 0:
+            raise ValueError(f"Cannot schedule a port input in the past (delay {delay} < 0)")
+        self._push(self.now + delay, port.parent, port.name, message)
+
+    def schedule_self_message(self, message, entity, at=None, delay=None):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.schedule_self_message`
+        """
+        if not entity.is_listening:
+            raise Exception(f"Entity {entity} is not listening. Cannot schedule a self message.")
+
+        if at is not None:
+            time = at
+        elif delay is not None:
+            time = self.now + delay
+        else:
+            time = self.now
+        if time < self.now:
+            raise ValueError(f"Cannot schedule a self message in the past (time {time} < now {self.now})")
+
+        timer = Timer(message, entity, time)
+        self.register_timer(timer)
+        self._push(time, entity, None, timer)
+        return timer
+
+    def discard_timer(self, timer):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.discard_timer`
+        """
+        # nothing to do: the event stays in the heap as a tombstone, and it is skipped because the timer is not pending
+        pass
+
+
+class _InitializationStep:
+    # pseudo-entity that runs one initialization step on the network when its event is dispatched,
+    # then schedules the next step at the same simulation time. Its events are self messages carrying the step number
+
+    identifier = None
+
+    def __init__(self, connector, stages):
+        self.connector = connector
+        # the non-empty stages, in increasing order
+        self.stages = stages
+
+    def handle_message(self, step, port_name):
+        self.connector.initialize_step(step)
+        position = self.stages.index(step) + 1
+        if position < len(self.stages):
+            next_step = self.stages[position]
+            self.connector._push(self.connector.now, self, None, Timer(next_step, self, self.connector.now))
@@ -0,0 +1,864 @@
+r"""
+This module implements the parallel discrete event engines, that split the network into partitions and
+simulate each partition in a separate process.
+
+The processes advance in rounds, coordinated by the process that started the simulation, and exchange the
+messages sent across partitions at the end of every round. Two synchronization protocols are available:
+
+    - conservative (:class:`~omnetpypy.backends.parallel_connector.ConservativeConnector`): the rounds are
+      synchronous time windows, as in the YAWNS protocol [Nicol1993]_. All the partitions simulate the events of the
+      window :math:`[T, T + L)`, then the next window starts at the time of the earliest pending event across all the
+      partitions. The lookahead :math:`L` is the minimum delay of the channels that connect modules in different
+      partitions, so no message sent within a window can be received within the same window by another partition,
+      and events are never processed out of timestamp order.
+    - optimistic (:class:`~omnetpypy.backends.parallel_connector.TimeWarpConnector`): every partition processes its
+      events speculatively, and rolls back when it receives a message in its past, as in the Time Warp protocol
+      [Jefferson1985]_. No lookahead is needed, so modules in different partitions can be connected directly or
+      through zero-delay channels.
+
+References
+----------
+.. [Nicol1993] D. M. Nicol, "The cost of conservative synchronization in parallel discrete event simulations",
+   Journal of the ACM, 40(2), 1993.
+.. [Jefferson1985] D. R. Jefferson, "Virtual time", ACM Transactions on Programming Languages and Systems, 7(3),
+   1985.
+"""
+import copy
+import multiprocessing
+import traceback
+from collections import deque
+from operator import itemgetter
+
+import numpy as np
+
+from omnetpypy.backends.metric_buffers import DEFAULT_FLUSH_BYTES, MetricHandle
+from omnetpypy.backends.native_connector import NativeConnector, _InitializationStep
+from omnetpypy.front_end.channel import Channel
+from omnetpypy.front_end.message import Message, MessageView
+
+__all__ = ["ParallelConnector", "ConservativeConnector", "TimeWarpConnector", "partition_network"]
+
+
+def _walk(entity):
+    # yield an entity and all the entities nested in it, sub-entities first (the initialization order)
+    for sub_entity in getattr(entity, "sub_modules", {}).values():
+        yield from _walk(sub_entity)
+    yield entity
+
+
+def _object_state(obj):
+    # the attributes of a message, including the slots of :class:`~omnetpypy.front_end.message.Message`
+    # and :class:`~omnetpypy.front_end.message.MessageView`
+    if isinstance(obj, (Message, MessageView)):
+        return obj.__getstate__()
+    return obj.__dict__
+
+
+def _restore_object_state(obj, state):
+    # restore in place the attributes returned by _object_state
+    if isinstance(obj, (Message, MessageView)):
+        obj.__setstate__(state)
+    else:
+        obj.__dict__.clear()
+        obj.__dict__.update(state)
+
+
+def partition_network(network, num_partitions):
+    r"""
+    Split a network into partitions of contiguous top-level submodules.
+
+    The top-level submodules of the network (channels excluded) are split, in declaration order, into
+    ``num_partitions`` blocks of almost equal size. Every entity nested in a top-level submodule belongs to the
+    same partition as its ancestor. Top-level channels belong to the partition of the entity connected to their port
+    "A", and the network itself to partition 0.
+
+    Parameters
+    ----------
+    network : :class:`~omnetpypy.front_end.compound_module.CompoundModule`
+        The network to split.
+    num_partitions : int
+        The number of partitions.
+
+    Returns
+    -------
+    dict of int
+        The partition of each entity, indexed by the entity identifier.
+    """
+    owners = {network.identifier: 0}
+    modules = [entity for entity in network.sub_modules.values() if not isinstance(entity, Channel)]
+    for i, module in enumerate(modules):
+        for entity in _walk(module):
+            owners[entity.identifier] = i * num_partitions // len(modules)
+    for entity in network.sub_modules.values():
+        if isinstance(entity, Channel):
+            destinations = entity.ports["A"].destinations()
+            owners[entity.identifier] = owners.get(destinations[0].parent.identifier, 0) if destinations else 0
+    return owners
+
+
+class ParallelConnector(NativeConnector):
+    r"""
+    The base class of the connectors to the parallel simulation engines.
+
+    The network is split into ``partitions`` partitions with :func:`partition_network`, and every partition is
+    simulated by a native event loop (see :class:`~omnetpypy.backends.native_connector.NativeConnector`) in its own
+    process. The processes are forked when the simulation starts, so the whole network is replicated in every
+    process, but each process only handles the events of the entities of its partition. Partition 0 is simulated
+    by the calling process, which also coordinates the rounds of the others.
+
+    Channels are replicated in all the partitions: a message entering a channel is processed in the partition of
+    the sender.
+
+    Metric samples are forwarded to partition 0 and recorded in timestamp order.
+    Every partition other than 0 reseeds its random number generators with seeds derived from the seed set and the
+    partition index, so the results depend on the number of partitions but are reproducible.
+
+    Subclasses implement the synchronization protocol in the methods ``_coordinate``, that runs the rounds in the
+    coordinator, and ``_simulate_round``, that runs a round in every partition.
+
+    Parameters
+    ----------
+    simulation : :class:`~omnetpypy.simulation.Simulation`
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metrics : list of :class:`~omnetpypy.utilities.FutureMetric` or None, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_dir : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    repetition : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    partitions : int, optional
+        The number of partitions, i.e. of processes. Defaults to 2.
+    event_set : str or :class:`~omnetpypy.backends.event_sets.EventSet`, optional
+        The future event set of every partition. See :class:`~omnetpypy.backends.native_connector.NativeConnector`.
+    num_init_stages : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metric_flush_bytes : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_format : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+
+    Attributes
+    ----------
+    partitions : int
+        The number of partitions.
+    partition : int
+        The partition simulated by this process.
+
+    Raises
+    ------
+    ValueError
+        If the number of partitions is smaller than 1.
+
+    See Also
+    --------
+    :class:`~omnetpypy.backends.native_connector.NativeConnector`
+    """
+
+    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0, partitions=2, event_set="heap",
+                 num_init_stages=6, metric_flush_bytes=DEFAULT_FLUSH_BYTES, output_format="csv"):
+        super().__init__(simulation, metrics, output_dir, repetition, event_set=event_set,
+                         num_init_stages=num_init_stages, metric_flush_bytes=metric_flush_bytes,
+                         output_format=output_format)
+        if partitions < 1:
+            raise ValueError(f"The number of partitions must be at least 1, got {partitions}")
+        self.partitions = partitions
+        self.partition = 0
+
+        # partition of each entity, indexed by identifier
+        self._owners = {}
+        self._entities_by_id = {}
+        # identifiers of the entities whose port inputs are handled by this partition
+        self._local = set()
+
+        # (time, metric, value) of the samples not yet forwarded to the coordinator
+        self._metric_records = []
+
+    def start_simulation(self, until=None):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.start_simulation`
+        """
+        self._setup_partitions()
+        until = float("inf") if until is None else until
+
+        context = multiprocessing.get_context("fork")
+        workers = []
+        try:
+            for partition in range(1, self.partitions):
+                connection, child_connection = context.Pipe()
+                process = context.Process(target=self._worker, args=(partition, child_connection), daemon=True)
+                process.start()
+                child_connection.close()
+                workers.append((process, connection))
+
+            self._enter_partition(0)
+            self._coordinate(workers, until)
+        finally:
+            for process, connection in workers:
+                try:
+                    connection.send(("stop",))
+                except OSError:
+                    # the worker is already gone
+                    pass
+                process.join()
+                connection.close()
+
+        if until != float("inf"):
+            self.now = until
+
+    def resume_simulation(self, until=None):
+        r"""
+        The parallel engines cannot resume a simulation, because the partitions are simulated by processes that
+        terminate at the end of :meth:`~omnetpypy.backends.parallel_connector.ParallelConnector.start_simulation`.
+
+        Raises
+        ------
+        NotImplementedError
+            Always.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot resume a simulation")
+
+    def _setup_partitions(self):
+        network = self.simulation.network
+        self._owners = partition_network(network, self.partitions)
+        self._entities_by_id = {entity.identifier: entity for entity in _walk(network)}
+
+    def _enter_partition(self, partition):
+        # prepare this process to simulate the given partition
+        self.partition = partition
+        seed_set = getattr(self.simulation, "seed_set", None)
+        if partition > 0 and seed_set:
+            # independent, reproducible random streams in every partition
+            seeds = np.random.SeedSequence(list(seed_set) + [partition]).generate_state(len(seed_set))
+            self.simulation.rng.reseed([int(seed) for seed in seeds])
+
+        self._local = {identifier for identifier, entity in self._entities_by_id.items()
+                       if isinstance(entity, Channel) or self._owners[identifier] == partition}
+        # only the entities owned by the partition are initialized by this process
+        self._schedule_initialization([entity for entity in _walk(self.simulation.network)
+                                       if self._owners[entity.identifier] == partition])
+
+    def _coordinate(self, workers, until):
+        raise NotImplementedError("to be implemented by subclasses")
+
+    def _simulate_round(self, *args):
+        raise NotImplementedError("to be implemented by subclasses")
+
+    def _round(self, workers, arguments):
+        # run a round in all the partitions, with the given arguments for each partition, and return their results
+        for partition, (_, connection) in enumerate(workers, start=1):
+            connection.send(("run",) + arguments[partition])
+
+        results = [self._simulate_round(*arguments[0])]
+        for _, connection in workers:
+            reply = connection.recv()
+            if reply[0] == "error":
+                raise RuntimeError(f"A partition of the parallel simulation failed:\n{reply[1]}")
+            results.append(reply[1:])
+        return results
+
+    def _worker(self, partition, connection):
+        # main loop of the process simulating a partition other than 0
+        try:
+            self._enter_partition(partition)
+            while True:
+                command = connection.recv()
+                if command[0] == "stop":
+                    break
+                connection.send(("ok",) + self._simulate_round(*command[1:]))
+        except Exception:
+            try:
+                connection.send(("error", traceback.format_exc()))
+            except OSError:
+                pass
+        finally:
+            connection.close()
+
+    def _flush_metrics(self, records):
+        # record the samples collected from all the partitions, in time order (ties are broken by partition index)
+        records.sort(key=itemgetter(0))
+        for time, metric, value in records:
+            super().record_metric(metric, value, timestamp=time)
+
+    def metric_handle(self, metric, validate=False):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.metric_handle`
+
+        Notes
+        -----
+        The handles of the parallel engines pass the samples to
+        :meth:`~omnetpypy.backends.parallel_connector.ParallelConnector.record_metric`, because the samples are
+        recorded by partition 0.
+        """
+        handle = super().metric_handle(metric, validate)
+        return _ForwardingMetricHandle(self, handle._buffer, validate)
+
+    def record_metric(self, metric, value, timestamp=None):
+        r"""
+        Buffer a metric sample, that is recorded by partition 0 at the end of the current round.
+
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.record_metric`
+        """
+        if self.metrics is None:
+            raise Exception("No metrics have been defined for this simulation")
+        if self.output_dir is None:
+            return
+        self._metric_records.append((self.now if timestamp is None else timestamp, metric, value))
+
+
+class _ForwardingMetricHandle(MetricHandle):
+    # metric handle that forwards the samples to the record_metric method of a parallel connector
+
+    __slots__ = ()
+
+    def record(self, value, timestamp=None):
+        if self._validate:
+            self._buffer.validate(value)
+        self._connector.record_metric(self.name, value, timestamp)
+
+
+class ConservativeConnector(ParallelConnector):
+    r"""
+    This class is a connector to the conservative parallel simulation engine.
+
+    Modules in different partitions must be connected through channels (or links, see
+    :class:`~omnetpypy.front_end.port.Link`) with a positive delay. Every partition holds a replica of the channels,
+    and the messages delayed by a channel or a link between partitions are handed over directly to the input port of
+    the receiver, in its partition.
+    See :class:`~omnetpypy.backends.parallel_connector.ParallelConnector` for the common behavior of the parallel
+    engines.
+
+    Parameters
+    ----------
+    simulation : :class:`~omnetpypy.simulation.Simulation`
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metrics : list of :class:`~omnetpypy.utilities.FutureMetric` or None, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_dir : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    repetition : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    partitions : int, optional
+        See :class:`~omnetpypy.backends.parallel_connector.ParallelConnector`.
+    event_set : str or :class:`~omnetpypy.backends.event_sets.EventSet`, optional
+        See :class:`~omnetpypy.backends.parallel_connector.ParallelConnector`.
+    num_init_stages : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metric_flush_bytes : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_format : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+
+    Attributes
+    ----------
+    lookahead : float or None
+        The minimum delay of the channels and links between partitions (infinite if there are none).
+        It is computed when the simulation starts.
+
+    See Also
+    --------
+    :class:`~omnetpypy.backends.parallel_connector.ParallelConnector`
+    """
+
+    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0, partitions=2, event_set="heap",
+                 num_init_stages=6, metric_flush_bytes=DEFAULT_FLUSH_BYTES, output_format="csv"):
+        super().__init__(simulation, metrics, output_dir, repetition, partitions=partitions, event_set=event_set,
+                         num_init_stages=num_init_stages, metric_flush_bytes=metric_flush_bytes,
+                         output_format=output_format)
+        self.lookahead = None
+
+        # partition receiving the messages sent out of each channel port, indexed by (channel identifier, port name)
+        self._channel_destinations = {}
+
+        self._window_end = 0
+        # (partition, time, target identifier, port name, message) of the messages sent to other partitions
+        self._outgoing = []
+
+    def _setup_partitions(self):
+        super()._setup_partitions()
+
+        self.lookahead = float("inf")
+        for entity in self._entities_by_id.values():
+            if not entity.is_listening:
+                continue
+            for port in entity.ports.values():
+                _, destinations, link = port._resolve_output()
+                for destination in destinations:
+                    receiver = destination.parent
+                    if isinstance(entity, Channel):
+                        if isinstance(receiver, Channel):
+                            raise ValueError(f"Channel {entity.name} is connected to channel {receiver.name}: "
+                                             f"the parallel engine does not support chained channels")
+                        owner = self._owners[receiver.identifier]
+                        if self._channel_destinations.setdefault((entity.identifier, port.name), owner) != owner:
+                            raise ValueError(f"Port {port.name} of channel {entity.name} delivers messages to more "
+                                             f"than one partition")
+                    elif (not isinstance(receiver, Channel)
+                          and self._owners[entity.identifier] != self._owners[receiver.identifier]):
+                        if link is None or link.delay is None or link.delay <= 0:
+                            raise ValueError(f"Modules {entity.name} and {receiver.name} are in different "
+                                             f"partitions, so they must be connected through a channel with a "
+                                             f"positive delay")
+                        self.lookahead = min(self.lookahead, link.delay)
+
+        for entity in self._entities_by_id.values():
+            if not isinstance(entity, Channel):
+                continue
+            sides = {self._channel_destinations.get((entity.identifier, name)) for name in ("A", "B")} - {None}
+            if len(sides) > 1:
+                if entity.delay is None or entity.delay <= 0:
+                    raise ValueError(f"Channel {entity.name} connects modules in different partitions, "
+                                     f"so it must have a positive delay")
+                # the messages released by a pipeline are delayed less than the lookahead
+                entity.pipeline = False
+                self.lookahead = min(self.lookahead, entity.delay)
+
+    def _coordinate(self, workers, until):
+        # run the synchronous time windows
+        incoming = [[] for _ in range(self.partitions)]
+        next_time = self.now
+        last_time = self.now
+        while next_time < until:
+            window_end = min(next_time + self.lookahead, until)
+            results = self._round(workers, [(window_end, messages) for messages in incoming])
+
+            incoming = [[] for _ in range(self.partitions)]
+            records = []
+            next_time = float("inf")
+            for outgoing, partition_next_time, partition_records, partition_last_time in results:
+                for destination, time, identifier, port_name, message in outgoing:
+                    incoming[destination].append((time, identifier, port_name, message))
+                    next_time = min(next_time, time)
+                next_time = min(next_time, partition_next_time)
+                records.extend(partition_records)
+                last_time = max(last_time, partition_last_time)
+
+            # stable sort, so ties are broken by partition index and then by emission order
+            for messages in incoming:
+                messages.sort(key=itemgetter(0))
+            self._flush_metrics(records)
+
+        self.now = last_time
+
+    def _simulate_round(self, window_end, incoming):
+        # import the messages from the other partitions, then run the events before window_end
+        for time, identifier, port_name, message in incoming:
+            self._push(time, self._entities_by_id[identifier], port_name, message)
+
+        self._window_end = window_end
+        self._run(window_end)
+
+        outgoing, self._outgoing = self._outgoing, []
+        records, self._metric_records = self._metric_records, []
+        return outgoing, self._next_time(), records, self.now
+
+    def schedule_port_input(self, port, message, delay=0):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.schedule_port_input`
+
+        Notes
+        -----
+        The messages to entities of other partitions are handed over to their partition at the end of the round.
+
+        Raises
+        ------
+        RuntimeError
+            If the receiving entity belongs to another partition and the message would be received before the end
+            of the current time window, i.e. it is delayed less than the lookahead.
+        """
+        if port.parent.identifier in self._local:
+            super().schedule_port_input(port, message, delay)
+            return
+
+        time = self.now + delay
+        if time < self._window_end:
+            raise RuntimeError(f"Cannot deliver a message to {port.parent.name} after {delay}, because it belongs "
+                               f"to another partition and the lookahead is {self.lookahead}")
+        self._outgoing.append((self._owners[port.parent.identifier], time, port.parent.identifier, port.name,
+                               message))
+
+
+class _SnapshotMemo(dict):
+    # deepcopy memo that looks up the objects of a shared dictionary (entities, ports, the simulation, ...) as if they
+    # were already copied, so that the snapshots of an entity reference them instead of copying them
+
+    __slots__ = ("shared",)
+
+    def __init__(self, shared):
+        super().__init__()
+        self.shared = shared
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, self)
+        if value is self:
+            return self.shared.get(key, default)
+        return value
+
+
+class _ProcessedEvent:
+    # an event processed speculatively, with what is needed to undo it
+
+    __slots__ = ("event", "states", "message_state", "rng_state", "local", "remote", "cancelled", "metrics")
+
+    def __init__(self, event):
+        self.event = event
+        # (entity, attributes) before the event, None for the cancelled timers, that are only kept to be restored
+        # if their cancellation is rolled back
+        self.states = None
+        self.message_state = None
+        self.rng_state = None
+        # (key, timer or None) of the events scheduled in this partition
+        self.local = []
+        # (partition, time, key) of the messages sent to other partitions
+        self.remote = []
+        # timers cancelled by the handler
+        self.cancelled = []
+        # (time, metric, value) of the emitted samples
+        self.metrics = []
+
+
+class TimeWarpConnector(ParallelConnector):
+    r"""
+    This class is a connector to the optimistic (Time Warp) parallel simulation engine.
+
+    In every round, each partition processes up to ``batch`` events speculatively, without waiting for the other
+    partitions. Before handling an event, the partition saves a copy of the state of the receiving entity (its
+    attributes, except the references to entities, ports, timers and the simulation), of the received message
+    and of the random number generators. When a partition receives a message in its past (a straggler), it rolls
+    back: the events after the straggler are undone in reverse order, restoring the saved states, cancelling the
+    events they scheduled and sending anti-messages that annihilate the messages they sent to other partitions.
+
+    At the end of every round, the coordinator computes the global virtual time (GVT), i.e. the minimum time of the
+    pending events and of the messages in transit. No partition can roll back before the GVT, so the processed
+    events before the GVT are committed: their saved states are released, and their metric samples are recorded.
+
+    Simultaneous events are ordered by the time at which they were scheduled, then by partition index and scheduling
+    order, so the results do not depend on the scheduling of the processes.
+    Existing modules run unchanged, as long as their handlers only modify their own state and the messages they
+    handle or send.
+
+    Parameters
+    ----------
+    simulation : :class:`~omnetpypy.simulation.Simulation`
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metrics : list of :class:`~omnetpypy.utilities.FutureMetric` or None, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_dir : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    repetition : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    partitions : int, optional
+        See :class:`~omnetpypy.backends.parallel_connector.ParallelConnector`.
+    batch : int, optional
+        The maximum number of events processed by every partition in a round. Larger batches reduce the
+        synchronization overhead, but increase the optimism, i.e. the amount of work that may be rolled back.
+        Defaults to 100.
+    window : float or None, optional
+        If not ``None``, the partitions only process the events earlier than the GVT plus ``window``, which bounds
+        the optimism in simulation time. Defaults to ``None``.
+    event_set : str or :class:`~omnetpypy.backends.event_sets.EventSet`, optional
+        See :class:`~omnetpypy.backends.parallel_connector.ParallelConnector`.
+    num_init_stages : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    metric_flush_bytes : int, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+    output_format : str, optional
+        See :class:`~omnetpypy.backends.connector.Connector`.
+
+    Attributes
+    ----------
+    batch : int
+        The maximum number of events processed by every partition in a round.
+    window : float or None
+        The optimism window in simulation time.
+    rolled_back : int
+        The number of events rolled back by this partition.
+
+    Raises
+    ------
+    ValueError
+        If the batch size is smaller than 1, or the window is not positive.
+
+    See Also
+    --------
+    :class:`~omnetpypy.backends.parallel_connector.ParallelConnector`
+    """
+
+    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0, partitions=2, batch=100,
+                 window=None, event_set="heap", num_init_stages=6, metric_flush_bytes=DEFAULT_FLUSH_BYTES,
+                 output_format="csv"):
+        super().__init__(simulation, metrics, output_dir, repetition, partitions=partitions, event_set=event_set,
+                         num_init_stages=num_init_stages, metric_flush_bytes=metric_flush_bytes,
+                         output_format=output_format)
+        if batch < 1:
+            raise ValueError(f"The batch size must be at least 1, got {batch}")
+        if window is not None and window <= 0:
+            raise ValueError(f"The optimism window must be positive, got {window}")
+        self.batch = batch
+        self.window = window
+        self.rolled_back = 0
+
+        # processed and not yet committed events, in (time, key) order
+        self._processed = deque()
+        # the event being handled
+        self._current = None
+        # keys of the pending events annihilated by anti-messages or rollbacks
+        self._cancelled = set()
+        # objects referenced, not copied, by the snapshots, indexed by id
+        self._shared = {}
+        # (partition, positive, time, key, target identifier, port name, message) of the messages sent to other
+        # partitions, anti-messages have positive set to False
+        self._outgoing = []
+        self._last_committed = 0
+
+    def _enter_partition(self, partition):
+        shared = self._shared
+        for obj in (self, self.simulation, getattr(self.simulation, "rng", None)):
+            shared[id(obj)] = obj
+        for entity in self._entities_by_id.values():
+            if isinstance(entity, Channel):
+                # the pipeline of a channel would be saved before every event of the channel
+                entity.pipeline = False
+            shared[id(entity)] = entity
+            for port in entity.ports.values():
+                shared[id(port)] = port
+            for vector in entity.port_vectors.values():
+                shared[id(vector)] = vector
+        super()._enter_partition(partition)
+
+    def _new_key(self):
+        # events are ordered by (time, key), with key = (scheduling time, depth, partition, counter). The depth counts
+        # the chain of events scheduled at the same time, so that an event always follows the one that scheduled it
+        current = self._current
+        if current is not None and current.event[1][0] == self.now:
+            depth = current.event[1][1] + 1
+        else:
+            depth = 0
+        return self.now, depth, self.partition, next(self._seq)
+
+    def _push(self, time, target, port_name, message):
+        key = self._new_key()
+        self._events.push((time, key, target, port_name, message))
+        if self._current is not None:
+            self._current.local.append((key, message if port_name is None else None))
+
+    def _coordinate(self, workers, until):
+        # run the rounds until the GVT reaches the end of the simulation, then a last round to commit the rest
+        gvt = self.now
+        last_time = self.now
+        incoming = [[] for _ in range(self.partitions)]
+        while True:
+            results = self._round(workers, [(gvt, messages, until) for messages in incoming])
+
+            incoming = [[] for _ in range(self.partitions)]
+            records = []
+            next_gvt = float("inf")
+            for outgoing, next_time, partition_records, partition_last_time in results:
+                for message in outgoing:
+                    incoming[message[0]].append(message[1:])
+                    next_gvt = min(next_gvt, message[2])
+                next_gvt = min(next_gvt, next_time)
+                records.extend(partition_records)
+                last_time = max(last_time, partition_last_time)
+            self._flush_metrics(records)
+
+            if gvt >= until:
+                break
+            gvt = next_gvt
+
+        self.now = last_time
+
+    def _simulate_round(self, gvt, incoming, until):
+        # commit the events before the GVT, import the messages from the other partitions and process a batch
+        records, self._metric_records = self._metric_records, []
+        processed = self._processed
+        while processed and processed[0].event[0] < gvt:
+            record = processed.popleft()
+            records.extend(record.metrics)
+            self._last_committed = record.event[0]
+
+        for positive, time, key, identifier, port_name, message in incoming:
+            if positive:
+                if processed and (time, key) < processed[-1].event[:2]:
+                    self._rollback(time, key)
+                self._events.push((time, key, self._entities_by_id[identifier], port_name, message))
+            else:
+                for record in reversed(processed):
+                    if record.event[0] < time:
+                        break
+                    if record.event[1] == key:
+                        self._rollback(time, key)
+                        break
+                self._cancelled.add(key)
+
+        self._run_optimistic(until if self.window is None else min(until, gvt + self.window))
+
+        outgoing, self._outgoing = self._outgoing, []
+        return outgoing, self._next_time(), records, self._last_committed
+
+    def _run_optimistic(self, until):
+        # process up to batch events before until, saving what is needed to undo them
+        pop = self._events.pop
+        peek = self._events.peek
+        cancelled = self._cancelled
+        processed = self._processed
+        count = 0
+        while count < self.batch:
+            try:
+                if peek()[0] >= until:
+                    break
+            except IndexError:
+                break
+            event = pop()
+            time, key, target, port_name, message = event
+            if key in cancelled:
+                cancelled.discard(key)
+                continue
+            if port_name is None and not message.pending:
+                # timer cancelled by a handler, kept in case the cancellation is rolled back
+                processed.append(_ProcessedEvent(event))
+                continue
+
+            record = self._save(event)
+            if port_name is None:
+                self.release_timer(message)
+                message = message.message
+            self.now = time
+            self._current = record
+            target.handle_message(message, port_name)
+            self._current = None
+            processed.append(record)
+            count += 1
+
+    def _save(self, event):
+        # snapshot the state that the event handler may change
+        _, _, target, port_name, message = event
+        if port_name is None:
+            message = message.message
+        record = _ProcessedEvent(event)
+
+        # the message keeps its identity, its content is restored in place
+        memo = _SnapshotMemo(self._shared)
+        memo[id(message)] = message
+        entities = self._init_schedule[message] if isinstance(target, _InitializationStep) else [target]
+        record.states = [(entity, copy.deepcopy(entity.__dict__, memo)) for entity in entities]
+        if isinstance(message, (Message, MessageView)) or hasattr(message, "__dict__"):
+            record.message_state = copy.deepcopy(_object_state(message), _SnapshotMemo(self._shared))
+
+        rng = getattr(self.simulation, "rng", None)
+        if rng is not None:
+            record.rng_state = rng.get_all_states()
+        return record
+
+    def _rollback(self, time, key):
+        # undo all the processed events at or after (time, key), in reverse order
+        processed = self._processed
+        while processed and processed[-1].event[:2] >= (time, key):
+            record = processed.pop()
+            event = record.event
+            if record.states is not None:
+                for timer in reversed(record.cancelled):
+                    self._restore_timer(timer)
+                for local_key, timer in record.local:
+                    self._cancelled.add(local_key)
+                    if timer is not None and timer.pending:
+                        self.release_timer(timer)
+                for partition, remote_time, remote_key in record.remote:
+                    self._outgoing.append((partition, False, remote_time, remote_key, None, None, None))
+
+                for entity, state in record.states:
+                    entity.__dict__.clear()
+                    entity.__dict__.update(state)
+                if record.message_state is not None:
+                    message = event[4].message if event[3] is None else event[4]
+                    _restore_object_state(message, record.message_state)
+                if record.rng_state is not None:
+                    self.simulation.rng.set_all_states(record.rng_state)
+                if event[3] is None:
+                    self._restore_timer(event[4])
+                self.rolled_back += 1
+            self._events.push(event)
+        self.now = processed[-1].event[0] if processed else self._last_committed
+
+    def _restore_timer(self, timer):
+        timer.pending = True
+        if not isinstance(timer.entity, _InitializationStep):
+            self.register_timer(timer)
+
+    def register_timer(self, timer):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.register_timer`
+        """
+        super().register_timer(timer)
+        # the snapshots keep the identity of the pending messages, so that they can still be cancelled after a rollback
+        self._shared[id(timer.message)] = timer.message
+
+    def release_timer(self, timer):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.release_timer`
+        """
+        super().release_timer(timer)
+        if (timer.entity.identifier, id(timer.message)) not in self._timers:
+            self._shared.pop(id(timer.message), None)
+
+    def discard_timer(self, timer):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.discard_timer`
+        """
+        # the event stays in the event set as a tombstone, the cancellation is logged to be undone by a rollback
+        if self._current is not None:
+            self._current.cancelled.append(timer)
+
+    def schedule_port_input(self, port, message, delay=0):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.schedule_port_input`
+
+        Raises
+        ------
+        ValueError
+            If the delay is negative.
+        """
+        if delay < 0:
+            raise ValueError(f"Cannot schedule a port input in the past (delay {delay} < 0)")
+        receiver = port.parent
+        time = self.now + delay
+        if receiver.identifier in self._local:
+            self._push(time, receiver, port.name, message)
+            return
+
+        partition = self._owners[receiver.identifier]
+        key = self._new_key()
+        self._outgoing.append((partition, True, time, key, receiver.identifier, port.name, message))
+        if self._current is not None:
+            self._current.remote.append((partition, time, key))
+
+    def record_metric(self, metric, value, timestamp=None):
+        r"""
+        Buffer a metric sample, that is recorded by partition 0 when the event that emitted it is committed.
+
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.record_metric`
+        """
+        if self._current is None:
+            super().record_metric(metric, value, timestamp)
+            return
+        if self.metrics is None:
+            raise Exception("No metrics have been defined for this simulation")
+        if self.output_dir is not None:
+            self._current.metrics.append((self.now if timestamp is None else timestamp, metric, value))
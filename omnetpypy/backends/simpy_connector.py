@@ -1,10 +1,41 @@
 """This module implements the connector to the SimPy simulation engine."""
-from omnetpypy.backends.connector import Connector
+from itertools import count
+
+from omnetpypy.backends.connector import Connector, Timer, initialization_schedule
+from omnetpypy.backends.metric_buffers import DEFAULT_FLUSH_BYTES
 import simpy
+from simpy.core import BoundClass
 
 __all__ = ["SimPyConnector"]
 
 
+class _Environment(simpy.Environment):
+    # a SimPy environment that can be pickled, to take snapshots of the simulation
+
+    def __init__(self):
+        super().__init__()
+        self._bind()
+
+    def _bind(self):
+        # bind the event classes (timeout, process, ...) to the instance, as SimPy does for its own environments
+        for name, obj in simpy.Environment.__dict__.items():
+            if type(obj) is BoundClass:
+                setattr(self, name, getattr(self, name))
+
+    def __getstate__(self):
+        state = {key: value for key, value in self.__dict__.items()
+                 if type(simpy.Environment.__dict__.get(key)) is not BoundClass}
+        # itertools.count objects cannot be pickled, so the event counter is saved as the next number
+        state["_eid"] = next(self._eid)
+        self._eid = count(state["_eid"])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._eid = count(state["_eid"])
+        self._bind()
+
+
 class SimPyConnector(Connector):
     r"""
     This class is a connector to the SimPy simulation engine.
@@ -14,11 +45,12 @@ class SimPyConnector(Connector):
     :class:`~omnetpypy.backends.connector.Connector`
     """
 
-    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0):
-        super().__init__(simulation, metrics, output_dir, repetition)
-        self.env = simpy.Environment()
+    def __init__(self, simulation, metrics=None, output_dir=None, repetition=0, num_init_stages=6,
+                 metric_flush_bytes=DEFAULT_FLUSH_BYTES, output_format="csv"):
+        super().__init__(simulation, metrics, output_dir, repetition, num_init_stages, metric_flush_bytes,
+                         output_format)
+        self.env = _Environment()
         self.entities = {}
-        self._wrappers = {}
 
     def start_simulation(self, until=None):
         r"""
@@ -26,8 +58,17 @@ class SimPyConnector(Connector):
         --------
         :meth:`~omnetpypy.backends.connector.Connector.start_simulation`
         """
-        # we load a process that calls initialize for each entity
-        self.env.process(initialize_entity(self.simulation.network))
+        # we load a process that calls initialize for each entity, following a schedule computed once
+        schedule = initialization_schedule(self.simulation.network, self.num_init_stages)
+        self.env.process(initialize_entities(self.env, schedule))
+        self.resume_simulation(until)
+
+    def resume_simulation(self, until=None):
+        r"""
+        See Also
+        --------
+        :meth:`~omnetpypy.backends.connector.Connector.resume_simulation`
+        """
         if until is not None:
             self.env.run(until=until)
         else:
@@ -39,16 +80,11 @@ class SimPyConnector(Connector):
         --------
         :meth:`~omnetpypy.backends.connector.Connector.add_entity`
         """
-        # entity is a simple module
-        # we need to implement the module as a process
-        # and add it to the environment
+        # entities do not need a process: messages are delivered to them by event callbacks
         super().add_entity(entity)
 
         self.entities[entity.name] = entity
 
-        if entity.is_listening:
-            self._wrappers[entity.identifier] = ModuleProcessWrapper(entity, self.env)
-
     def get_time(self):
         r"""
         See Also
@@ -57,14 +93,16 @@ class SimPyConnector(Connector):
         """
         return self.env.now
 
-    def schedule_port_input(self, port, message):
+    def schedule_port_input(self, port, message, delay=0):
         r"""
         See Also
         --------
         :meth:`~omnetpypy.backends.connector.Connector.schedule_port_input`
         """
-        # put the message in the store of the module wrapper
-        self._wrappers[port.parent.identifier].put(message, port.name)
+        # a single timeout event carries the message, and its callback invokes the receiving entity directly.
+        # Events with the same time are processed in FIFO order, as they were with a store per module
+        event = self.env.timeout(delay, value=(port.parent, port.name, message))
+        event.callbacks.append(_dispatch_port_input)
 
     def schedule_self_message(self, message, entity, at=None, delay=None):
         r"""
@@ -74,85 +112,49 @@ class SimPyConnector(Connector):
         """
         if not entity.is_listening:
             raise Exception(f"Entity {entity} is not listening. Cannot schedule a self message.")
-        # create a process using the schedule_message function
-        process = self.env.process(schedule_message(message, self._wrappers[entity.identifier], at, delay))
-        # put the message and the process in the scheduled messages list
-        self._wrappers[entity.identifier].scheduled_messages.append((message, process))
-
-    def is_scheduled(self, message, entity):
-        r"""
-        See Also
-        --------
-        :meth:`~omnetpypy.backends.connector.Connector.is_scheduled`
-        """
-        # check if the message is in the scheduled messages list
-        for m, p in self._wrappers[entity.identifier].scheduled_messages:
-            if m == message:
-                return True
-        return False
-
-    def cancel_scheduled(self, message, entity):
+        if at is not None:
+            time = at
+        elif delay is not None:
+            time = self.env.now + delay
+        else:
+            time = self.env.now
+        if time < self.env.now:
+            raise ValueError(f"Cannot schedule a self message in the past (time {time} < now {self.env.now})")
+
+        timer = Timer(message, entity, time)
+        # a single timeout event carries the timer, and its callback delivers the message directly to the entity
+        timer.event = self.env.timeout(time - self.env.now, value=timer)
+        timer.event.callbacks.append(self._fire_timer)
+        self.register_timer(timer)
+        return timer
+
+    def _fire_timer(self, event):
+        timer = event.value
+        if not timer.pending:
+            # cancelled timer
+            return
+        self.release_timer(timer)
+        timer.entity.handle_message(timer.message, None)
+
+    def discard_timer(self, timer):
         r"""
         See Also
         --------
-        :meth:`~omnetpypy.backends.connector.Connector.cancel_scheduled`
+        :meth:`~omnetpypy.backends.connector.Connector.discard_timer`
         """
-        # cancel the scheduled message
-        for m, p in self._wrappers[entity.identifier].scheduled_messages:
-            if m == message:
-                p.interrupt()
-                self._wrappers[entity.identifier].scheduled_messages.remove((m, p))
-
-
-class ModuleProcessWrapper:
-
-    def __init__(self, module, env):
-        self.module = module
-        # define a store for the messages
-        self.store = simpy.Store(env)
-        # define a process for the module
-        self.process = env.process(self.run())
-
-        self.env = env
-
-        self.scheduled_messages = []
-
-    def run(self):
-        while True:
-            try:
-                message, port_name = yield self.store.get()
-                self.module.handle_message(message, port_name)
-            except simpy.Interrupt:
-                break
-
-    def put(self, message, port_name):
-        self.store.put((message, port_name))
-
-
-def schedule_message(message, wrapper, at=None, delay=None):
-    # wait for a given time (either at or delay) and then put a message in the store
-    try:
-        if at:
-            yield wrapper.env.timeout(at - wrapper.env.now)
-        elif delay:
-            yield wrapper.env.timeout(delay)
-        wrapper.put(message=message, port_name=None)
-        # remove the message from the scheduled messages list
-        for m, p in wrapper.scheduled_messages:
-            if m == message:
-                wrapper.scheduled_messages.remove((m, p))
-    except simpy.Interrupt:
+        # nothing to do: the timeout event stays in the SimPy queue, and its callback ignores the cancelled timer
         pass
 
 
-def initialize_entity(entity):
-    for step in range(0, 6):
-        yield entity.sim_context.connector.env.timeout(0)
-        initialize_entity_with_step(entity, step)
+def _dispatch_port_input(event):
+    entity, port_name, message = event.value
+    entity.handle_message(message, port_name)
+
 
+def initialize_entities(env, schedule):
+    # run the initialization stages in order, with a zero-delay event between them
+    for step, entities in schedule:
+        yield env.timeout(0)
+        for entity in entities:
+            entity.initialize(step)
 
-def initialize_entity_with_step(entity, step):
-    if hasattr(entity, "sub_modules"):
-        for sub_entity in entity.sub_modules.values():
-            initialize_entity_with_step(sub_entity, step)
-    entity.initialize(step)
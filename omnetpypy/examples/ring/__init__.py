@@ -0,0 +1,10 @@
+"""
+This toy simulation implements a ring of nodes that forward tokens to their successor.
+Every node injects a number of tokens at the beginning of the simulation, and every token travels around the ring
+forever, through channels with a fixed delay. It is a simple workload to compare the simulation engines,
+including the parallel ones, since the number of hops does not depend on random numbers.
+"""
+
+from omnetpypy.examples.ring.ring_simple import RingNode
+
+__all__ = ["RingNode"]
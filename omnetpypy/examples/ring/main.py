@@ -0,0 +1,12 @@
+"""
+Main file for the ring simulation example.
+"""
+
+from omnetpypy import Experiment
+
+if __name__ == '__main__':
+
+    config_file = "ring_config.yaml"
+
+    experiment = Experiment(config_file=config_file)
+    experiment.run_simulations()
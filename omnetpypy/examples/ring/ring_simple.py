@@ -0,0 +1,45 @@
+from omnetpypy import SimpleModule, Message
+
+__all__ = ["RingNode"]
+
+
+class RingNode(SimpleModule):
+    """
+    A node of the ring. It receives tokens on port "in" and forwards them on port "out", after an optional
+    processing delay. Every forwarded token is recorded as a sample of the "Hops" metric.
+
+    Parameters
+    ----------
+    name : str
+        The name of the node.
+    identifier : int
+        The identifier of the node. This identifier should be unique within the simulation.
+    tokens : int, optional
+        The number of tokens injected by this node at the beginning of the simulation. Defaults to 1.
+    processing_delay : float, optional
+        The delay between the reception of a token and its forwarding. Defaults to 0.
+    """
+
+    def __init__(self, name, identifier, tokens=1, processing_delay=0):
+        super().__init__(name, identifier, port_names=["in", "out"])
+        self.tokens = tokens
+        self.processing_delay = processing_delay
+        self.forwarded = 0
+
+    def initialize(self, step=0):
+        if step == 0:
+            for i in range(self.tokens):
+                self.send(Message(fields=[self.name, i]), port_name="out")
+
+    def handle_message(self, message, port_name):
+        if port_name is None:  # end of the processing delay
+            self.forward(message)
+        elif self.processing_delay > 0:
+            self.schedule_message(message, delay=self.processing_delay)
+        else:
+            self.forward(message)
+
+    def forward(self, message):
+        self.forwarded += 1
+        self.send(message, port_name="out")
+        self.emit_metric("Hops", 1)
@@ -3,8 +3,8 @@ The front end of the omnetpypy package contains all the tools necessary to users
 """
 
 from .simple_module import SimpleModule
-from .message import Message
+from .message import Message, MessageView, MessagePool
 from .compound_module import CompoundModule
 from .channel import Channel
 
-__all__ = ["SimpleModule", "Message", "CompoundModule", "Channel"]
\ No newline at end of file
+__all__ = ["SimpleModule", "Message", "MessageView", "MessagePool", "CompoundModule", "Channel"]
\ No newline at end of file
@@ -2,7 +2,10 @@ r"""
 This module implements the :meth:`~omnetpypy.front_end.channel.Channel` class,
 which implements advanced connectivity between ports in the simulation.
 """
+from collections import deque
+
 from omnetpypy.front_end import Message
+from omnetpypy.front_end.message import MessageTrain
 from omnetpypy.front_end.sim_entity import SimulatedEntity
 
 
@@ -17,6 +20,15 @@ class Channel(SimulatedEntity):
     Subclasses can override the methods :meth:`~omnetpypy.front_end.channel.Channel.process_message` to apply more
     complex and asymmetric operations on the messages passing through the channel.
 
+    Channels accept :class:`~omnetpypy.front_end.message.MessageTrain` objects: the messages of a train are processed
+    one by one when the train enters the channel, and the surviving ones leave the channel as a single train.
+
+    When the delay is constant (i.e. :meth:`~omnetpypy.front_end.channel.Channel.generate_delay` is not overridden),
+    messages leave the channel in the order they entered it. In this case the channel keeps the messages in flight
+    in a FIFO pipeline for each direction, and only the next message to arrive is scheduled in the event set: the
+    following one is released when it arrives. This keeps the event set small on links with many messages in
+    flight. Set ``pipeline`` to ``False`` to schedule every message as soon as it enters the channel.
+
     Parameters
     ----------
     name : str
@@ -29,6 +41,8 @@ class Channel(SimulatedEntity):
     loss_prob : float or None, optional
         The probability of loss to be applied to the messages passing through the channel.
         If ``None``, no loss is applied.
+    pipeline : bool, optional
+        Whether a channel with a constant delay keeps the messages in flight in a FIFO pipeline. Defaults to ``True``.
 
     Attributes
     ----------
@@ -38,32 +52,48 @@ class Channel(SimulatedEntity):
     loss_prob : float or None
         The probability of loss to be applied to the messages passing through the channel.
         If ``None``, no loss is applied.
+    pipeline : bool
+        Whether a channel with a constant delay keeps the messages in flight in a FIFO pipeline.
     """
 
-    def __init__(self, name, identifier=None, delay=None, loss_prob=None):
+    accepts_trains = True
+
+    def __init__(self, name, identifier=None, delay=None, loss_prob=None, pipeline=True):
         super().__init__(name, identifier, port_names=["A", "B"])
         self.is_listening = True
         self.delay = delay
         self.loss_prob = loss_prob
+        self.pipeline = pipeline
+
+        # (arrival time, message) of the messages not yet released out of each port, in arrival order
+        self._pipelines = {"A": deque(), "B": deque()}
+        # arrival time of the last message released out of each port
+        self._released_until = {"A": float("-inf"), "B": float("-inf")}
 
     def handle_message(self, message, port_name):
         r"""
         Handle a message received from a port. First, it processes the message  by calling the method
         :meth:`~omnetpypy.front_end.channel.Channel.process_message`, then it applies the
         optional delay and loss probability, and finally it sends the message out of the other port (if not lost).
+        A delayed message is scheduled directly for reception by the ports connected to the other side at the current
+        time plus the delay, so that traversing the channel takes a single event, unless it waits in the pipeline
+        behind other messages in flight (see :class:`~omnetpypy.front_end.channel.Channel`).
 
         Parameters
         ----------
         message : Message
             The message to be handled.
-        port_name : str
-            The port from which the message was received.
+        port_name : str or None
+            The port from which the message was received, or ``None`` when the next message of a pipeline is
+            released.
         """
 
-        if port_name is None:  # this is a self message, should be immediately sent to the other port
-            port = message.meta["port_noneshouldusethiskey"]
-            del message.meta["port_noneshouldusethiskey"]
-            self.send(message, port)
+        if port_name is None:  # the head of the pipeline out of the port given as message has arrived
+            self._release(message)
+            return
+
+        if isinstance(message, MessageTrain):
+            self._handle_train(message, port_name)
             return
 
         post_processed_message = self.process_message(message, port_name)
@@ -72,9 +102,56 @@ class Channel(SimulatedEntity):
         out_port = "B" if port_name == "A" else "A"
         if not should_drop and (self.delay is None or self.delay <= 0):
             self.send(post_processed_message, out_port)
+        elif not should_drop and self.pipeline and type(self).generate_delay is Channel.generate_delay:
+            self._enqueue(post_processed_message, out_port, self.delay)
         elif not should_drop:
-            post_processed_message.meta["port_noneshouldusethiskey"] = out_port
-            self.schedule_message(post_processed_message, delay=self.generate_delay(message, port_name))
+            delay = self.generate_delay(message, port_name)
+            if delay is None or delay <= 0:
+                self.send(post_processed_message, out_port)
+            else:
+                self.ports[out_port].tx_output(post_processed_message, delay)
+
+    def _enqueue(self, message, out_port, delay):
+        # schedule the message directly if nothing is in flight towards the port, otherwise queue it behind the
+        # messages in flight, and wake up when the previous one arrives
+        now = self.sim_context.time()
+        queue = self._pipelines[out_port]
+        if not queue and self._released_until[out_port] <= now:
+            self._released_until[out_port] = now + delay
+            self.ports[out_port].tx_output(message, delay)
+            return
+        if not queue:
+            self.schedule_message(out_port, at=self._released_until[out_port])
+        queue.append((now + delay, message))
+
+    def _release(self, out_port):
+        # schedule the head of the pipeline, and wake up again when it arrives if other messages are waiting
+        queue = self._pipelines[out_port]
+        arrival, message = queue.popleft()
+        self._released_until[out_port] = arrival
+        self.ports[out_port].tx_output(message, arrival - self.sim_context.time())
+        if queue:
+            self.schedule_message(out_port, at=arrival)
+
+    def _handle_train(self, train, port_name):
+        # process, drop and delay the messages of the train one by one, and forward the survivors as a new train,
+        # that is received when its first message is
+        out_port = "B" if port_name == "A" else "A"
+        departures = []
+        for offset, message in train:
+            post_processed_message = self.process_message(message, port_name)
+            if self.apply_loss(message, port_name) or post_processed_message is None:
+                continue
+            delay = self.generate_delay(message, port_name) if self.delay is not None and self.delay > 0 else 0
+            departures.append((offset + (delay or 0), post_processed_message))
+        if not departures:
+            return
+
+        departures.sort(key=lambda departure: departure[0])
+        start = departures[0][0]
+        train = MessageTrain([message for _, message in departures],
+                             [departure - start for departure, _ in departures], **(train._meta or {}))
+        self.ports[out_port].tx_output(train, start)
 
     def process_message(self, message, port_name):
         r"""
@@ -27,6 +27,9 @@ class CompoundModule(SimulatedEntity):
         The identifier of the module. This identifier should be unique within the simulation.
     port_names : list of str
         The names of the ports of the module.
+    port_vectors : dict of int or None, optional
+        The sizes of the port vectors of the module, indexed by their names. Defaults to `None`.
+        See :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`.
     **kwargs
         Additional, arbitrary attributes of the module, passed as keyword arguments.
 
@@ -36,8 +39,8 @@ class CompoundModule(SimulatedEntity):
         The sub-entities of the module, indexed by their names.
     """
 
-    def __init__(self, name, identifier, port_names, **kwargs):
-        super().__init__(name, identifier, port_names)
+    def __init__(self, name, identifier, port_names, port_vectors=None, **kwargs):
+        super().__init__(name, identifier, port_names, port_vectors)
 
         # additional attributes based on kwargs
         for key, value in kwargs.items():
@@ -86,8 +89,8 @@ class CompoundModule(SimulatedEntity):
 
         Parameters
         ----------
-        port_container : str
-            The name of the port of this module that will forward the input.
+        port_container : str or tuple
+            The name of the port of this module that will forward the input, or ``(vector name, index)``.
         port_submodule : :class:`~omnetpypy:front_end.port.Port`
             The port of the submodule that will receive the input.
 
@@ -95,7 +98,7 @@ class CompoundModule(SimulatedEntity):
         --------
         :meth:`~omnetpypy.front_end.port.Port.forward_input`
         """
-        self.ports[port_container].forward_input(port_submodule)
+        self.get_port(port_container).forward_input(port_submodule)
 
     def forward_output(self, port_submodule, port_container):
         r"""
@@ -103,8 +106,8 @@ class CompoundModule(SimulatedEntity):
 
         Parameters
         ----------
-        port_submodule : str
-            The name of the port of the submodule that will forward the output.
+        port_submodule : str or tuple
+            The name of the port of the submodule that will forward the output, or ``(vector name, index)``.
         port_container : :class:`~omnetpypy:front_end.port.Port`
             The port of this module that will receive the output.
 
@@ -112,24 +115,26 @@ class CompoundModule(SimulatedEntity):
         --------
         :meth:`~omnetpypy.front_end.port.Port.forward_output`
         """
-        self.ports[port_submodule].forward_output(port_container)
+        self.get_port(port_submodule).forward_output(port_container)
 
-    def connect(self, local_port, remote_entity, remote_port, channel=None):
+    def connect(self, local_port, remote_entity, remote_port, channel=None, link=None):
         r"""
         Connect a port of this module to a port of another remote entity.
 
         Parameters
         ----------
-        local_port : str
-            The name of the local port to be connected.
+        local_port : str or tuple
+            The name of the local port to be connected, or ``(vector name, index)``.
         remote_entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
             The remote entity to which the port will be connected.
-        remote_port : str
-            The name of the remote port to be connected.
+        remote_port : str or tuple
+            The name of the remote port to be connected, or ``(vector name, index)``.
         channel : :class:`~omnetpypy.front_end.channel.Channel` or None, optional
             The channel through which the connection will be made, if any.
             If set, the local port is connected to the "A" port of the channel,
             and the "B" port of the channel is connected to the remote port.
+        link : :class:`~omnetpypy.front_end.port.Link` or None, optional
+            The delay and loss applied to the messages exchanged by the two ports, if any and if there is no channel.
 
         See Also
         --------
@@ -137,10 +142,10 @@ class CompoundModule(SimulatedEntity):
         """
 
         if channel is not None:
-            self.ports[local_port].connect(channel.ports["A"])
-            channel.ports["B"].connect(remote_entity.ports[remote_port])
+            self.get_port(local_port).connect(channel.ports["A"])
+            channel.ports["B"].connect(remote_entity.get_port(remote_port))
         else:
-            self.ports[local_port].connect(remote_entity.ports[remote_port])
+            self.get_port(local_port).connect(remote_entity.get_port(remote_port), link=link)
 
     def schedule_message(self, message, at=None, delay=None):
         raise Exception("CompoundModule does not support scheduling messages")
@@ -1,19 +1,41 @@
 """
 This module implements the :class:`~omnetpypy.front_end.message.Message` class,
-representing a message in the simulation.
+representing a message in the simulation, the :class:`~omnetpypy.front_end.message.MessageTrain` class,
+a burst of messages that travels as a single message, the :class:`~omnetpypy.front_end.message.MessageView` class,
+a copy-on-write view of a message delivered to several receivers,
+and the :class:`~omnetpypy.front_end.message.MessagePool` class, a free list to recycle messages.
 """
+from collections.abc import MutableMapping, MutableSequence
+import copy
 
-__all__ = ['Message']
+__all__ = ['Message', 'MessageTrain', 'MessageView', 'MessagePool']
 
 
 class Message:
     r"""
     This class is a wrapper for messages exchanged between entities in a simulation.
 
+    The class uses ``__slots__``, so that a message carries no attribute dictionary, and the ``meta`` dictionary is
+    only allocated if some metadata is actually stored. Subclasses can declare a schema for their fields with the
+    ``field_names`` class attribute: each field can then be read and written by name, and the fields can be passed
+    as keyword arguments. For example:
+
+    .. code-block:: python
+
+        class Packet(Message):
+            __slots__ = ()
+            field_names = ("source", "destination", "size")
+
+        packet = Packet(source="A", destination="B", size=1500, header="DATA")
+        packet.size  # 1500, the same as packet.fields[2]
+
+    Subclasses should declare ``__slots__`` (possibly empty) to keep the memory footprint of the base class.
+
     Parameters
     ----------
-    fields : list
-        The fields of the message.
+    fields : list, optional
+        The fields of the message. If the class declares ``field_names`` and ``fields`` is `None`, the fields are
+        taken from the keyword arguments with the same names (missing ones are set to `None`).
     meta : dict, optional
         Additional metadata to be stored with the message. A typical use case is to store a "header".
 
@@ -23,20 +45,408 @@ class Message:
         The fields of the message.
     meta : dict
         Additional, editable metadata stored with the message.
+    field_names : tuple of str or None
+        Class attribute. The names of the fields, or `None` if the class declares no schema.
+
+    Raises
+    ------
+    ValueError
+        If the class declares ``field_names`` and the number of fields does not match.
     """
 
-    def __init__(self, fields, **meta):
+    __slots__ = ("fields", "_meta")
+
+    field_names = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # named accessors for the fields declared in the schema of the subclass
+        if "field_names" in cls.__dict__ and cls.field_names is not None:
+            cls.field_names = tuple(cls.field_names)
+            for index, name in enumerate(cls.field_names):
+                setattr(cls, name, _FieldAccessor(index))
+
+    def __init__(self, fields=None, **meta):
+        if self.field_names is not None:
+            if fields is None:
+                fields = [meta.pop(name, None) for name in self.field_names]
+            elif len(fields) != len(self.field_names):
+                raise ValueError(f"{type(self).__name__} has fields {self.field_names}, got {len(fields)} values")
         self.fields = fields
-        self.meta = meta
-        if meta is None:
-            self.meta = {}
+        # the metadata dictionary is allocated lazily, see the meta property
+        self._meta = meta if meta else None
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = {}
+        return self._meta
+
+    @meta.setter
+    def meta(self, value):
+        self._meta = value
 
     def __str__(self):
-        return f"Message(fields={self.fields}, meta={self.meta})"
+        return f"Message(fields={self.fields}, meta={self._meta or {}})"
 
     def __copy__(self):
         """
         Return a shallow copy of the message.
         """
-        new_meta = self.meta.copy()
-        return Message(fields=self.fields[:], **new_meta)
+        new = self.__class__.__new__(self.__class__)
+        new.fields = None if self.fields is None else self.fields[:]
+        new._meta = self._meta.copy() if self._meta else None
+        if hasattr(self, "__dict__"):
+            new.__dict__.update(self.__dict__)
+        return new
+
+    def __getstate__(self):
+        # the values of all the slots, and of the attribute dictionary of subclasses without __slots__
+        state = dict(getattr(self, "__dict__", {}))
+        for name in _slot_names(type(self)):
+            if hasattr(self, name):
+                state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        # restore the message to the given state, also removing the attributes set afterwards
+        if hasattr(self, "__dict__"):
+            self.__dict__.clear()
+        for name in _slot_names(type(self)):
+            if name not in state and hasattr(self, name):
+                object.__delattr__(self, name)
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+class MessageTrain(Message):
+    r"""
+    A burst of messages sent together on the same port, that travels through ports and channels as a single
+    message, until it reaches its receivers. See :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.send_many`.
+
+    The ``i``-th message of the train is meant to be received ``offsets[i]`` time units after the train.
+    Entities that set :attr:`~omnetpypy.front_end.sim_entity.SimulatedEntity.accepts_trains` receive the whole
+    train in one call to ``handle_message``. For the others, the train is split on arrival, and each message is
+    received on its own at its offset.
+
+    Parameters
+    ----------
+    messages : list of :class:`~omnetpypy.front_end.message.Message`
+        The messages of the train. They are stored as the ``fields`` of the train.
+    offsets : list of int or float
+        The offsets of the messages, non-negative and non-decreasing.
+    meta : dict, optional
+        Additional metadata of the train itself.
+
+    Attributes
+    ----------
+    messages : list of :class:`~omnetpypy.front_end.message.Message`
+        The messages of the train.
+    offsets : list of int or float
+        The offsets of the messages.
+
+    Raises
+    ------
+    ValueError
+        If the number of offsets does not match the number of messages, or the offsets are not non-negative and
+        non-decreasing.
+    """
+
+    __slots__ = ("offsets",)
+
+    def __init__(self, messages, offsets, **meta):
+        messages = list(messages)
+        offsets = list(offsets)
+        if len(messages) != len(offsets):
+            raise ValueError(f"A train of {len(messages)} messages needs as many offsets, got {len(offsets)}")
+        if offsets and (offsets[0] < 0 or any(a > b for a, b in zip(offsets, offsets[1:]))):
+            raise ValueError("The offsets of a train must be non-negative and non-decreasing")
+        super().__init__(messages, **meta)
+        self.offsets = offsets
+
+    @property
+    def messages(self):
+        return self.fields
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __iter__(self):
+        r"""
+        Iterate over the ``(offset, message)`` pairs of the train.
+        """
+        return zip(self.offsets, self.fields)
+
+    def __str__(self):
+        return f"MessageTrain(messages={[str(message) for message in self.fields]}, offsets={self.offsets})"
+
+    def __copy__(self):
+        """
+        Return a copy of the train, with a shallow copy of each of its messages.
+        """
+        new = super().__copy__()
+        new.fields = [copy.copy(message) for message in self.fields]
+        new.offsets = self.offsets[:]
+        return new
+
+
+class MessageView:
+    r"""
+    A copy-on-write view of a message, delivered by the ports that fan out their output with ``fanout="cow"``
+    (see :meth:`~omnetpypy.front_end.port.Port.subscribe_to`).
+
+    All the views of a broadcast message share it. Reading the view (its ``fields``, its ``meta``, the named fields
+    of a schema, ...) reads the shared message, while the first mutation (assigning an attribute, or changing
+    ``fields`` or ``meta`` in place) makes a private copy of the message for this view, so that the other receivers
+    are not affected. Hence, only the receivers that actually modify the message pay for a copy.
+
+    Parameters
+    ----------
+    message : :class:`~omnetpypy.front_end.message.Message`
+        The shared message. It must not be modified after it has been sent.
+
+    Attributes
+    ----------
+    fields : list-like
+        The fields of the message.
+    meta : dict-like
+        The metadata of the message.
+    """
+
+    __slots__ = ("_message", "_private")
+
+    def __init__(self, message):
+        object.__setattr__(self, "_message", message)
+        object.__setattr__(self, "_private", None)
+
+    @property
+    def is_materialized(self):
+        r"""
+        bool : Whether this view has made a private copy of the message.
+        """
+        return self._private is not None
+
+    def materialize(self):
+        r"""
+        Return the private copy of the message for this view, making it if needed.
+
+        Returns
+        -------
+        :class:`~omnetpypy.front_end.message.Message`
+            A message owned by this view, that can be modified freely.
+        """
+        if self._private is None:
+            object.__setattr__(self, "_private", copy.copy(self._message))
+        return self._private
+
+    def _current(self):
+        return self._message if self._private is None else self._private
+
+    @property
+    def fields(self):
+        if self._private is not None:
+            return self._private.fields
+        return _CopyOnWriteFields(self)
+
+    @property
+    def meta(self):
+        if self._private is not None:
+            return self._private.meta
+        return _CopyOnWriteMeta(self)
+
+    def __getattr__(self, name):
+        # the named fields of schemas and the attributes of Message subclasses are read from the current message
+        if name.startswith("__") or name in MessageView.__slots__:
+            raise AttributeError(name)
+        return getattr(self._current(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.materialize(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self.materialize(), name)
+
+    def __str__(self):
+        return str(self._current())
+
+    def __copy__(self):
+        return copy.copy(self._current())
+
+    def __getstate__(self):
+        return {"_message": self._message, "_private": self._private}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+class _CopyOnWriteFields(MutableSequence):
+    # the fields of a view that has not made its private copy yet: writes make the copy
+
+    __slots__ = ("view",)
+
+    def __init__(self, view):
+        self.view = view
+
+    def __getitem__(self, index):
+        return self.view._current().fields[index]
+
+    def __len__(self):
+        return len(self.view._current().fields)
+
+    def __iter__(self):
+        return iter(self.view._current().fields)
+
+    def __setitem__(self, index, value):
+        self.view.materialize().fields[index] = value
+
+    def __delitem__(self, index):
+        del self.view.materialize().fields[index]
+
+    def insert(self, index, value):
+        self.view.materialize().fields.insert(index, value)
+
+    def __eq__(self, other):
+        return list(self) == list(other) if isinstance(other, (list, tuple, MutableSequence)) else NotImplemented
+
+    def __repr__(self):
+        return repr(self.view._current().fields)
+
+
+class _CopyOnWriteMeta(MutableMapping):
+    # the metadata of a view that has not made its private copy yet: writes make the copy
+
+    __slots__ = ("view",)
+
+    def __init__(self, view):
+        self.view = view
+
+    def _read(self):
+        # Message allocates its meta dictionary lazily, reading must not allocate it
+        message = self.view._current()
+        if isinstance(message, Message):
+            return message._meta or {}
+        return message.meta
+
+    def __getitem__(self, key):
+        return self._read()[key]
+
+    def __len__(self):
+        return len(self._read())
+
+    def __iter__(self):
+        return iter(self._read())
+
+    def __setitem__(self, key, value):
+        self.view.materialize().meta[key] = value
+
+    def __delitem__(self, key):
+        del self.view.materialize().meta[key]
+
+    def __eq__(self, other):
+        return dict(self) == dict(other) if isinstance(other, (dict, MutableMapping)) else NotImplemented
+
+    def __repr__(self):
+        return repr(self._read())
+
+
+class MessagePool:
+    r"""
+    A free list of messages of a given class, to recycle them instead of allocating new ones in the hot loop.
+
+    Pooling is opt-in: a module that receives a message and does not need it any more can release it to the pool,
+    and the next :meth:`acquire` reinitializes and returns it. A released message must not be used, nor kept
+    referenced, by anyone else. For this reason, pools must not be used with the "timewarp" engine, that may deliver
+    a message again after a rollback.
+
+    Parameters
+    ----------
+    message_class : type, optional
+        The class of the pooled messages, :class:`~omnetpypy.front_end.message.Message` or a subclass.
+        Defaults to :class:`~omnetpypy.front_end.message.Message`.
+    max_size : int, optional
+        The maximum number of free messages kept by the pool. Messages released to a full pool are left to the
+        garbage collector. Defaults to 1024.
+
+    Attributes
+    ----------
+    message_class : type
+        The class of the pooled messages.
+    max_size : int
+        The maximum number of free messages kept by the pool.
+    """
+
+    __slots__ = ("message_class", "max_size", "_free")
+
+    def __init__(self, message_class=Message, max_size=1024):
+        self.message_class = message_class
+        self.max_size = max_size
+        self._free = []
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self, fields=None, **meta):
+        r"""
+        Return a message, recycled from the free list if possible.
+
+        Parameters
+        ----------
+        fields : list, optional
+            The fields of the message, see :class:`~omnetpypy.front_end.message.Message`.
+        meta : dict, optional
+            The metadata of the message, see :class:`~omnetpypy.front_end.message.Message`.
+
+        Returns
+        -------
+        :class:`~omnetpypy.front_end.message.Message`
+            A message of class ``message_class``, initialized with the given fields and metadata.
+        """
+        if not self._free:
+            return self.message_class(fields, **meta)
+        message = self._free.pop()
+        if hasattr(message, "__dict__"):
+            message.__dict__.clear()
+        message.__init__(fields, **meta)
+        return message
+
+    def release(self, message):
+        r"""
+        Give a message back to the pool. The message must not be used after it has been released.
+
+        Parameters
+        ----------
+        message : :class:`~omnetpypy.front_end.message.Message`
+            The message to recycle. Messages of other classes are ignored.
+        """
+        if type(message) is self.message_class and len(self._free) < self.max_size:
+            message.fields = None
+            message._meta = None
+            self._free.append(message)
+
+
+class _FieldAccessor:
+    # descriptor that maps a named field of a message schema to its position in the fields list
+
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, message, owner=None):
+        if message is None:
+            return self
+        return message.fields[self.index]
+
+    def __set__(self, message, value):
+        message.fields[self.index] = value
+
+
+def _slot_names(cls):
+    # the names of the slots of a class and of its bases
+    names = []
+    for klass in cls.__mro__:
+        for name in klass.__dict__.get("__slots__", ()):
+            if name not in ("__dict__", "__weakref__") and name not in names:
+                names.append(name)
+    return names
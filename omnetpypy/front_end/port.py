@@ -5,6 +5,91 @@ Every port is an object that can receive and send messages. Ports are the interf
 Ports have the same semantic as in omnet++, except that
 every port is an object itself and does not have to be input or output only.
 """
+from omnetpypy.front_end.message import MessageTrain, MessageView
+
+# the ways a port can deliver its output to its subscribers, see Port.subscribe_to
+FANOUT_MODES = ("copy", "cow", "shared")
+
+
+class _RoutingTable:
+    # validity token shared by all the ports compiled together by compile_routes. Changing the topology of any of
+    # them invalidates the routes of all of them, that fall back to following the chains at send time
+
+    __slots__ = ("valid",)
+
+    def __init__(self, valid=True):
+        self.valid = valid
+
+
+# token of the ports whose routes have not been compiled
+_NOT_COMPILED = _RoutingTable(valid=False)
+
+
+class Link:
+    r"""
+    The attributes of a connection between two ports, that delays the messages and drops them with a given
+    probability, in both directions.
+
+    Links are the lightweight form of the default :class:`~omnetpypy.front_end.channel.Channel`, used by the parser
+    for the default channels that only apply a delay and a loss probability: they are not entities, so they need
+    no event to receive a message and no process of the simulation engine, and they are applied by the sending port
+    right before scheduling the reception. Links are shared by the two connected ports.
+
+    Parameters
+    ----------
+    delay : float or None, optional
+        The delay applied to the messages. If ``None`` or not positive, no delay is applied.
+    loss_prob : float or None, optional
+        The probability that a message is lost. If ``None``, no loss is applied.
+
+    Attributes
+    ----------
+    delay : float or None
+        The delay applied to the messages.
+    loss_prob : float or None
+        The probability that a message is lost.
+    """
+
+    __slots__ = ("delay", "loss_prob")
+
+    def __init__(self, delay=None, loss_prob=None):
+        self.delay = delay
+        self.loss_prob = loss_prob
+
+    def transmit(self, message, delay, rng):
+        r"""
+        Apply the loss probability and the delay of the link to a message.
+        The messages of a :class:`~omnetpypy.front_end.message.MessageTrain` are lost independently, and the
+        surviving ones keep their offsets.
+
+        Parameters
+        ----------
+        message : :class:`~omnetpypy.front_end.message.Message`
+            The message entering the link.
+        delay : int or float
+            The delay of the message before entering the link.
+        rng : :class:`~omnetpypy.utilities.MultiRandom`
+            The random number generators used to draw the losses.
+
+        Returns
+        -------
+        tuple
+            The message leaving the link, or ``None`` if it is lost, and its delay after the link.
+        """
+        if self.delay is not None and self.delay > 0:
+            delay += self.delay
+        if self.loss_prob is None:
+            return message, delay
+        if not isinstance(message, MessageTrain):
+            return (None if rng.random() < self.loss_prob else message), delay
+
+        survivors = [(offset, inner) for offset, inner in message if not rng.random() < self.loss_prob]
+        if not survivors:
+            return None, delay
+        start = survivors[0][0]
+        train = MessageTrain([inner for _, inner in survivors], [offset - start for offset, _ in survivors],
+                             **(message._meta or {}))
+        return train, delay + start
 
 
 class Port:
@@ -15,18 +100,21 @@ class Port:
 
     Parameters
     ----------
-    name : str
-        The name of the port. This name should be unique within the parent module.
+    name : str or tuple
+        The name of the port. This name should be unique within the parent module. The ports of a
+        :class:`~omnetpypy.front_end.port.PortVector` are named ``(vector name, index)``.
     parent : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
         The parent entity of the port, i.e., the entity to which the port belongs.
 
     Attributes
     ----------
-    name : str
+    name : str or tuple
         The name of the port.
     connected_port : :class:`~omnetpypy.front_end.port.Port` or None
         The remote port to which this port is connected. If ``None``, the port is not connected.
         See also :meth:`~omnetpypy.front_end.port.Port.connect`.
+    link : :class:`~omnetpypy.front_end.port.Link` or None
+        The delay and loss applied to the messages between this port and the connected port, if any.
     forwarded_input_port : :class:`~omnetpypy.front_end.port.Port` or None
         The remote port to which the input of this port is forwarded. If ``None``, the port does not forward input.
         See also :meth:`~omnetpypy.front_end.port.Port.forward_input`.
@@ -37,7 +125,10 @@ class Port:
         The parent entity of the port.
     subscribed_ports : list of :class:`~omnetpypy.front_end.port.Port`
         The list of ports that are subscribed to this port.
-        Every subscribed port receives a copy of each message sent to this port.
+        Every subscribed port receives each message sent to this port, as specified by ``fanout``.
+    fanout : str
+        How the output of this port is delivered to its subscribers: "copy" (the default), "cow" or "shared".
+        See :meth:`~omnetpypy.front_end.port.Port.subscribe_to`.
     is_subscribed : bool
         A flag indicating whether this port is subscribed to another port.
         See also :meth:`~omnetpypy.front_end.port.Port.subscribe_to`.
@@ -46,13 +137,22 @@ class Port:
     def __init__(self, name, parent):
         self.name = name
         self.connected_port = None
+        self.link = None
         self.forwarded_input_port = None
         self.forwarded_output_port = None
         self.parent = parent
         self.subscribed_ports = []
         self.is_subscribed = False
+        self.fanout = "copy"
+
+        # routes compiled by compile_routes, only used while the routing table is valid
+        self._routing = _NOT_COMPILED
+        self._output_routes = ()
+        self._output_link = None
+        self._fanout_port = None
+        self._input_route = None
 
-    def connect(self, port):
+    def connect(self, port, link=None):
         r"""
         Connect this port to another remote port.
         The output of this port will be fed as input to the other port, and vice versa.
@@ -61,6 +161,8 @@ class Port:
         ----------
         port : :class:`~omnetpypy.front_end.port.Port`
             The remote port to which this port will be connected.
+        link : :class:`~omnetpypy.front_end.port.Link` or None, optional
+            The delay and loss applied to the messages exchanged by the two ports, if any.
 
         Raises
         ------
@@ -79,27 +181,44 @@ class Port:
         if self.forwarded_output_port:
             raise ValueError("Cannot connect a port that is forwarding output")
 
+        self._invalidate_routes(port)
         self.connected_port = port
         port.connected_port = self
+        self.link = port.link = link
 
-    def subscribe_to(self, port):
+    def subscribe_to(self, port, fanout=None):
         r"""
         Subscribe this port to another remote port.
-        This port will receive a copy of each message sent to the remote port.
+        This port will receive each message sent to the remote port, as specified by the fan-out mode of the
+        remote port:
+
+        - "copy": every subscriber receives its own copy of the message, made when the message is sent.
+        - "cow": every subscriber receives a :class:`~omnetpypy.front_end.message.MessageView` of the same message,
+          that makes a private copy only if the subscriber modifies it. Broadcasts then cost one copy per writer,
+          instead of one per subscriber.
+        - "shared": every subscriber receives the same message object, that no one must modify.
+
+        With "cow" and "shared", the sender must not modify the message after sending it.
 
         Parameters
         ----------
         port : :class:`~omnetpypy.front_end.port.Port`
             The remote port to which this port will be subscribed.
+        fanout : str or None, optional
+            If not `None`, set the fan-out mode of the remote port, shared by all its subscribers.
+            Defaults to `None`, i.e. the mode is left unchanged ("copy" for a new port).
 
         Raises
         ------
         ValueError
             If this port is already connected to another port,
             if the remote port is already connected to another port,
-            or if the remote port is forwarding output
+            if the remote port is forwarding output,
+            or if ``fanout`` is not a valid fan-out mode.
         """
 
+        if fanout is not None and fanout not in FANOUT_MODES:
+            raise ValueError(f"Unknown fan-out mode {fanout}, expected one of {FANOUT_MODES}")
         if self.connected_port is not None:
             raise ValueError("Cannot subscribe a port that is already connected")
         if port.forwarded_output_port:
@@ -107,8 +226,11 @@ class Port:
         if port.connected_port is not None:
             raise ValueError("Cannot subscribe to a port that is already connected")
 
+        self._invalidate_routes(port)
         port.subscribed_ports.append(self)
         self.is_subscribed = True
+        if fanout is not None:
+            port.fanout = fanout
 
     def disconnect(self, port):
         r"""
@@ -130,8 +252,10 @@ class Port:
         if self.connected_port != port or port.connected_port != self:
             raise ValueError("The two ports are not connected")
 
+        self._invalidate_routes(port)
         self.connected_port = None
         port.connected_port = None
+        self.link = port.link = None
 
     def forward_input(self, port):
         r"""
@@ -155,6 +279,7 @@ class Port:
         if port.connected_port is not None:
             raise ValueError("Cannot forward input to a port that is already connected")
 
+        self._invalidate_routes(port)
         self.forwarded_input_port = port
 
     def forward_output(self, port):
@@ -179,31 +304,71 @@ class Port:
         if port.connected_port is not None:
             raise ValueError("Cannot forward input to a port that is already connected")
 
+        self._invalidate_routes(port)
         self.forwarded_output_port = port
 
-    def tx_output(self, message):
+    def tx_output(self, message, delay=0):
         r"""
         Send a message as output of this port.
 
+        If the routes of the port have been compiled by :func:`~omnetpypy.front_end.port.compile_routes`, the message
+        is delivered directly to the final destinations. Otherwise, the forwarding chains, connections and
+        subscriptions are followed.
+
         Parameters
         ----------
         message : :class:`~omnetpypy.front_end.message.Message`
             The message to be sent.
+        delay : int or float, optional
+            The time after which the message is received by the destinations, e.g. the delay of a channel.
+            Defaults to 0.
         """
 
-        if self.forwarded_output_port:
-            self.forwarded_output_port.tx_output(message)
+        if self._routing.valid:
+            link = self._output_link
+            if link is not None:
+                message, delay = link.transmit(message, delay, self.parent.sim_context.rng)
+                if message is None:
+                    return
+            if isinstance(message, MessageTrain):
+                self._tx_output_train(message, delay)
+                return
+            fanout_port = self._fanout_port
+            if fanout_port is None or fanout_port.fanout == "shared":
+                for port in self._output_routes:
+                    port.parent.sim_context.connector.schedule_port_input(port, message, delay)
+            elif fanout_port.fanout == "copy":
+                for port in self._output_routes:
+                    port.parent.sim_context.connector.schedule_port_input(port, message.__copy__(), delay)
+            else:
+                for port in self._output_routes:
+                    port.parent.sim_context.connector.schedule_port_input(port, MessageView(message), delay)
+
+        elif self.forwarded_output_port:
+            self.forwarded_output_port.tx_output(message, delay)
         elif self.connected_port:
-            self.connected_port.tx_input(message)
+            if self.link is not None:
+                message, delay = self.link.transmit(message, delay, self.parent.sim_context.rng)
+                if message is None:
+                    return
+            self.connected_port.tx_input(message, delay)
         elif len(self.subscribed_ports) > 0:
-            for port in self.subscribed_ports:
-                message_cpy = message.__copy__()
-                port.tx_input(message_cpy)
+            if self.fanout == "copy":
+                for port in self.subscribed_ports:
+                    message_cpy = message.__copy__()
+                    port.tx_input(message_cpy, delay)
+            elif self.fanout == "cow":
+                # the views share the message, a subscriber copies it only when it modifies it
+                for port in self.subscribed_ports:
+                    port.tx_input(_fan_out_message(message, "cow"), delay)
+            else:
+                for port in self.subscribed_ports:
+                    port.tx_input(message, delay)
         else:
             # do nothing, the mesaage is lost
             pass
 
-    def tx_input(self, message):
+    def tx_input(self, message, delay=0):
         r"""
         Receive a message as input of this port.
 
@@ -211,12 +376,183 @@ class Port:
         ----------
         message : :class:`~omnetpypy:front_end.message.Message`
             The message to be received.
+        delay : int or float, optional
+            The time after which the message is received. Defaults to 0.
         """
 
-        if self.forwarded_input_port:
-            self.forwarded_input_port.tx_input(message)
+        if self._routing.valid:
+            port = self._input_route
+            if port is None:
+                return
+            if isinstance(message, MessageTrain):
+                _deliver_train(port, message, delay)
+            else:
+                port.parent.sim_context.connector.schedule_port_input(port, message, delay)
+        elif self.forwarded_input_port:
+            self.forwarded_input_port.tx_input(message, delay)
         elif self.parent.is_listening:
-            self.parent.sim_context.connector.schedule_port_input(self, message)
+            if isinstance(message, MessageTrain):
+                _deliver_train(self, message, delay)
+            else:
+                self.parent.sim_context.connector.schedule_port_input(self, message, delay)
         else:
             # do nothing, the mesaage is lost
             pass
+
+    def _tx_output_train(self, train, delay):
+        # compiled routes of a train, that is split for the receivers that do not accept trains
+        fanout = "shared" if self._fanout_port is None else self._fanout_port.fanout
+        for port in self._output_routes:
+            _deliver_train(port, _fan_out_message(train, fanout), delay)
+
+    def destinations(self):
+        r"""
+        Resolve the destinations of the output of this port, following the forwarding chains, connections and
+        subscriptions in the same way as :meth:`~omnetpypy.front_end.port.Port.tx_output`.
+
+        Returns
+        -------
+        list of :class:`~omnetpypy.front_end.port.Port`
+            The ports of the listening entities that receive the messages sent out of this port.
+        """
+        return self._resolve_output()[1]
+
+    def _resolve_output(self):
+        # the port whose subscribers receive the output (None if the output goes to a connected port),
+        # the final destinations of the output, and the link they are reached through, if any
+        port = self
+        while port.forwarded_output_port is not None:
+            port = port.forwarded_output_port
+        if port.connected_port is not None:
+            destination = port.connected_port._resolve_input()
+            return None, [] if destination is None else [destination], port.link
+        destinations = [subscriber._resolve_input() for subscriber in port.subscribed_ports]
+        return port, [destination for destination in destinations if destination is not None], None
+
+    def _resolve_input(self):
+        # the final destination of the input of this port, None if the input is lost
+        port = self
+        while port.forwarded_input_port is not None:
+            port = port.forwarded_input_port
+        return port if port.parent.is_listening else None
+
+    def _invalidate_routes(self, port):
+        # a topology change between this port and another one invalidates the routes compiled for both
+        self._routing.valid = False
+        port._routing.valid = False
+
+
+def _fan_out_message(message, fanout):
+    # the message received by one subscriber with the given fan-out mode. The messages of a train are viewed one by
+    # one, so that the train can still be split
+    if fanout == "shared":
+        return message
+    if fanout == "copy":
+        return message.__copy__()
+    if isinstance(message, MessageTrain):
+        return MessageTrain([MessageView(inner) for inner in message.messages], message.offsets,
+                            **(message._meta or {}))
+    return MessageView(message)
+
+
+def _deliver_train(port, train, delay):
+    # schedule the reception of a train by a listening port after a delay, split into its messages if the entity
+    # does not accept trains
+    connector = port.parent.sim_context.connector
+    if port.parent.accepts_trains:
+        connector.schedule_port_input(port, train, delay)
+    else:
+        for offset, message in train:
+            connector.schedule_port_input(port, message, delay + offset)
+
+
+class PortVector:
+    r"""
+    A vector of ports with the same name, addressed by integer index, for entities with many interfaces
+    (e.g. the "eth" ports of a switch).
+
+    The ports are created lazily, the first time they are accessed (typically, when they are connected), so that the
+    unused interfaces of large vectors take no memory. Every created port is also registered in the ``ports``
+    dictionary of its parent, with the key ``(name, index)``, that is also the name of the port, and hence the
+    ``port_name`` received by :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.handle_message`.
+
+    Parameters
+    ----------
+    name : str
+        The name of the vector.
+    parent : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+        The entity to which the ports belong.
+    size : int
+        The number of ports in the vector.
+
+    Attributes
+    ----------
+    name : str
+        The name of the vector.
+    parent : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+        The entity to which the ports belong.
+    """
+
+    __slots__ = ("name", "parent", "_ports")
+
+    def __init__(self, name, parent, size):
+        self.name = name
+        self.parent = parent
+        self._ports = [None] * size
+
+    def __len__(self):
+        return len(self._ports)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self._ports))[index]]
+        port = self._ports[index]
+        if port is None:
+            index = range(len(self._ports))[index]
+            port = Port((self.name, index), parent=self.parent)
+            self._ports[index] = port
+            self.parent.ports[port.name] = port
+        return port
+
+    def __iter__(self):
+        for index in range(len(self._ports)):
+            yield self[index]
+
+    def created(self):
+        r"""
+        Return the ports of the vector created so far, without creating the others.
+
+        Returns
+        -------
+        list of :class:`~omnetpypy.front_end.port.Port`
+            The created ports, in index order.
+        """
+        return [port for port in self._ports if port is not None]
+
+
+def compile_routes(network):
+    r"""
+    Resolve, once, the final destinations of every port of a network, so that sending a message becomes a lookup
+    of the listening entities that receive it. Compound modules and forwarding chains disappear from the runtime
+    path.
+
+    The compiled routes stay valid until the topology of any of the ports changes (through
+    :meth:`~omnetpypy.front_end.port.Port.connect`, :meth:`~omnetpypy.front_end.port.Port.subscribe_to`, ...),
+    after which all the ports fall back to following the chains. The routes assume that the entities do not
+    change their ``is_listening`` flag after the compilation; the fan-out mode of the ports can be changed freely.
+
+    Parameters
+    ----------
+    network : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
+        The root entity of the network, usually the result of :func:`~omnetpypy.parser.parse_yaml_directory`.
+    """
+    routing = _RoutingTable()
+    entities = [network]
+    while entities:
+        entity = entities.pop()
+        entities.extend(getattr(entity, "sub_modules", {}).values())
+        for port in entity.ports.values():
+            port._fanout_port, port._output_routes, port._output_link = port._resolve_output()
+            port._output_routes = tuple(port._output_routes)
+            port._input_route = port._resolve_input()
+            port._routing = routing
@@ -1,4 +1,5 @@
-from omnetpypy.front_end.port import Port
+from omnetpypy.front_end.message import MessageTrain
+from omnetpypy.front_end.port import Port, PortVector
 
 
 class SimulatedEntity:
@@ -14,6 +15,9 @@ class SimulatedEntity:
         The unique identifier of the entity. Must be unique within the simulation.
     port_names : list of str
         The names of the ports of the entity.
+    port_vectors : dict of int or None, optional
+        The sizes of the port vectors of the entity, indexed by their names, e.g. ``{"eth": 1024}``.
+        See :class:`~omnetpypy.front_end.port.PortVector`. Defaults to `None`, i.e. no port vectors.
     
     Attributes
     ----------
@@ -29,10 +33,25 @@ class SimulatedEntity:
     is_listening : bool
         A flag indicating whether the entity is listening for incoming messages.
     ports : dict of :class:`~omnetpypy.front_end.port.Port`
-        The ports of the entity, indexed by their names.
+        The ports of the entity, indexed by their names. The ports of the vectors are indexed by
+        ``(vector name, index)``, and only appear here once they have been created.
+    port_vectors : dict of :class:`~omnetpypy.front_end.port.PortVector`
+        The port vectors of the entity, indexed by their names.
+    init_stages : iterable of int or None
+        Class attribute. The initialization stages at which :meth:`initialize` is called, e.g. ``(0, 2)``.
+        If ``None`` (the default), it is called at every stage. Entities that do not override :meth:`initialize`
+        are never called.
+    accepts_trains : bool
+        Class attribute. If ``True``, the :class:`~omnetpypy.front_end.message.MessageTrain` objects sent with
+        :meth:`send_many` are received whole, in one call to :meth:`handle_message`. Otherwise (the default), they
+        are split, and their messages are received one by one at their offsets.
     """
 
-    def __init__(self, name, identifier, port_names):
+    init_stages = None
+
+    accepts_trains = False
+
+    def __init__(self, name, identifier, port_names, port_vectors=None):
         self.name = name
         self.identifier = identifier
         self.sim_context = None
@@ -42,6 +61,37 @@ class SimulatedEntity:
         # if the entity is listening, the connector will call the handle_message method when a message is received
 
         self.ports = {port_name: Port(port_name, parent=self) for port_name in port_names}
+        self.port_vectors = {vector_name: PortVector(vector_name, self, size)
+                             for vector_name, size in (port_vectors or {}).items()}
+
+    def get_port(self, port_name):
+        r"""
+        Get a port of the entity, creating it if it belongs to a port vector and has not been created yet.
+
+        Parameters
+        ----------
+        port_name : str or tuple
+            The name of the port, or ``(vector name, index)`` for a port of a vector.
+
+        Returns
+        -------
+        :class:`~omnetpypy.front_end.port.Port`
+            The port.
+
+        Raises
+        ------
+        KeyError
+            If the entity has no such port or port vector.
+        IndexError
+            If the index is out of the range of the port vector.
+        """
+        port = self.ports.get(port_name)
+        if port is None:
+            if not isinstance(port_name, tuple):
+                raise KeyError(port_name)
+            vector_name, index = port_name
+            port = self.port_vectors[vector_name][index]
+        return port
 
     def set_sim_context(self, sim_context):
         r"""
@@ -62,8 +112,9 @@ class SimulatedEntity:
         ----------
         message : :class:`~omnetpypy.front_end.message.Message`
             The message to be processed.
-        port_name : str or None
-            The name of the port on which the message was received.
+        port_name : str or tuple or None
+            The name of the port on which the message was received, ``(vector name, index)`` for the ports of a
+            vector.
             If ``None``, the message was sent by the entity itself (self message).
         """
         pass
@@ -83,19 +134,33 @@ class SimulatedEntity:
         delay : float or None, optional
             The time delay from the current simulation time at which the message should be processed.
             If ``None``, the ``at`` parameter will be used.
+
+        Returns
+        -------
+        :class:`~omnetpypy.backends.connector.Timer`
+            A handle to the scheduled message, that can be passed to
+            :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.is_scheduled` and
+            :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.cancel_scheduled`, or cancelled directly with
+            :meth:`~omnetpypy.backends.connector.Timer.cancel`.
         """
         # this sends a self message to the module at the specified time
-        self.sim_context.connector.schedule_self_message(entity=self, message=message, at=at, delay=delay)
+        return self.sim_context.connector.schedule_self_message(entity=self, message=message, at=at, delay=delay)
 
     def is_scheduled(self, message):
         r"""
         Check if a message is scheduled as a self message for this entity.
-        Calls internally the method :meth:`~omnetpypy.front_end.simulation.Simulation.is_scheduled`.
+        Calls internally the method :meth:`~omnetpypy.backends.connector.Connector.is_scheduled`.
         
         Parameters
         ----------
-        message : :class:`~omnetpypy.front_end.message.Message`
-            The message to be checked.
+        message : :class:`~omnetpypy.front_end.message.Message` or :class:`~omnetpypy.backends.connector.Timer`
+            The message to be checked, or the timer returned by
+            :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.schedule_message`.
+
+        Returns
+        -------
+        bool
+            True if the message is scheduled, False otherwise.
         """
         return self.sim_context.connector.is_scheduled(message, self)
 
@@ -108,20 +173,50 @@ class SimulatedEntity:
         ----------
         message : :class:`~omnetpypy.front_end.message.Message`
             The message to be sent.
-        port_name : str
-            The name of the port on which the message should be sent.
+        port_name : str or tuple
+            The name of the port on which the message should be sent, or ``(vector name, index)`` for a port of a
+            vector, e.g. ``("eth", 17)``.
+        """
+        try:
+            port = self.ports[port_name]
+        except KeyError:
+            port = self.get_port(port_name)
+        port.tx_output(message)
+
+    def send_many(self, messages, port_name, spacing=0):
+        r"""
+        Send a burst of messages on a port, as a single :class:`~omnetpypy.front_end.message.MessageTrain`.
+        The train follows the ports and the channels as one message, and it is split only when it reaches an
+        entity that does not accept trains (see :attr:`accepts_trains`).
+
+        Parameters
+        ----------
+        messages : list of :class:`~omnetpypy.front_end.message.Message`
+            The messages to be sent.
+        port_name : str or tuple
+            The name of the port on which the messages should be sent, see :meth:`send`.
+        spacing : int or float or list, optional
+            The time between two consecutive messages of the burst, or the list of the offsets of the messages from
+            the current time. Defaults to 0, i.e. all the messages are sent now.
         """
-        self.ports[port_name].tx_output(message)
+        if not messages:
+            return
+        if isinstance(spacing, (int, float)):
+            offsets = [i * spacing for i in range(len(messages))]
+        else:
+            offsets = spacing
+        self.send(MessageTrain(messages, offsets), port_name)
 
     def cancel_scheduled(self, message):
         r"""
         Cancel a scheduled self message for this entity.
-        Calls internally the method :meth:`~omnetpypy.front_end.simulation.Simulation.cancel_scheduled`.
+        Calls internally the method :meth:`~omnetpypy.backends.connector.Connector.cancel_scheduled`.
         
         Parameters
         ----------
-        message : :class:`~omnetpypy.front_end.message.Message`
-            The message to be cancelled.
+        message : :class:`~omnetpypy.front_end.message.Message` or :class:`~omnetpypy.backends.connector.Timer`
+            The message to be cancelled, or the timer returned by
+            :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.schedule_message`.
         """
         self.sim_context.connector.cancel_scheduled(message, self)
 
@@ -130,14 +225,16 @@ class SimulatedEntity:
         Initialize the entity right before the beginning of the simulation.
         This method is automatically called by the simulation context.
 
-        The method is called 5 times, once for each step from 0 to 4. The step number is passed as a parameter.
+        The method is called once for each step listed in :attr:`init_stages` (by default, every step from 0 to 5;
+        the number of steps is set by the ``num_init_stages`` engine parameter). The step number is passed as a
+        parameter. Entities that do not override this method are skipped.
 
         Parameters
         ----------
         step : int, optional
             The initialization step number. Default is 0. This parameter is used to allow entities to perform
             different initialization actions at different steps, and synchronize with other entities.
-            The steps are numbered from 0 to 4, and the entity has the guarantee that the previous steps have
-            already been executed on all entities of the simulation.
+            The entity has the guarantee that the previous steps have already been executed on all entities of the
+            simulation.
         """
         pass
\ No newline at end of file
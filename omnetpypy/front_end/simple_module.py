@@ -18,7 +18,8 @@ class SimpleModule(SimulatedEntity):
     to define custom simulation modules.
 
     Simple modules are also in charge of recording metrics samples. The user can call the method
-    :meth:`~omnetpypy.front_ent.simple_module.SimpleModule.emit_metric` at any time to record a metric sample.
+    :meth:`~omnetpypy.front_ent.simple_module.SimpleModule.emit_metric` at any time to record a metric sample, or
+    obtain a handle to the metric once with :meth:`~omnetpypy.front_end.simple_module.SimpleModule.metric`.
 
     See :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity` for inherited attributes.
 
@@ -30,10 +31,13 @@ class SimpleModule(SimulatedEntity):
         The identifier of the module. This identifier should be unique within the simulation.
     port_names : list of str
         The names of the ports of the module.
+    port_vectors : dict of int or None, optional
+        The sizes of the port vectors of the module, indexed by their names. Defaults to `None`.
+        See :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`.
     """
 
-    def __init__(self, name, identifier, port_names):
-        super().__init__(name, identifier, port_names)
+    def __init__(self, name, identifier, port_names, port_vectors=None):
+        super().__init__(name, identifier, port_names, port_vectors)
         self.is_listening = True
 
     @abstractmethod
@@ -46,13 +50,14 @@ class SimpleModule(SimulatedEntity):
         ----------
         message : :class:`~omnetpypy:front_end.message.Message`
             The message to be processed.
-        port_name : str or None
-            The name of the port on which the message was received.
+        port_name : str or tuple or None
+            The name of the port on which the message was received, ``(vector name, index)`` for the ports of a
+            vector.
             If ``None``, the message is a self message scheduled by this module.
         """
         pass
 
-    def connect(self, local_port, remote_entity, remote_port, channel=None):
+    def connect(self, local_port, remote_entity, remote_port, channel=None, link=None):
         r"""
         Connect a port of this module to a port of another remote entity.
         The output of a port will be fed as input to the other port
@@ -60,23 +65,25 @@ class SimpleModule(SimulatedEntity):
 
         Parameters
         ----------
-        local_port : str
-            The name of the local port to be connected.
+        local_port : str or tuple
+            The name of the local port to be connected, or ``(vector name, index)``.
         remote_entity : :class:`~omnetpypy.front_end.sim_entity.SimulatedEntity`
             The remote entity to which the port will be connected.
-        remote_port : str
-            The name of the remote port to be connected.
+        remote_port : str or tuple
+            The name of the remote port to be connected, or ``(vector name, index)``.
         channel : :class:`~omnetpypy.front_end.channel.Channel` or None, optional
             The channel through which the connection will be made, if any.
             If set, the local port is connected to the "A" port of the channel,
             and the "B" port of the channel is connected to the remote port.
+        link : :class:`~omnetpypy.front_end.port.Link` or None, optional
+            The delay and loss applied to the messages exchanged by the two ports, if any and if there is no channel.
         """
 
         if channel is not None:
-            self.ports[local_port].connect(channel.ports["A"])
-            channel.ports["B"].connect(remote_entity.ports[remote_port])
+            self.get_port(local_port).connect(channel.ports["A"])
+            channel.ports["B"].connect(remote_entity.get_port(remote_port))
         else:
-            self.ports[local_port].connect(remote_entity.ports[remote_port])
+            self.get_port(local_port).connect(remote_entity.get_port(remote_port), link=link)
 
     def emit_metric(self, name, value):
         r"""
@@ -92,3 +99,26 @@ class SimpleModule(SimulatedEntity):
             The value of the metric sample
         """
         self.sim_context.connector.record_metric(name, value)
+
+    def metric(self, name, validate=False):
+        r"""
+        Return a handle to record the samples of a metric, e.g. ``self.throughput = self.metric("Throughput")`` in
+        :meth:`~omnetpypy.front_end.sim_entity.SimulatedEntity.initialize`, then
+        ``self.throughput.record(value)``. The handle is bound once to the buffer of the metric, so recording a
+        sample is faster than with :meth:`~omnetpypy.front_end.simple_module.SimpleModule.emit_metric`.
+
+        Parameters
+        ----------
+        name : str
+            The name of the metric.
+            The metric name must be defined in the simulation configuration.
+        validate : bool, optional
+            Whether every sample is checked against the schema of the metric, e.g. while debugging a module that
+            records a "dict" metric. Defaults to ``False``.
+
+        Returns
+        -------
+        :class:`~omnetpypy.backends.metric_buffers.MetricHandle`
+            The handle of the metric.
+        """
+        return self.sim_context.connector.metric_handle(name, validate)
@@ -1,10 +1,15 @@
 r"""This module provides the tools to parse the YAML configuration and topology files"""
 import importlib
+import re
 
 import yaml
 
 from omnetpypy.front_end import CompoundModule
 from omnetpypy.front_end.channel import Channel
+from omnetpypy.front_end.port import Link
+
+# parameters of the default channels that can be compiled into a link, see parse_connection
+_LINK_PARAMETERS = {"delay", "loss_prob", "pipeline"}
 
 
 def parse_simple_modules(simple_descriptors):
@@ -102,8 +107,26 @@ def parse_connection(connection_data, compound_module, channel_classes, next_cha
     """
     source = connection_data['source']
     target = connection_data['target']
+
+    # port vector ranges, e.g. "switch.eth[0:8]", are expanded into one connection per port
+    sources = _expand_port_range(source)
+    targets = _expand_port_range(target)
+    if len(sources) > 1 or len(targets) > 1:
+        if len(sources) == 1:
+            sources = sources * len(targets)
+        if len(targets) == 1:
+            targets = targets * len(sources)
+        if len(sources) != len(targets):
+            raise ValueError(f"Invalid connection: {source} and {target} have different numbers of ports")
+        for source, target in zip(sources, targets):
+            single_connection = dict(connection_data, source=source, target=target)
+            next_channel_id = parse_connection(single_connection, compound_module, channel_classes, next_channel_id)
+        return next_channel_id
+
     source_module, source_port = source.split('.')
     target_module, target_port = target.split('.')
+    source_port = _port_key(source_port)
+    target_port = _port_key(target_port)
     if source_module == "self":
         source_module = compound_module
     else:
@@ -116,19 +139,29 @@ def parse_connection(connection_data, compound_module, channel_classes, next_cha
     # check if the "type" field is present
 
     if "type" in connection_data and connection_data["type"] == "forward input":
-        source_module.ports[source_port].forward_input(target_module.ports[target_port])
+        source_module.get_port(source_port).forward_input(target_module.get_port(target_port))
 
     elif "type" in connection_data and connection_data["type"] == "forward output":
-        source_module.ports[source_port].forward_output(target_module.ports[target_port])
+        source_module.get_port(source_port).forward_output(target_module.get_port(target_port))
 
     elif "type" in connection_data and connection_data["type"] == "subscribed":
-        target_module.ports[target_port].subscribe_to(source_module.ports[source_port])
+        target_module.get_port(target_port).subscribe_to(source_module.get_port(source_port),
+                                                         fanout=connection_data.get("fanout", None))
 
     elif "type" not in connection_data and "channel" not in connection_data:
         channel = None
         source_module.connect(local_port=source_port, remote_entity=target_module, remote_port=target_port,
                               channel=channel)
 
+    elif ("type" not in connection_data and connection_data["channel"] == "default"
+          and _LINK_PARAMETERS.issuperset(connection_data.get("parameters", {}))
+          and not connection_data.get("parameters", {}).get("pipeline", False)):
+        # a default channel that only applies a delay and a loss probability needs no entity: it is compiled into
+        # a link between the two ports
+        parameters = connection_data.get("parameters", {})
+        source_module.connect(local_port=source_port, remote_entity=target_module, remote_port=target_port,
+                              link=Link(delay=parameters.get("delay"), loss_prob=parameters.get("loss_prob")))
+
     elif "type" not in connection_data and "channel" in connection_data:
         if connection_data["channel"] == "default":
             # in this case we gather the parameters and instantiate a default channel
@@ -163,6 +196,23 @@ def parse_connection(connection_data, compound_module, channel_classes, next_cha
     return next_channel_id
 
 
+def _expand_port_range(endpoint):
+    # "module.port[a:b]" -> ["module.port[a]", ..., "module.port[b-1]"], other endpoints are left as they are
+    match = re.fullmatch(r"(.+)\[(\d+):(\d+)\]", endpoint)
+    if match is None:
+        return [endpoint]
+    prefix, bottom, top = match.group(1), int(match.group(2)), int(match.group(3))
+    return [f"{prefix}[{i}]" for i in range(bottom, top)]
+
+
+def _port_key(port):
+    # "eth[3]" -> ("eth", 3), the key of a port of a vector, other port names are left as they are
+    match = re.fullmatch(r"(.+)\[(\d+)\]", port)
+    if match is None:
+        return port
+    return match.group(1), int(match.group(2))
+
+
 def sanitize_compound_descriptors(compound_descriptors):
     r"""
     Sanitize the compound descriptors to ensure there is no submodule dependency loop that would cause endless
@@ -238,8 +288,10 @@ def instantiate_compound_module(name, module_classes, channel_classes, compound_
     if descriptor is None:
         raise ValueError(f"Compound module {name} not found in the descriptors")
 
-    ports = [port['name'] for port in descriptor.get('ports', [])]
-    parameters = {'name': name, 'identifier': next_module_id, 'port_names': ports, 'parent': None}
+    ports = [port['name'] for port in descriptor.get('ports', []) if 'size' not in port]
+    port_vectors = {port['name']: port['size'] for port in descriptor.get('ports', []) if 'size' in port}
+    parameters = {'name': name, 'identifier': next_module_id, 'port_names': ports, 'port_vectors': port_vectors,
+                  'parent': None}
     kwargs = descriptor.get('parameters', {})
     parameters.update(kwargs)
     next_module_id += 1
@@ -4,12 +4,24 @@ such as the engine to use, and a set of functions to make the configuration more
 """
 
 import csv
+import multiprocessing
+import os
+import pickle
+import traceback
 
+import numpy as np
 import pandas as pd
 import pkg_resources
 
 from omnetpypy import utilities, sim_log, parser
+from omnetpypy.front_end.port import compile_routes
+from omnetpypy.backends.metric_buffers import read_vector, NUMERIC_TYPES, OUTPUT_FORMATS, VECTOR_DTYPE
 from omnetpypy.backends.simpy_connector import SimPyConnector
+from omnetpypy.backends.native_connector import NativeConnector
+from omnetpypy.backends.parallel_connector import ConservativeConnector, TimeWarpConnector
+
+# engines that simulate each repetition with several processes
+PARALLEL_ENGINES = {"conservative", "timewarp"}
 
 
 class Simulation:
@@ -23,7 +35,7 @@ class Simulation:
     Parameters
     ----------
     engine : str
-        The simulation engine to use. Only "simpy" is implemented at the moment.
+        The simulation engine to use. Either "simpy", "native", "conservative" or "timewarp".
     seed_set : list of int
         The seed set for the repetition.
     repetition : int
@@ -42,7 +54,15 @@ class Simulation:
         The output directory for the simulation.
     global_params : dict
         A dictionary of global parameters. These parameters are available to all the entities in the simulation.
-
+    engine_params : dict or None, optional
+        Additional keyword arguments for the connector of the chosen engine, e.g. ``{"event_set": "calendar"}``
+        for the "native" engine. Defaults to ``None``, i.e. no additional arguments.
+    rng_block_size : int or None, optional
+        If not ``None``, the random number generators are buffered, and pre-draw blocks of this many values (see
+        :class:`~omnetpypy.utilities.MultiRandom`). Defaults to ``None``.
+    output_format : str, optional
+        The format of the temporary output files of the vectors, either "csv" or "npy". Defaults to "csv".
+        See :class:`~omnetpypy.backends.connector.Connector`.
 
     Attributes
     ----------
@@ -53,6 +73,8 @@ class Simulation:
         The connector to the simulation engine. Its subclass depends on the chosen engine.
     network : :class:`~omnetpypy.front_end.compound_module.CompoundModule`
         The network to simulate, parsed from the YAML file "network.yaml".
+    started : bool
+        Whether the simulation has been started (see :meth:`~omnetpypy.simulation.Simulation.run`).
 
     Raises
     ------
@@ -61,7 +83,7 @@ class Simulation:
     """
 
     def __init__(self, engine, seed_set, repetition, metrics, yaml_directory, until, log_level, time_unit, output_dir,
-                 global_params):
+                 global_params, engine_params=None, rng_block_size=None, output_format="csv"):
         self.engine = engine
         self.seed_set = seed_set
         self.repetition_idx = repetition
@@ -69,12 +91,17 @@ class Simulation:
         self.log_level = log_level
         self.time_unit = time_unit
         self.output_dir = output_dir
+        self.output_format = output_format
 
         self.global_params = global_params.copy()
         # dictionary of global parameters
 
-        self.rng = utilities.MultiRandom(seeds=seed_set)
+        self.engine_params = {} if engine_params is None else engine_params.copy()
+        # keyword arguments for the connector
+
+        self.rng = utilities.MultiRandom(seeds=seed_set, block_size=rng_block_size)
         self.connector = None
+        self.started = False
 
         # set log level
         sim_log.log_to_console(level=self.log_level)
@@ -84,12 +111,27 @@ class Simulation:
 
         if engine == "simpy":
             self.connector = SimPyConnector(simulation=self, metrics=metrics, output_dir=output_dir,
-                                            repetition=repetition)
+                                            repetition=repetition, output_format=output_format,
+                                            **self.engine_params)
+        elif engine == "native":
+            self.connector = NativeConnector(simulation=self, metrics=metrics, output_dir=output_dir,
+                                             repetition=repetition, output_format=output_format,
+                                             **self.engine_params)
+        elif engine == "conservative":
+            self.connector = ConservativeConnector(simulation=self, metrics=metrics, output_dir=output_dir,
+                                                   repetition=repetition, output_format=output_format,
+                                                   **self.engine_params)
+        elif engine == "timewarp":
+            self.connector = TimeWarpConnector(simulation=self, metrics=metrics, output_dir=output_dir,
+                                               repetition=repetition, output_format=output_format,
+                                               **self.engine_params)
         else:
             raise NotImplementedError("Engine not implemented")
 
         # parse yaml files
         self.network = parser.parse_yaml_directory(yaml_directory, self)
+        # resolve the forwarding chains once, so that messages go straight to the listening entities
+        compile_routes(self.network)
 
     def start(self):
         r"""
@@ -100,25 +142,110 @@ class Simulation:
         dict
             A dictionary of dictionaries with the collected metrics.
         """
-        self.connector.start_simulation(until=self.until)
+        self.run(self.until)
         collected_data = {}
         # collect metrics
         for metric in self.metrics:
             if self.output_dir is not None:
-                # dump the remaining samples in memory to the temporary file
+                # dump the remaining samples in memory to the temporary file, and fold them into the statistics
                 self.connector.dump_metric(metric.name)
 
-                # compute the statistics we need
-                filename = f"{self.output_dir}/.{metric.name}_vector_rep{self.repetition_idx}.csv"
-
-                # check metric type
-                if metric.type == "number":
-                    collected_data[metric.name] = utilities.get_metrics_from_csv(metric, filename)
-                else:
-                    collected_data[metric.name] = {}
+                # the statistics are computed while the simulation runs, only for the numeric metrics
+                statistics = self.connector.metric_buffers[metric.name].statistics
+                if metric.type == "time_weighted":
+                    # the last value of the state holds until now
+                    statistics.advance(self.time())
+                collected_data[metric.name] = statistics.results() if statistics is not None else {}
 
         return collected_data
 
+    def run(self, until):
+        r"""
+        Advance the simulation up to a given time, without collecting the metrics. The first call initializes the
+        network, the following ones continue from the current time. This is useful to run a warm-up phase before
+        saving a snapshot with :meth:`~omnetpypy.simulation.Simulation.save_snapshot`.
+
+        Parameters
+        ----------
+        until : int or float or None
+            The simulation time at which the simulation should stop. If ``None``, the simulation runs until there
+            are no more events to process.
+        """
+        if self.started:
+            self.connector.resume_simulation(until=until)
+        else:
+            self.started = True
+            self.connector.start_simulation(until=until)
+
+    def save_snapshot(self, path):
+        r"""
+        Save the complete state of the simulation to a file: the network with its port wiring and the attributes of
+        all the modules, the pending events, the states of the random number generators and the recorded metric
+        samples, including those already dumped to the temporary output files.
+
+        The simulation can be restored with :meth:`~omnetpypy.simulation.Simulation.load_snapshot` and continued
+        with :meth:`~omnetpypy.simulation.Simulation.run` or :meth:`~omnetpypy.simulation.Simulation.start`.
+        Snapshots are supported by the "simpy" and "native" engines, and they are taken between two calls to
+        :meth:`~omnetpypy.simulation.Simulation.run`.
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file.
+
+        Notes
+        -----
+        Snapshots are pickle files, so the classes of the modules must be importable when the snapshot is loaded,
+        and snapshots should only be loaded from trusted sources.
+        """
+        metric_files = {}
+        if self.output_dir is not None:
+            for metric in self.metrics:
+                filename = self.connector.vector_file(metric.name)
+                if os.path.exists(filename):
+                    with open(filename, "rb") as f:
+                        metric_files[metric.name] = f.read()
+
+        with open(path, "wb") as f:
+            pickle.dump({"simulation": self, "metric_files": metric_files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load_snapshot(path, output_dir=None):
+        r"""
+        Restore a simulation from a file written by :meth:`~omnetpypy.simulation.Simulation.save_snapshot`.
+
+        The attributes of the restored simulation (e.g. ``until``) can be changed before continuing it, to run
+        several variants of the simulation from the same snapshot.
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file.
+        output_dir : str or None, optional
+            The output directory of the restored simulation. If ``None`` (default), the output directory of the
+            saved simulation is used. The temporary output files of the metrics are restored in this directory.
+
+        Returns
+        -------
+        :class:`~omnetpypy.simulation.Simulation`
+            The restored simulation.
+        """
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+        sim = snapshot["simulation"]
+
+        if output_dir is not None:
+            sim.output_dir = output_dir
+            sim.connector.output_dir = output_dir
+        if sim.output_dir is not None:
+            os.makedirs(sim.output_dir, exist_ok=True)
+            for metric, content in snapshot["metric_files"].items():
+                with open(sim.connector.vector_file(metric), "wb") as f:
+                    f.write(content)
+
+        sim_log.log_to_console(level=sim.log_level)
+        return sim
+
     def time(self):
         """
         Return the current simulation time.
@@ -171,8 +298,15 @@ class Experiment:
         The dictionary has the following keys:
 
             - engine (``str``), optional:
-                The simulation engine to use. Only "simpy" is supported at the moment.
-                Defaults to "simpy".
+                The simulation engine to use. Either "simpy", "native" (see
+                :class:`~omnetpypy.backends.native_connector.NativeConnector`), "conservative" (see
+                :class:`~omnetpypy.backends.parallel_connector.ConservativeConnector`) or "timewarp" (see
+                :class:`~omnetpypy.backends.parallel_connector.TimeWarpConnector`). Defaults to "simpy".
+                With the parallel engines, the repetitions are always run sequentially, because each of them
+                already runs on several processes.
+            - engine_params (``dict``), optional:
+                Additional, engine-specific parameters passed to the connector as keyword arguments.
+                Defaults to an empty dictionary.
             - repetitions (``int``), optional:
                 The number of independent repetitions to run. Defaults to 1.
             - metrics (list of :class:`~omnetpypy.utilities.FutureMetric`), optional:
@@ -191,6 +325,20 @@ class Experiment:
             - output_dir (``str`` or `None`), optional:
                 The output directory for the simulation, relative to the configuration file directory.
                 Defaults to `None`, in which case no data will be stored.
+            - fork_after_warmup (``float`` or `None`), optional:
+                If set, the network is built and simulated only once, with the seed set of the first repetition,
+                up to this warm-up time. Then every repetition runs in a process forked from the warmed-up
+                simulation, which reseeds its random number generators with its own seed set and continues up to
+                "simulate_until". The memory pages of the warm-up state are shared among the processes
+                copy-on-write. The metric samples recorded during the warm-up are discarded.
+                Not available with the parallel engines. Defaults to `None`.
+            - rng_block_size (``int`` or `None`), optional:
+                If set, the random number generators pre-draw blocks of this many values with numpy and hand them
+                out one at a time (see :class:`~omnetpypy.utilities.MultiRandom`). Defaults to `None`.
+            - output_format (``str``), optional:
+                The format of the vectors of the "number" and "time_weighted" metrics, either "csv" or "npy". With
+                "npy", the samples are dumped during the simulation as binary records, and the vectors are merged into
+                "{metric name}_vector.npy" files without formatting or parsing any text. Defaults to "csv".
         
     simulations_params : list of tuples
         The list of simulation parameters for each repetition. Each element of the list is a tuple with the
@@ -217,6 +365,12 @@ class Experiment:
             - global_params (dict):
                 A dictionary of global parameters.
                 These parameters are available to all the entities in the simulation.
+            - engine_params (dict):
+                A dictionary of engine-specific parameters for the connector.
+            - rng_block_size (``int`` or `None`):
+                The block size of the buffered random number generators, if any.
+            - output_format (``str``):
+                The format of the temporary output files of the vectors.
 
     output_dir : str or None
         The output directory for the simulation. If `None`, no data is stored.
@@ -252,6 +406,11 @@ class Experiment:
         time_unit = self.config.get("time_unit", "us")
 
         global_params = self.config.get("global_params", {})
+        engine_params = self.config.get("engine_params", {})
+        rng_block_size = self.config.get("rng_block_size", None)
+        output_format = self.config.get("output_format", "csv")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format}")
 
         # set log level
         sim_log.log_to_console(level=log_level)
@@ -277,8 +436,9 @@ class Experiment:
             metric_type = metric.get("type")
             collect = metric.get("collect", "number")
 
-            all_collects = ["vector", "mean", "std", "min", "max", "median", "percentiles", "count", "var"]
-            all_types = ["number", "str", "dict"]
+            all_collects = ["vector", "mean", "std", "min", "max", "median", "percentiles", "count", "var", "histogram"]
+            all_types = ["number", "str", "dict", "time_weighted"]
+            time_weighted_collects = ["vector", "mean", "min", "max", "count", "histogram"]
 
             assert all([collect_type in all_collects for collect_type in collect]), f"collect must be one of {all_collects}"
             assert metric_type in all_types, f"type must be one of {all_types}"
@@ -292,7 +452,7 @@ class Experiment:
                       "type": metric_type}
             params.update(params_collect)
 
-            if metric_type != "number":
+            if metric_type in ["str", "dict"]:
                 assert len([k for k, v in params_collect.items() if v]) == 1 and params_collect["vector"], \
                     "only vector collect type must be set for nun-number typed metrics"
 
@@ -308,6 +468,18 @@ class Experiment:
 
             params["columns"] = columns + ["timestamp"] if columns is not None else None
 
+            if metric_type == "time_weighted":
+                assert all(collect_type in time_weighted_collects for collect_type in collect), \
+                    f"collect must be one of {time_weighted_collects} for time_weighted metrics"
+            else:
+                assert not params_collect["histogram"], "histogram can only be collected for time_weighted metrics"
+            if params_collect["histogram"]:
+                bins = metric.get("bins")
+                assert isinstance(bins, list) and len(bins) > 1, "bins must be a list of at least two bin edges"
+                assert all(isinstance(b, (int, float)) for b in bins), "bins must be a list of numbers"
+                assert all(a < b for a, b in zip(bins, bins[1:])), "bins must be increasing"
+                params["bins"] = bins
+
             metrics.append(utilities.FutureMetric(**params))
 
         if "output_dir" in self.config:
@@ -317,7 +489,8 @@ class Experiment:
         self.output_dir = output_dir
 
         self.simulations_params = [(engine, self.seed_sets[i], i, metrics, yaml_path,
-                                    until, log_level, time_unit, output_dir, global_params)
+                                    until, log_level, time_unit, output_dir, global_params, engine_params,
+                                    rng_block_size, output_format)
                                    for i in range(repetitions)]
 
     def run_simulations(self):
@@ -325,15 +498,23 @@ class Experiment:
         Run the simulations.
         """
 
-        import multiprocessing
-
         max_processes = self.config.get("max_processes", 1)
         # check if max_processes is greater than the number of cpu cores
         if max_processes > 1:
             max_processes = min(multiprocessing.cpu_count(), max_processes)
 
+        # the parallel engines fork their own processes, which is not allowed inside the daemonic pool workers
+        if self.config.get("engine", "simpy") in PARALLEL_ENGINES:
+            max_processes = 1
+
+        warmup = self.config.get("fork_after_warmup", None)
+        if warmup is not None:
+            if self.config.get("engine", "simpy") in PARALLEL_ENGINES:
+                raise ValueError("fork_after_warmup is not available with the parallel engines")
+            collected = self._run_forked_simulations(warmup, max_processes)
+
         # if max_processes is 1, we just run the simulations sequentially
-        if max_processes == 1:
+        elif max_processes == 1:
             collected = []
             for sim_params in self.simulations_params:
                 collected.append(_start_sim(sim_params))
@@ -373,9 +554,19 @@ class Experiment:
                     df = pd.DataFrame(merged[metric])
                     df.to_csv(f"{out_dir}/{metric}.csv", index=False)
 
-            for metric in merged.keys():
+            # only the metrics that collect the vector have temporary files, which are binary for the numeric
+            # metrics in the "npy" format
+            vectors = {metric.name for metric in self.simulations_params[0][3] if metric.vector}
+            binary = {metric.name for metric in self.simulations_params[0][3]
+                      if metric.type in NUMERIC_TYPES and self.config.get("output_format", "csv") == "npy"}
+
+            for metric in merged.keys() & vectors:
                 # we open the temporary files and merge them into a single file. We add a "repetition" column
                 max_reps = self.config.get("repetitions", 1)
+                if metric in binary:
+                    _merge_binary_vectors([f"{out_dir}/.{metric}_vector_rep{i}.bin" for i in range(max_reps)],
+                                          f"{out_dir}/{metric}_vector.npy")
+                    continue
                 for i in range(max_reps):
                     if i == 0:
                         with open(f"{out_dir}/.{metric}_vector_rep{i}.csv", "r") as f:
@@ -394,13 +585,88 @@ class Experiment:
                             df.to_csv(f"{out_dir}/{metric}_vector.csv", mode="a", header=False, index=False)
             # remove the temporary files
             import os
-            for metric in merged.keys():
+            for metric in merged.keys() & vectors:
+                extension = "bin" if metric in binary else "csv"
                 for i in range(self.config.get("repetitions", 1)):
-                    os.remove(f"{out_dir}/.{metric}_vector_rep{i}.csv")
+                    os.remove(f"{out_dir}/.{metric}_vector_rep{i}.{extension}")
+
+    def _run_forked_simulations(self, warmup, max_processes):
+        # run the warm-up once, then fork a process per repetition, with at most max_processes running at once
+        sim = Simulation(*self.simulations_params[0])
+        sim.run(warmup)
+        sim.connector.reset_metrics()
+
+        context = multiprocessing.get_context("fork")
+        collected = []
+        running = []
+        for sim_params in self.simulations_params:
+            if len(running) == max_processes:
+                collected.append(_join_forked_sim(*running.pop(0)))
+            connection, child_connection = context.Pipe(duplex=False)
+            process = context.Process(target=_continue_sim, args=(sim, sim_params, child_connection))
+            process.start()
+            child_connection.close()
+            running.append((process, connection))
+        for process, connection in running:
+            collected.append(_join_forked_sim(process, connection))
+        return collected
+
+
+def _merge_binary_vectors(filenames, output):
+    # write the binary vectors of the repetitions into a single npy file, one repetition at a time. The size of the
+    # array is known from the sizes of the files, so the header is written first and the records are copied into a
+    # memory map. A "repetition" field is added if there are several repetitions
+    fields = VECTOR_DTYPE.descr + ([("repetition", "<i8")] if len(filenames) > 1 else [])
+    dtype = np.dtype(fields)
+    sizes = [os.path.getsize(filename) // VECTOR_DTYPE.itemsize for filename in filenames]
+    if sum(sizes) == 0:
+        np.save(output, np.empty(0, dtype=dtype))
+        return
+    merged = np.lib.format.open_memmap(output, mode="w+", dtype=dtype, shape=(sum(sizes),))
+    start = 0
+    for repetition, (filename, size) in enumerate(zip(filenames, sizes)):
+        records = read_vector(filename)
+        for field in VECTOR_DTYPE.names:
+            merged[field][start:start + size] = records[field]
+        if len(filenames) > 1:
+            merged["repetition"][start:start + size] = repetition
+        start += size
+    merged.flush()
+    del merged
+
+
+def _continue_sim(sim, sim_params, connection):
+    # run in a process forked after the warm-up: switch to the seed set and the index of the repetition and finish it
+    seed_set, repetition = sim_params[1], sim_params[2]
+    try:
+        sim.seed_set = seed_set
+        sim.rng.reseed(seed_set)
+        sim.repetition_idx = repetition
+        sim.connector.repetition = repetition
+        connection.send(("ok", sim.start()))
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def _join_forked_sim(process, connection):
+    # wait for a forked repetition and return its collected metrics
+    try:
+        status, result = connection.recv()
+    except EOFError:
+        status, result = "error", "the process terminated unexpectedly"
+    process.join()
+    connection.close()
+    if status == "error":
+        raise RuntimeError(f"A repetition failed after the warm-up:\n{result}")
+    return result
 
 
 def _start_sim(sim_params):
     # defined here to be picklable
-    engine, seed_set, repetition, metrics, yaml_path, until, log_level, time_unit, output_dir, global_params = sim_params
-    sim = Simulation(engine, seed_set, repetition, metrics, yaml_path, until, log_level, time_unit, output_dir, global_params)
+    (engine, seed_set, repetition, metrics, yaml_path, until, log_level, time_unit, output_dir, global_params,
+     engine_params, rng_block_size, output_format) = sim_params
+    sim = Simulation(engine, seed_set, repetition, metrics, yaml_path, until, log_level, time_unit, output_dir,
+                     global_params, engine_params, rng_block_size, output_format)
     return sim.start()
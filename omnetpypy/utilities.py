@@ -3,6 +3,7 @@ A set of utility classes and functions that are used across the package.
 """
 
 import random
+import numpy as np
 from numpy.random import default_rng
 
 __all__ = ['MultiRandom', 'FutureMetric', 'get_metrics', 'get_metrics_from_csv', 'time_unit_factor']
@@ -15,30 +16,83 @@ class MultiRandom(random.Random):
     This class is a wrapper around the standard library :class:`random.Random` class,
     that allows to use multiple random number generators with different seeds.
 
+    Every distribution method accepts a ``size`` argument: if set, the method returns a :class:`numpy.ndarray` of
+    values drawn at once with the numpy generator (:class:`numpy.random.Generator`) of the selected stream, e.g. for
+    the initial positions of the nodes or a loss mask for many messages.
+
+    In buffered mode (``block_size`` not ``None``), :meth:`random`, :meth:`expovariate`, :meth:`normalvariate` and
+    :meth:`gauss` take their values from blocks of uniforms, exponentials and normals pre-drawn with the numpy
+    generator of the stream, and handed out one at a time. This makes every draw much cheaper than a call to
+    :class:`random.Random`, but draws a different sequence: the results are reproducible for a given seed and block
+    size.
+
     Parameters
     ----------
     seeds : list or int
         A list of seeds for the random number generators.
         The length of the list determines the number of generators. If a single integer is provided,
         a single generator is created.
+    block_size : int or None, optional
+        The number of values pre-drawn at a time in buffered mode. Defaults to ``None``, i.e. no buffering.
+
+    Attributes
+    ----------
+    block_size : int or None
+        The number of values pre-drawn at a time, or ``None`` if the generators are not buffered.
+
+    Raises
+    ------
+    ValueError
+        If ``block_size`` is not positive.
     """
 
-    def __init__(self, seeds=44):
+    def __init__(self, seeds=44, block_size=None):
+        if block_size is not None and block_size < 1:
+            raise ValueError(f"The block size must be at least 1, got {block_size}")
+        self.block_size = block_size
+        self.reseed(seeds)
+
+    def reseed(self, seeds):
+        r"""
+        Reset all the random number generators with new seeds.
+
+        Parameters
+        ----------
+        seeds : list or int
+            A list of seeds for the random number generators.
+            The length of the list determines the number of generators. If a single integer is provided,
+            a single generator is created.
+        """
         if isinstance(seeds, int):
             seeds = [seeds]
         if len(seeds) == 0:
             super().__init__()
             self._generators = [self]
+            self.numpy_generators = [default_rng()]
         else:
             self._generators = [random.Random() for _ in seeds]
             self.numpy_generators = [default_rng(seed=seed) for seed in seeds]
             for g, s in zip(self._generators, seeds):
                 g.seed(s)
 
+        # pre-drawn uniforms, standard exponentials and standard normals of every generator, in reverse order so
+        # that the next value is popped from the end
+        self._uniforms = [[] for _ in self.numpy_generators]
+        self._exponentials = [[] for _ in self.numpy_generators]
+        self._normals = [[] for _ in self.numpy_generators]
+
     def __len__(self):
         return len(self._generators)
 
-    def random(self, generator=0):
+    def __reduce__(self):
+        # random.Random only pickles the state of a single generator, so the states of all the generators are saved
+        seeds = [] if self._generators[0] is self else [0] * len(self._generators)
+        return self.__class__, (seeds, self.block_size), self.get_all_states()
+
+    def __setstate__(self, states):
+        self.set_all_states(states)
+
+    def random(self, generator=0, size=None):
         r"""
         Return the next random floating point number uniformly distributed in the range [0.0, 1.0).
         
@@ -46,6 +100,9 @@ class MultiRandom(random.Random):
         ----------
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
         
         Returns
         -------
@@ -56,9 +113,16 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.random`
         """
-        return self._generators[generator].random()
-
-    def randint(self, a, b, generator=0):
+        if size is not None:
+            return self.numpy_generators[generator].random(size)
+        if self.block_size is None:
+            return self._generators[generator].random()
+        block = self._uniforms[generator]
+        if not block:
+            block.extend(self.numpy_generators[generator].random(self.block_size)[::-1].tolist())
+        return block.pop()
+
+    def randint(self, a, b, generator=0, size=None):
         r"""
         Return the next random integer N such that a <= N <= b.
 
@@ -70,6 +134,9 @@ class MultiRandom(random.Random):
             The upper bound of the random integer.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -80,9 +147,11 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.randint`
         """
+        if size is not None:
+            return self.numpy_generators[generator].integers(a, b, size, endpoint=True)
         return self._generators[generator].randint(a, b)
 
-    def choice(self, seq, generator=0):
+    def choice(self, seq, generator=0, size=None):
         r"""
         Return a random element from the non-empty sequence ``seq``.
 
@@ -92,6 +161,9 @@ class MultiRandom(random.Random):
             A non-empty sequence.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -102,6 +174,8 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.choice`
         """
+        if size is not None:
+            return self.numpy_generators[generator].choice(seq, size)
         return self._generators[generator].choice(seq)
 
     def choices(self, sequence, weights=None, cum_weights=None, k=1, generator=0):
@@ -177,7 +251,7 @@ class MultiRandom(random.Random):
         """
         return self._generators[generator].sample(population, k)
 
-    def uniform(self, a, b, generator=0):
+    def uniform(self, a, b, generator=0, size=None):
         r"""
         Return a random floating point number N such that a <= N <= b for a <= b and b <= N <= a for b < a.
 
@@ -189,6 +263,9 @@ class MultiRandom(random.Random):
             The upper bound of the random number.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -201,14 +278,15 @@ class MultiRandom(random.Random):
         :meth:`random.Random.uniform`
 
         """
+        if size is not None:
+            return self.numpy_generators[generator].uniform(a, b, size)
         return self._generators[generator].uniform(a, b)
 
     def geometric(self, p, size=None, generator=0):
         r"""
         Return a random integer N from a geometric distribution.
 
-        This is the only method that uses the numpy random number generator (:class:`numpy.random.Generator`) instead
-        of the standard library random number generator (:class:`random.Random`).
+        This method always uses the numpy random number generator (:class:`numpy.random.Generator`) of the stream.
 
         Parameters
         ----------
@@ -226,7 +304,7 @@ class MultiRandom(random.Random):
         """
         return self.numpy_generators[generator].geometric(p, size)
 
-    def triangular(self, low=0.0, high=0.0, mode=None, generator=0):
+    def triangular(self, low=0.0, high=0.0, mode=None, generator=0, size=None):
         r"""
         Return a random floating point number N such that low <= N <= high and with the specified mode between bounds.
 
@@ -240,15 +318,21 @@ class MultiRandom(random.Random):
             The mode of the distribution. If None, the mode is the midpoint between the bounds.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         See Also
         --------
         :meth:`random.Random.triangular`
         
         """
+        if size is not None:
+            mode = (low + high) / 2 if mode is None else mode
+            return self.numpy_generators[generator].triangular(low, mode, high, size)
         return self._generators[generator].triangular(low, high, mode)
 
-    def normalvariate(self, mu=0.0, sigma=1.0, generator=0):
+    def normalvariate(self, mu=0.0, sigma=1.0, generator=0, size=None):
         r"""
         Return a random floating point number N from a normal (Gaussian) distribution.
 
@@ -260,6 +344,9 @@ class MultiRandom(random.Random):
             The standard deviation of the distribution.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -270,9 +357,13 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.normalvariate`
         """
-        return self._generators[generator].normalvariate(mu, sigma)
+        if size is not None:
+            return self.numpy_generators[generator].normal(mu, sigma, size)
+        if self.block_size is None:
+            return self._generators[generator].normalvariate(mu, sigma)
+        return mu + sigma * self._standard_normal(generator)
 
-    def lognormvariate(self, mu=0.0, sigma=1.0, generator=0):
+    def lognormvariate(self, mu=0.0, sigma=1.0, generator=0, size=None):
         r"""
         Return a random floating point number N from a lognormal distribution.
 
@@ -284,6 +375,9 @@ class MultiRandom(random.Random):
             The standard deviation of the distribution.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -294,9 +388,11 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.lognormvariate`
         """
+        if size is not None:
+            return self.numpy_generators[generator].lognormal(mu, sigma, size)
         return self._generators[generator].lognormvariate(mu, sigma)
 
-    def gauss(self, mu=0.0, sigma=1.0, generator=0):
+    def gauss(self, mu=0.0, sigma=1.0, generator=0, size=None):
         r"""
         Return a random floating point number N from a normal (Gaussian) distribution.
 
@@ -308,6 +404,9 @@ class MultiRandom(random.Random):
             The standard deviation of the distribution.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -318,11 +417,22 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.gauss`
         """
-        return self._generators[generator].gauss(mu, sigma)
-
-    def expovariate(self, lambd=1.0, generator=0):
+        if size is not None:
+            return self.numpy_generators[generator].normal(mu, sigma, size)
+        if self.block_size is None:
+            return self._generators[generator].gauss(mu, sigma)
+        return mu + sigma * self._standard_normal(generator)
+
+    def _standard_normal(self, generator):
+        # next pre-drawn standard normal of a generator, in buffered mode
+        block = self._normals[generator]
+        if not block:
+            block.extend(self.numpy_generators[generator].standard_normal(self.block_size)[::-1].tolist())
+        return block.pop()
+
+    def expovariate(self, lambd=1.0, generator=0, size=None):
         r"""
-        Return a random floating point number N from a normal (Gaussian) distribution.
+        Return a random floating point number N from an exponential distribution.
 
         Parameters
         ----------
@@ -330,6 +440,9 @@ class MultiRandom(random.Random):
             The rate of the exponential distribution.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -340,9 +453,16 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.expovariate`
         """
-        return self._generators[generator].expovariate(lambd)
-
-    def vonmisesvariate(self, mu, kappa, generator=0):
+        if size is not None:
+            return self.numpy_generators[generator].exponential(1 / lambd, size)
+        if self.block_size is None:
+            return self._generators[generator].expovariate(lambd)
+        block = self._exponentials[generator]
+        if not block:
+            block.extend(self.numpy_generators[generator].standard_exponential(self.block_size)[::-1].tolist())
+        return block.pop() / lambd
+
+    def vonmisesvariate(self, mu, kappa, generator=0, size=None):
         r"""
         Return a random floating point number N from a von Mises distribution.
 
@@ -354,6 +474,9 @@ class MultiRandom(random.Random):
             The concentration of the distribution.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -364,9 +487,12 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.vonmisesvariate`
         """
+        if size is not None:
+            # numpy draws the angles in [-pi, pi], the standard library in [0, 2 pi)
+            return np.mod(self.numpy_generators[generator].vonmises(mu, kappa, size), 2 * np.pi)
         return self._generators[generator].vonmisesvariate(mu, kappa)
 
-    def gammavariate(self, alpha, beta, generator=0):
+    def gammavariate(self, alpha, beta, generator=0, size=None):
         r"""
         Return a random floating point number N from a gamma distribution.
 
@@ -378,6 +504,9 @@ class MultiRandom(random.Random):
             The scale of the distribution. Can be any positive number.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -388,9 +517,11 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.gammavariate`
         """
+        if size is not None:
+            return self.numpy_generators[generator].gamma(alpha, beta, size)
         return self._generators[generator].gammavariate(alpha, beta)
 
-    def betavariate(self, alpha, beta, generator=0):
+    def betavariate(self, alpha, beta, generator=0, size=None):
         r"""
         Return a random floating point number N from a beta distribution.
 
@@ -402,6 +533,9 @@ class MultiRandom(random.Random):
             The second shape parameter of the distribution. Can be any positive number.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -412,9 +546,11 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.betavariate`
         """
+        if size is not None:
+            return self.numpy_generators[generator].beta(alpha, beta, size)
         return self._generators[generator].betavariate(alpha, beta)
 
-    def paretovariate(self, alpha, generator=0):
+    def paretovariate(self, alpha, generator=0, size=None):
         r"""
         Return a random floating point number N from a Pareto distribution.
 
@@ -424,6 +560,9 @@ class MultiRandom(random.Random):
             The shape of the distribution. Can be any positive number.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -434,20 +573,26 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.parentovariate`
         """
+        if size is not None:
+            # numpy draws from the Lomax distribution, i.e. the Pareto distribution shifted to 0
+            return self.numpy_generators[generator].pareto(alpha, size) + 1
         return self._generators[generator].paretovariate(alpha)
 
-    def weibullvariate(self, alpha, beta, generator=0):
+    def weibullvariate(self, alpha, beta, generator=0, size=None):
         r"""
         Return a random floating point number N from a Weibull distribution.
 
         Parameters
         ----------
         alpha : float
-            The shape of the distribution. Can be any positive number.
-        beta : float
             The scale of the distribution. Can be any positive number.
+        beta : float
+            The shape of the distribution. Can be any positive number.
         generator : int, optional
             The index of the generator to use. Defaults to 0.
+        size : int or tuple of ints or None, optional
+            If not ``None``, return a :class:`numpy.ndarray` of values with this shape, drawn with the numpy generator
+            of the stream. Defaults to ``None``, i.e. a single value.
 
         Returns
         -------
@@ -458,6 +603,9 @@ class MultiRandom(random.Random):
         --------
         :meth:`random.Random.weibullvariate`
         """
+        if size is not None:
+            # numpy draws with unit scale
+            return alpha * self.numpy_generators[generator].weibull(beta, size)
         return self._generators[generator].weibullvariate(alpha, beta)
 
     def getstate(self, generator=0):
@@ -493,9 +641,42 @@ class MultiRandom(random.Random):
         """
         self._generators[generator].setstate(state)
 
+    def get_all_states(self):
+        r"""
+        Return the internal states of all the random number generators, including the numpy ones and the values
+        pre-drawn in buffered mode.
+
+        Returns
+        -------
+        tuple
+            The states, that can be restored with :meth:`~omnetpypy.utilities.MultiRandom.set_all_states`.
+        """
+        # random.Random methods are called explicitly, because the only generator may be this instance itself
+        return ([random.Random.getstate(g) for g in self._generators],
+                [g.bit_generator.state for g in self.numpy_generators],
+                [[list(block) for block in blocks] for blocks in (self._uniforms, self._exponentials, self._normals)])
+
+    def set_all_states(self, states):
+        r"""
+        Restore the internal states of all the random number generators, including the numpy ones.
+
+        Parameters
+        ----------
+        states : tuple
+            The states, as returned by :meth:`~omnetpypy.utilities.MultiRandom.get_all_states`.
+        """
+        python_states, numpy_states, buffered = states
+        for g, state in zip(self._generators, python_states):
+            random.Random.setstate(g, state)
+        for g, state in zip(self.numpy_generators, numpy_states):
+            g.bit_generator.state = state
+        self._uniforms, self._exponentials, self._normals = [[list(block) for block in blocks]
+                                                             for blocks in buffered]
+
 
 FutureMetric = namedtuple("FutureMetric", ["name", "vector", "mean", "median", "std", "var", "min", "max",
-                               "count", "percentiles", "type", "columns"])
+                               "count", "percentiles", "type", "columns", "histogram", "bins"],
+                          defaults=[False, None])
 r"""
 A type that describes the metrics to collect during simulations. The fields, apart from the name, are booleans
 indicating the statistics to collect for the metric. Such fields are:
@@ -509,6 +690,13 @@ indicating the statistics to collect for the metric. Such fields are:
 - max: the maximum value 
 - count: the number of samples 
 - percentiles: the percentiles of the values (1, 5, 25, 75, 95, 99) 
+- histogram: the fractions of time spent in the bins, for "time_weighted" metrics
+
+The "type" field is the type of the samples: "number", "str", "dict" or "time_weighted". The samples of a
+"time_weighted" metric are the values of a state that holds until the next sample, so their mean, min, max and
+histogram are weighted by time (see :class:`~omnetpypy.backends.metric_statistics.TimeWeightedStatistics`).
+The "columns" field lists the columns of a "dict" metric, and the "bins" field the edges of the bins of the
+histogram. The "histogram" and "bins" fields can be omitted, and default to ``False`` and ``None``.
 
 """
 
@@ -559,7 +747,9 @@ def get_metrics(metric, df):
 
 def get_metrics_from_csv(metric, filename):
     r"""
-    Compute the statistics for a metric and return them as a dictionary.
+    Compute the statistics for a metric and return them as a dictionary, from a csv file of samples.
+    The file is read in chunks, that are folded into the same accumulators used during the simulations (see
+    :class:`~omnetpypy.backends.metric_statistics.MetricStatistics`), so the whole file is never loaded in memory.
 
     Parameters
     ----------
@@ -573,100 +763,13 @@ def get_metrics_from_csv(metric, filename):
     dict
         A dictionary containing the requested statistics for the metric.
     """
+    import pandas as pd
+    from omnetpypy.backends.metric_statistics import MetricStatistics
 
-    # compute the statistics without loading the whole file in memory
-    # the csv_iterator is an iterator over the rows of the csv file
-    # we use the first row to get the column names
-    # and we use the second row to initialize the statistics
-    # then we iterate over the remaining rows to update the statistics
-
-    import csv
-    import numpy as np
-
-    # read the first row to get the column names
-    with open(filename, "r") as csv_iterator:
-        csv_reader = csv.reader(csv_iterator)
-        header = next(csv_reader)
-        sample_index = header.index("sample")
-
-        # use metric to initialize the statistics (except for the vector, which is ignored for the moment)
-        final = {}
-        samples = 0
-        if metric.mean:
-            final["mean"] = 0
-        if metric.median:
-            final["median"] = []
-        if metric.std:
-            final["std"] = 0
-        if metric.var:
-            final["var"] = 0
-        if metric.min:
-            final["min"] = np.inf
-        if metric.max:
-            final["max"] = -np.inf
-        if metric.count:
-            final["count"] = 0
-        if metric.percentiles:
-            final["percentiles"] = []
-
-        # iterate over the remaining rows to update the statistics. Median and percentiles are computed online using
-        # a list with 10K elements at most and a smaller list that collects the samples for the median as the median of
-        # the 10k elements. This is done to avoid loading the whole file in memory.
-        median_samples = []
-        median_temp = []
-
-        percentiles_samples = []
-        percentiles_temp = []
-
-        max_elems = 100000
-
-        for row in csv_reader:
-            samples += 1
-            sample = float(row[sample_index])
-            if metric.mean:
-                final["mean"] += sample
-            if metric.median:
-                median_temp.append(sample)
-                if len(median_temp) > max_elems - 1:
-                    median_samples.append(np.median(median_temp))
-                    median_temp = []
-            if metric.std:
-                final["std"] += sample**2
-            if metric.var:
-                final["var"] += sample**2
-            if metric.min:
-                final["min"] = min(final["min"], sample)
-            if metric.max:
-                final["max"] = max(final["max"], sample)
-            if metric.count:
-                final["count"] += 1
-            if metric.percentiles:
-                percentiles_temp.append(sample)
-                if len(percentiles_temp) > max_elems - 1:
-                    percentiles_samples.append(np.percentile(percentiles_temp, [1, 5, 25, 75, 95, 99]))
-                    percentiles_temp = []
-
-    if samples > 0:
-        # compute the final statistics
-        if metric.mean:
-            final["mean"] /= samples
-        if metric.median:
-            if len(median_samples) == 0 or len(median_temp) > (max_elems // 100):
-                median_samples.append(np.median(median_temp))
-            final["median"] = np.mean(median_samples)
-        if metric.std:
-            final["std"] = np.sqrt(final["std"] / samples - final["mean"]**2)
-        if metric.var:
-            final["var"] = final["var"] / samples - final["mean"]**2
-        if metric.count:
-            final["count"] = samples
-        if metric.percentiles:
-            if len(percentiles_samples) == 0 or len(percentiles_temp) > (max_elems // 100):
-                percentiles_samples.append(np.percentile(percentiles_temp, [1, 5, 25, 75, 95, 99]))
-            # compute the final percentiles as a list of the sample mean of the respective percentiles in the samples
-            final["percentiles"] = [np.mean([x[i] for x in percentiles_samples]) for i in range(6)]
-
-    return final
+    statistics = MetricStatistics(metric)
+    for chunk in pd.read_csv(filename, usecols=["sample"], chunksize=1 << 16):
+        statistics.update(chunk["sample"].to_numpy(dtype=np.float64))
+    return statistics.results()
 
 
 def time_unit_factor(unit):
@@ -0,0 +1,104 @@
+r"""
+This file contains tests for the FIFO pipelines of the channels with a constant delay.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from omnetpypy import SimpleModule, Message
+from omnetpypy.simulation import Simulation
+
+SIMPLE = """
+simple:
+  - name: "Source"
+    package: "test_channel_pipeline"
+  - name: "Sink"
+    package: "test_channel_pipeline"
+"""
+
+NETWORK = """
+network:
+  - name: "LongHaulNetwork"
+    submodules:
+      - type: "Source"
+        name: "source"
+      - type: "Sink"
+        name: "sink"
+    connections:
+      - source: "source.out"
+        target: "sink.in"
+        channel: "default"
+        parameters:
+          delay: 20
+          pipeline: {pipeline}
+"""
+
+
+class Source(SimpleModule):
+    # sends a message every time unit, many more than fit in the channel
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=["out"])
+        self.sent = 0
+        self.max_events = 0
+
+    def initialize(self, step=0):
+        if step == 0:
+            self.schedule_message(Message(), delay=1)
+
+    def handle_message(self, message, port_name):
+        self.send(Message(fields=[self.sent]), "out")
+        self.sent += 1
+        if self.sent < 50:
+            self.schedule_message(message, delay=1)
+        events = getattr(self.sim_context.connector, "_events", None)
+        if events is not None:
+            self.max_events = max(self.max_events, len(events))
+
+
+class Sink(SimpleModule):
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=["in"])
+        self.received = []
+
+    def handle_message(self, message, port_name):
+        self.received.append((self.sim_context.time(), message.fields[0]))
+
+
+class TestChannelPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, "simple.yaml"), "w") as f:
+            f.write(SIMPLE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _run(self, engine, pipeline):
+        with open(os.path.join(self.directory, "network.yaml"), "w") as f:
+            f.write(NETWORK.format(pipeline=pipeline))
+        sim = Simulation(engine, [42], 0, [], self.directory + "/", 1000, "error", "s", None, {})
+        sim.start()
+        return sim.network.sub_modules["source"], sim.network.sub_modules["sink"]
+
+    def test_pipeline(self):
+        for engine in ["simpy", "native"]:
+            with self.subTest(engine=engine):
+                source, sink = self._run(engine, "true")
+                self.assertEqual(sink.received, [(21 + i, i) for i in range(50)])
+                _, unpipelined_sink = self._run(engine, "false")
+                self.assertEqual(unpipelined_sink.received, sink.received)
+
+    def test_event_set_size(self):
+        source, _ = self._run("native", "true")
+        unpipelined_source, _ = self._run("native", "false")
+        self.assertLessEqual(source.max_events, 4)
+        self.assertGreaterEqual(unpipelined_source.max_events, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
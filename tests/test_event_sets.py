@@ -0,0 +1,84 @@
+r"""
+This file contains tests for the future event set implementations.
+"""
+
+import heapq
+import random
+import unittest
+
+from omnetpypy.backends.event_sets import EVENT_SETS, make_event_set
+
+
+class TestEventSets(unittest.TestCase):
+
+    def _check_against_heapq(self, name, seed):
+        rng = random.Random(seed)
+        event_set = make_event_set(name)
+        reference = []
+        now = 0.0
+        for seq in range(5000):
+            if rng.random() < 0.55 or not reference:
+                # mix of close, simultaneous and far away events
+                increment = rng.choice([rng.expovariate(1.0), rng.randint(0, 3), 0, rng.random() * 1e4])
+                event = (now + increment, seq, None, None, None)
+                event_set.push(event)
+                heapq.heappush(reference, event)
+            else:
+                event = event_set.pop()
+                self.assertEqual(event, heapq.heappop(reference))
+                now = event[0]
+            self.assertEqual(len(event_set), len(reference))
+
+        while reference:
+            self.assertEqual(event_set.pop(), heapq.heappop(reference))
+        self.assertRaises(IndexError, event_set.pop)
+
+    def test_event_sets(self):
+        for name in EVENT_SETS:
+            for seed in range(5):
+                with self.subTest(event_set=name, seed=seed):
+                    self._check_against_heapq(name, seed)
+
+    def _check_push_back(self, name, seed):
+        # events popped and pushed back, peeks, and pushes earlier than the last popped event, as done by the engines
+        # when they stop at a given time and by the optimistic engine when it rolls back
+        rng = random.Random(seed)
+        event_set = make_event_set(name)
+        reference = []
+        now = 0
+        for seq in range(5000):
+            action = rng.random()
+            if action < 0.45 or not reference:
+                # integer times, so that there are many ties
+                time = max(0, now + rng.choice([rng.randint(0, 5), rng.randint(0, 100), -rng.randint(1, 10)]))
+                event = (time, seq, None, None, None)
+                event_set.push(event)
+                heapq.heappush(reference, event)
+            elif action < 0.6:
+                self.assertEqual(event_set.peek(), reference[0])
+            elif action < 0.75:
+                event = event_set.pop()
+                self.assertEqual(event, reference[0])
+                event_set.push(event)
+            else:
+                event = event_set.pop()
+                self.assertEqual(event, heapq.heappop(reference))
+                now = event[0]
+            self.assertEqual(len(event_set), len(reference))
+
+        while reference:
+            self.assertEqual(event_set.pop(), heapq.heappop(reference))
+        self.assertRaises(IndexError, event_set.peek)
+
+    def test_push_back(self):
+        for name in EVENT_SETS:
+            for seed in range(10):
+                with self.subTest(event_set=name, seed=seed):
+                    self._check_push_back(name, seed)
+
+    def test_invalid_event_set(self):
+        self.assertRaises(ValueError, make_event_set, "skip_list")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+r"""
+This file contains tests for the repetitions forked after a shared warm-up.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from omnetpypy.simulation import Experiment
+
+RING_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "omnetpypy", "examples",
+                              "ring")
+
+CONFIG = """
+repetitions: 3
+num_rngs: 2
+simulate_until: 100
+yaml_directory: "./"
+engine: "{engine}"
+fork_after_warmup: {warmup}
+max_processes: 2
+output_dir: "output"
+
+metrics:
+  - name: "Hops"
+    collect: ["vector", "count"]
+    type: "number"
+
+log_level: "error"
+"""
+
+
+class TestForkAfterWarmup(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for filename in ["network.yaml", "simple.yaml"]:
+            shutil.copy(os.path.join(RING_DIRECTORY, filename), self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _run(self, engine, warmup):
+        config_file = os.path.join(self.directory, "config.yaml")
+        with open(config_file, "w") as f:
+            f.write(CONFIG.format(engine=engine, warmup=warmup))
+        Experiment(config_file=config_file).run_simulations()
+        return pd.read_csv(os.path.join(self.directory, "output", "Hops_vector.csv"))
+
+    def test_native(self):
+        vector = self._run("native", 40)
+        self.assertEqual(sorted(vector["repetition"].unique()), [0, 1, 2])
+        # the warm-up samples are discarded
+        self.assertTrue((vector["timestamp"] >= 40).all())
+
+        # the ring is deterministic, so every repetition continues like an uninterrupted run
+        full = self._run("native", "null")
+        expected = full[(full["repetition"] == 0) & (full["timestamp"] >= 40)]
+        for repetition in range(3):
+            samples = vector[vector["repetition"] == repetition]
+            self.assertEqual(list(samples["timestamp"]), list(expected["timestamp"]))
+
+    def test_parallel_engine_rejected(self):
+        with self.assertRaises(ValueError):
+            self._run("conservative", 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
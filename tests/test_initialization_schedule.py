@@ -0,0 +1,55 @@
+r"""
+This file contains tests for the precomputed initialization schedule.
+"""
+
+import unittest
+
+from omnetpypy.backends.connector import initialization_schedule
+from omnetpypy.front_end.channel import Channel
+from omnetpypy.front_end.compound_module import CompoundModule
+from omnetpypy.front_end.simple_module import SimpleModule
+
+
+class _Module(SimpleModule):
+
+    def handle_message(self, message, port_name):
+        pass
+
+    def initialize(self, step=0):
+        pass
+
+
+class _LateModule(_Module):
+    init_stages = (1, 3)
+
+
+class TestInitializationSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.network = CompoundModule("network", 0, [])
+        self.early = _Module("early", 1, [])
+        self.late = _LateModule("late", 2, [])
+        self.channel = Channel("channel", 3, delay=1)
+        for entity in [self.early, self.late, self.channel]:
+            self.network.add_sub_module(entity)
+
+    def test_only_overriding_entities(self):
+        schedule = initialization_schedule(self.network, 6)
+        self.assertEqual([stage for stage, _ in schedule], [0, 1, 2, 3, 4, 5])
+        for stage, entities in schedule:
+            self.assertNotIn(self.channel, entities)
+            self.assertNotIn(self.network, entities)
+        self.assertEqual(dict(schedule)[1], [self.early, self.late])
+        self.assertEqual(dict(schedule)[2], [self.early])
+
+    def test_num_stages(self):
+        schedule = initialization_schedule(self.network, 2)
+        self.assertEqual(schedule, [(0, [self.early]), (1, [self.early, self.late])])
+
+        self.network.sub_modules.pop("early")
+        schedule = initialization_schedule(self.network, 6)
+        self.assertEqual(schedule, [(1, [self.late]), (3, [self.late])])
+
+
+if __name__ == '__main__':
+    unittest.main()
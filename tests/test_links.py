@@ -0,0 +1,124 @@
+r"""
+This file contains tests for the links, the lightweight form of the default channels.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from omnetpypy import SimpleModule, Message, Channel
+from omnetpypy.front_end.message import MessageTrain
+from omnetpypy.front_end.port import Link
+from omnetpypy.simulation import Simulation
+
+SIMPLE = """
+simple:
+  - name: "Pinger"
+    package: "test_links"
+"""
+
+NETWORK = """
+network:
+  - name: "LinkNetwork"
+    submodules:
+      - type: "Pinger"
+        name: "ping"
+      - type: "Pinger"
+        name: "pong"
+    connections:
+      - source: "ping.port"
+        target: "pong.port"
+        channel: "default"
+        parameters:
+          delay: {delay}
+          {extra}
+"""
+
+
+class Pinger(SimpleModule):
+    # "ping" starts, then both modules bounce the message back a few times
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=["port"])
+        self.received = []
+
+    def initialize(self, step=0):
+        if step == 0 and self.name == "ping":
+            self.send(Message(fields=[0]), "port")
+
+    def handle_message(self, message, port_name):
+        self.received.append((self.sim_context.time(), message.fields[0]))
+        if message.fields[0] < 5:
+            self.send(Message(fields=[message.fields[0] + 1]), "port")
+
+
+class _Random:
+    # draws the given values in order
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def random(self):
+        return self.values.pop(0)
+
+
+class TestLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, "simple.yaml"), "w") as f:
+            f.write(SIMPLE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _run(self, engine, extra="", delay=2):
+        with open(os.path.join(self.directory, "network.yaml"), "w") as f:
+            f.write(NETWORK.format(extra=extra, delay=delay))
+        sim = Simulation(engine, [42], 0, [], self.directory + "/", 100, "error", "s", None, {})
+        sim.start()
+        return sim.network
+
+    def test_default_channel_is_a_link(self):
+        for engine in ["simpy", "native"]:
+            with self.subTest(engine=engine):
+                network = self._run(engine)
+                self.assertFalse(any(isinstance(entity, Channel) for entity in network.sub_modules.values()))
+                link = network.sub_modules["ping"].ports["port"].link
+                self.assertIs(network.sub_modules["pong"].ports["port"].link, link)
+                self.assertEqual(link.delay, 2)
+                self.assertEqual(network.sub_modules["pong"].received, [(2, 0), (6, 2), (10, 4)])
+                self.assertEqual(network.sub_modules["ping"].received, [(4, 1), (8, 3), (12, 5)])
+
+    def test_pipelined_channel_is_an_entity(self):
+        network = self._run("native", extra="pipeline: true")
+        self.assertTrue(any(isinstance(entity, Channel) for entity in network.sub_modules.values()))
+        self.assertIsNone(network.sub_modules["ping"].ports["port"].link)
+        self.assertEqual(network.sub_modules["ping"].received, [(4, 1), (8, 3), (12, 5)])
+
+    def test_loss(self):
+        link = Link(delay=3, loss_prob=0.5)
+        message = Message(fields=[0])
+        self.assertEqual(link.transmit(message, 1, _Random([0.9])), (message, 4))
+        self.assertEqual(link.transmit(message, 1, _Random([0.1])), (None, 4))
+
+        # the lost messages of a train are removed, the train starts with the first survivor
+        train = MessageTrain([Message(fields=[i]) for i in range(3)], [0, 2, 4])
+        survivor, delay = link.transmit(train, 0, _Random([0.1, 0.9, 0.9]))
+        self.assertEqual([inner.fields[0] for inner in survivor.messages], [1, 2])
+        self.assertEqual(survivor.offsets, [0, 2])
+        self.assertEqual(delay, 5)
+
+    def test_non_positive_delay(self):
+        # like on the default channels, a delay that is not positive is not applied
+        for link_delay in [0, -1]:
+            self.assertEqual(Link(delay=link_delay).transmit(Message(fields=[0]), 1, None)[1], 1)
+            for engine in ["simpy", "native"]:
+                with self.subTest(engine=engine, delay=link_delay):
+                    network = self._run(engine, delay=link_delay)
+                    self.assertEqual(network.sub_modules["pong"].received, [(0, 0), (0, 2), (0, 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
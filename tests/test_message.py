@@ -0,0 +1,128 @@
+r"""
+This file contains tests for the slotted messages, the message pool and the fan-out modes of the ports.
+"""
+
+import copy
+import pickle
+import unittest
+
+from omnetpypy.front_end.message import Message, MessageView, MessagePool
+from omnetpypy.front_end.simple_module import SimpleModule
+
+
+class _Packet(Message):
+    __slots__ = ()
+    field_names = ("source", "destination", "size")
+
+
+class _Receiver(SimpleModule):
+
+    def handle_message(self, message, port_name):
+        pass
+
+
+class _Context:
+    # a simulation context whose connector collects the port inputs
+
+    def __init__(self):
+        self.connector = self
+        self.received = []
+
+    def schedule_port_input(self, port, message, delay=0):
+        self.received.append(message)
+
+
+def _broadcast(fanout, message, subscribers=3):
+    context = _Context()
+    sender = _Receiver("sender", 0, ["out"])
+    for index in range(subscribers):
+        receiver = _Receiver(f"receiver{index}", index + 1, ["in"])
+        receiver.set_sim_context(context)
+        receiver.ports["in"].subscribe_to(sender.ports["out"], fanout=fanout)
+    sender.ports["out"].tx_output(message)
+    return context.received
+
+
+class TestMessage(unittest.TestCase):
+
+    def test_no_attribute_dictionary(self):
+        message = Message(fields=[1, 2])
+        self.assertFalse(hasattr(message, "__dict__"))
+        self.assertIsNone(message._meta)
+        message.meta["header"] = "DATA"
+        self.assertEqual(message.meta, {"header": "DATA"})
+
+    def test_schema(self):
+        packet = _Packet(source="A", destination="B", size=1500, header="DATA")
+        self.assertEqual(packet.fields, ["A", "B", 1500])
+        self.assertEqual(packet.meta, {"header": "DATA"})
+        packet.size = 500
+        self.assertEqual(packet.fields[2], 500)
+        with self.assertRaises(ValueError):
+            _Packet(fields=["A"])
+
+    def test_copy_and_pickle(self):
+        packet = _Packet(fields=["A", "B", 1500], header="DATA")
+        for other in [copy.copy(packet), copy.deepcopy(packet), pickle.loads(pickle.dumps(packet))]:
+            self.assertIs(type(other), _Packet)
+            self.assertEqual(other.fields, packet.fields)
+            self.assertEqual(other.meta, packet.meta)
+            self.assertIsNot(other.fields, packet.fields)
+
+    def test_copy_without_fields(self):
+        message = Message()
+        for other in [copy.copy(message), copy.deepcopy(message), pickle.loads(pickle.dumps(message))]:
+            self.assertIs(type(other), Message)
+            self.assertIsNone(other.fields)
+            self.assertIsNone(other._meta)
+
+    def test_pool(self):
+        pool = MessagePool(_Packet, max_size=1)
+        packet = pool.acquire(["A", "B", 1500], header="DATA")
+        pool.release(packet)
+        pool.release(_Packet(["C", "D", 0]))
+        self.assertEqual(len(pool), 1)
+
+        recycled = pool.acquire(source="E", size=64)
+        self.assertIs(recycled, packet)
+        self.assertEqual(recycled.fields, ["E", None, 64])
+        self.assertIsNone(recycled._meta)
+        self.assertEqual(len(pool), 0)
+
+    def test_fanout_copy_and_shared(self):
+        message = Message(fields=[1])
+        copies = _broadcast("copy", message)
+        self.assertEqual(len({id(received) for received in copies + [message]}), 4)
+        self.assertTrue(all(received is message for received in _broadcast("shared", message)))
+        with self.assertRaises(ValueError):
+            _broadcast("unknown", message)
+
+    def test_fanout_copy_on_write(self):
+        packet = _Packet(fields=["A", "B", 1500], header="DATA")
+        views = _broadcast("cow", packet)
+        self.assertTrue(all(isinstance(view, MessageView) for view in views))
+
+        # reading does not copy
+        self.assertEqual(views[0].fields, ["A", "B", 1500])
+        self.assertEqual(views[0].size, 1500)
+        self.assertEqual(views[0].meta["header"], "DATA")
+        self.assertFalse(any(view.is_materialized for view in views))
+
+        # every kind of write copies, only for the writer
+        views[0].fields[2] = 64
+        views[1].meta["header"] = "ACK"
+        views[2].destination = "C"
+        self.assertEqual(views[0].size, 64)
+        self.assertEqual(views[1].meta, {"header": "ACK"})
+        self.assertEqual(views[2].fields, ["A", "C", 1500])
+        self.assertEqual(packet.fields, ["A", "B", 1500])
+        self.assertEqual(packet.meta, {"header": "DATA"})
+
+        # views pickle with their state
+        restored = pickle.loads(pickle.dumps(views[1]))
+        self.assertEqual(restored.meta["header"], "ACK")
+        self.assertIs(type(copy.copy(views[0])), _Packet)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+r"""
+This file contains tests for the bursts of messages sent as trains.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from omnetpypy import SimpleModule, Message
+from omnetpypy.front_end.message import MessageTrain
+from omnetpypy.simulation import Simulation
+
+SIMPLE = """
+simple:
+  - name: "BurstSource"
+    package: "test_message_trains"
+  - name: "Sink"
+    package: "test_message_trains"
+  - name: "TrainSink"
+    package: "test_message_trains"
+"""
+
+NETWORK = """
+network:
+  - name: "BurstNetwork"
+    submodules:
+      - type: "BurstSource"
+        name: "source"
+      - type: "Sink"
+        name: "sink"
+      - type: "TrainSink"
+        name: "train_sink"
+    connections:
+      - source: "source.out0"
+        target: "sink.in"
+        channel: "default"
+        parameters:
+          delay: 3
+      - source: "source.out1"
+        target: "train_sink.in"
+        channel: "default"
+        parameters:
+          delay: 3
+"""
+
+
+class BurstSource(SimpleModule):
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=["out0", "out1"])
+
+    def initialize(self, step=0):
+        if step == 0:
+            for port_name in ["out0", "out1"]:
+                self.send_many([Message(fields=[i]) for i in range(5)], port_name, spacing=2)
+
+    def handle_message(self, message, port_name):
+        pass
+
+
+class Sink(SimpleModule):
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=["in"])
+        self.received = []
+
+    def handle_message(self, message, port_name):
+        self.received.append((self.sim_context.time(), message.fields[0]))
+
+
+class TrainSink(Sink):
+    accepts_trains = True
+
+    def handle_message(self, message, port_name):
+        self.received.append((self.sim_context.time(), [inner.fields[0] for inner in message.messages],
+                              message.offsets))
+
+
+class TestMessageTrains(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for filename, content in [("simple.yaml", SIMPLE), ("network.yaml", NETWORK)]:
+            with open(os.path.join(self.directory, filename), "w") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_burst_through_channel(self):
+        for engine in ["simpy", "native"]:
+            with self.subTest(engine=engine):
+                sim = Simulation(engine, [42], 0, [], self.directory + "/", 100, "error", "s", None, {})
+                sim.start()
+                sink = sim.network.sub_modules["sink"]
+                train_sink = sim.network.sub_modules["train_sink"]
+                self.assertEqual(sink.received, [(3 + 2 * i, i) for i in range(5)])
+                self.assertEqual(train_sink.received, [(3, [0, 1, 2, 3, 4], [0, 2, 4, 6, 8])])
+
+    def test_invalid_offsets(self):
+        with self.assertRaises(ValueError):
+            MessageTrain([Message(fields=[0]), Message(fields=[1])], [1, 0])
+        with self.assertRaises(ValueError):
+            MessageTrain([Message(fields=[0])], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+r"""
+This file contains tests for the columnar buffers of the metric samples and the metric handles.
+"""
+
+import os
+import tempfile
+import unittest
+
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from omnetpypy import SimpleModule, Message
+from omnetpypy.backends.metric_buffers import MetricBuffer, read_vector
+from omnetpypy.simulation import Simulation, Experiment
+from omnetpypy.utilities import FutureMetric
+
+SIMPLE = """
+simple:
+  - name: "Bouncer"
+    package: "test_metric_buffers"
+"""
+
+NETWORK = """
+network:
+  - name: "BounceNetwork"
+    submodules:
+      - type: "Bouncer"
+        name: "left"
+      - type: "Bouncer"
+        name: "right"
+    connections:
+      - source: "left.port"
+        target: "right.port"
+        channel: "default"
+        parameters:
+          delay: 1
+"""
+
+RING_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "omnetpypy", "examples",
+                              "ring")
+
+CONFIG = """
+repetitions: 2
+simulate_until: 100
+yaml_directory: "./"
+engine: "native"
+output_dir: "{output_format}"
+output_format: "{output_format}"
+
+metrics:
+  - name: "Hops"
+    collect: ["vector", "mean", "median", "count", "min", "max"]
+    type: "number"
+
+log_level: "error"
+"""
+
+
+def _metric(metric_type="number", columns=None, name="Metric"):
+    return FutureMetric(name=name, vector=True, mean=False, median=False, std=False, var=False, min=False,
+                        max=False, count=True, percentiles=False, type=metric_type, columns=columns)
+
+
+class Bouncer(SimpleModule):
+    # records every hop both with a handle and by name
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=["port"])
+        self.hops = None
+
+    def initialize(self, step=0):
+        if step == 0:
+            self.hops = self.metric("Hops", validate=True)
+            if self.name == "left":
+                self.send(Message(fields=[0]), "port")
+
+    def handle_message(self, message, port_name):
+        self.hops.record(message.fields[0])
+        self.emit_metric("HopsByName", message.fields[0])
+        if message.fields[0] < 20:
+            self.send(Message(fields=[message.fields[0] + 1]), "port")
+
+
+class TestMetricBuffers(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "vector.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_flush_threshold(self):
+        # two columns of 8 bytes, so 64 bytes hold 4 samples
+        buffer = MetricBuffer(_metric(), flush_bytes=64)
+        self.assertEqual(buffer.capacity, 4)
+        full = [buffer.append(i / 2, i) for i in range(4)]
+        self.assertEqual(full, [False, False, False, True])
+        buffer.flush(self.filename)
+        self.assertEqual(len(buffer), 0)
+        buffer.append(10.5, 10)
+        buffer.flush(self.filename)
+        buffer.flush(self.filename)
+
+        df = pd.read_csv(self.filename)
+        self.assertEqual(list(df.columns), ["sample", "timestamp"])
+        self.assertEqual(df["sample"].tolist(), [0, 0.5, 1, 1.5, 10.5])
+        self.assertEqual(df["timestamp"].tolist(), [0, 1, 2, 3, 10])
+
+    def test_empty_flush_writes_header(self):
+        MetricBuffer(_metric()).flush(self.filename)
+        self.assertEqual(list(pd.read_csv(self.filename).columns), ["sample", "timestamp"])
+
+    def test_str_and_dict(self):
+        buffer = MetricBuffer(_metric("str"))
+        buffer.append("a,b", 1)
+        buffer.flush(self.filename)
+        self.assertEqual(pd.read_csv(self.filename)["sample"].tolist(), ["a,b"])
+
+        buffer = MetricBuffer(_metric("dict", ["x", "y", "timestamp"]))
+        buffer.append({"y": "B", "x": 1}, 2)
+        buffer.flush(self.filename)
+        self.assertEqual(pd.read_csv(self.filename).values.tolist(), [[1, "B", 2]])
+        for value in [{"x": 1}, {"x": 1, "y": "B", "timestamp": 3}, {"x": [1], "y": "B"}, 1]:
+            with self.assertRaises(ValueError):
+                buffer.validate(value)
+
+    def test_validate_numbers(self):
+        buffer = MetricBuffer(_metric())
+        for value in [1, 2.5, np.float64(3), np.int64(4), True]:
+            buffer.validate(value)
+        for value in [None, [1.0], np.array([1.0]), "1"]:
+            with self.assertRaises(ValueError):
+                buffer.validate(value)
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            MetricBuffer(_metric(), flush_bytes=0)
+        with self.assertRaises(ValueError):
+            MetricBuffer(_metric(), output_format="xml")
+
+    def test_binary(self):
+        buffer = MetricBuffer(_metric(), flush_bytes=64, output_format="npy")
+        self.assertTrue(buffer.binary)
+        buffer.flush(self.filename)
+        self.assertEqual(len(read_vector(self.filename)), 0)
+        for i in range(6):
+            if buffer.append(i / 2, i):
+                buffer.flush(self.filename)
+        buffer.flush(self.filename)
+        records = read_vector(self.filename)
+        self.assertEqual(records["sample"].tolist(), [0, 0.5, 1, 1.5, 2, 2.5])
+        self.assertEqual(records["timestamp"].tolist(), [0, 1, 2, 3, 4, 5])
+
+        # the other types are always written as csv
+        self.assertFalse(MetricBuffer(_metric("str"), output_format="npy").binary)
+
+
+class TestMetricHandles(unittest.TestCase):
+
+    def test_handles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for filename, content in [("simple.yaml", SIMPLE), ("network.yaml", NETWORK)]:
+                with open(os.path.join(directory, filename), "w") as f:
+                    f.write(content)
+            metrics = [_metric(name="Hops"), _metric(name="HopsByName")]
+            for engine in ["simpy", "native", "conservative", "timewarp"]:
+                with self.subTest(engine=engine):
+                    output_dir = os.path.join(directory, engine)
+                    sim = Simulation(engine, [42], 0, metrics, directory + "/", 100, "error", "s", output_dir, {})
+                    collected = sim.start()
+                    self.assertEqual(collected["Hops"]["count"], 21)
+                    by_handle = pd.read_csv(sim.connector.vector_file("Hops"))
+                    by_name = pd.read_csv(sim.connector.vector_file("HopsByName"))
+                    self.assertEqual(by_handle.values.tolist(), by_name.values.tolist())
+                    self.assertEqual(by_handle["timestamp"].tolist(), list(range(1, 22)))
+
+    def test_unknown_metric(self):
+        sim_metrics = [_metric(name="Hops")]
+        with tempfile.TemporaryDirectory() as directory:
+            for filename, content in [("simple.yaml", SIMPLE), ("network.yaml", NETWORK)]:
+                with open(os.path.join(directory, filename), "w") as f:
+                    f.write(content)
+            sim = Simulation("native", [42], 0, sim_metrics, directory + "/", 100, "error", "s", None, {})
+            with self.assertRaises(KeyError):
+                sim.connector.metric_handle("Unknown")
+
+
+class TestBinaryOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for filename in ["network.yaml", "simple.yaml"]:
+            shutil.copy(os.path.join(RING_DIRECTORY, filename), self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _run(self, output_format):
+        config_file = os.path.join(self.directory, "config.yaml")
+        with open(config_file, "w") as f:
+            f.write(CONFIG.format(output_format=output_format))
+        Experiment(config_file=config_file).run_simulations()
+        return os.path.join(self.directory, output_format)
+
+    def test_npy_matches_csv(self):
+        csv_dir = self._run("csv")
+        npy_dir = self._run("npy")
+        self.assertEqual(sorted(os.listdir(npy_dir)), ["Hops.csv", "Hops_vector.npy"])
+
+        vector = np.load(os.path.join(npy_dir, "Hops_vector.npy"))
+        expected = pd.read_csv(os.path.join(csv_dir, "Hops_vector.csv"))
+        self.assertEqual(vector.dtype.names, ("sample", "timestamp", "repetition"))
+        for column in vector.dtype.names:
+            self.assertEqual(vector[column].tolist(), expected[column].tolist())
+
+        statistics = pd.read_csv(os.path.join(npy_dir, "Hops.csv"))
+        expected = pd.read_csv(os.path.join(csv_dir, "Hops.csv"))
+        for column in ["mean", "count", "min", "max"]:
+            self.assertEqual(statistics[column].tolist(), expected[column].tolist())
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            self._run("xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+r"""
+This file contains tests for the statistics of the metrics computed during the simulations.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from omnetpypy import SimpleModule
+from omnetpypy.backends.metric_buffers import MetricBuffer
+from omnetpypy.backends.metric_statistics import MetricStatistics, TimeWeightedStatistics, TDigest, PERCENTILES
+from omnetpypy.simulation import Simulation
+from omnetpypy.utilities import FutureMetric, get_metrics_from_csv
+
+SIMPLE = """
+simple:
+  - name: "Queue"
+    package: "test_metric_statistics"
+"""
+
+NETWORK = """
+network:
+  - name: "QueueNetwork"
+    submodules:
+      - type: "Queue"
+        name: "queue"
+"""
+
+# (time, length) of the changes of the length of the queue
+CHANGES = [(0, 2), (4, 6), (6, 0)]
+
+
+def _metric(vector=False):
+    return FutureMetric(name="Metric", vector=vector, mean=True, median=True, std=True, var=True, min=True, max=True,
+                        count=True, percentiles=True, type="number", columns=None)
+
+
+def _time_weighted(vector=False):
+    return FutureMetric(name="Length", vector=vector, mean=True, median=False, std=False, var=False, min=True,
+                        max=True, count=True, percentiles=False, type="time_weighted", columns=None, histogram=True,
+                        bins=[0, 1, 5, 10])
+
+
+class Queue(SimpleModule):
+    # changes the length of a fictitious queue at the times in CHANGES
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=[])
+        self.length = None
+
+    def initialize(self, step=0):
+        if step == 0:
+            self.length = self.metric("Length")
+            for time, length in CHANGES:
+                self.schedule_message(length, at=time)
+
+    def handle_message(self, message, port_name):
+        self.length.record(message)
+
+
+class TestTDigest(unittest.TestCase):
+
+    def test_small_sets_are_exact(self):
+        digest = TDigest()
+        digest.update(np.array([5.0, 1.0, 3.0]))
+        digest.update(np.array([2.0]))
+        self.assertEqual(len(digest.means), 4)
+        self.assertEqual(digest.quantile(0.5), 2.5)
+        self.assertEqual(digest.quantile(0), 1)
+        self.assertEqual(digest.quantile(1), 5)
+
+    def test_bounded_and_accurate(self):
+        rng = np.random.default_rng(1)
+        samples = rng.exponential(size=1_000_000)
+        digest = TDigest()
+        for batch in np.split(samples, 100):
+            digest.update(batch)
+        self.assertLessEqual(len(digest.means), digest.compression)
+        self.assertEqual(len(digest), len(samples))
+
+        quantiles = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+        expected = np.quantile(samples, quantiles)
+        # the error is measured in quantile space
+        ranks = np.searchsorted(np.sort(samples), digest.quantile(quantiles)) / len(samples)
+        np.testing.assert_allclose(ranks, quantiles, atol=1e-3)
+        np.testing.assert_allclose(digest.quantile(quantiles), expected, rtol=1e-2)
+
+    def test_empty(self):
+        self.assertTrue(np.isnan(TDigest().quantile(0.5)))
+
+
+class TestMetricStatistics(unittest.TestCase):
+
+    def test_matches_numpy(self):
+        rng = np.random.default_rng(2)
+        # a large offset makes the naive sum of squares lose all precision
+        samples = 1e9 + rng.normal(size=100_000)
+        statistics = MetricStatistics(_metric())
+        for batch in np.array_split(samples, 7):
+            statistics.update(batch)
+        results = statistics.results()
+
+        self.assertEqual(results["count"], len(samples))
+        self.assertEqual(results["min"], samples.min())
+        self.assertEqual(results["max"], samples.max())
+        self.assertAlmostEqual(results["mean"], samples.mean(), delta=1e-6)
+        self.assertAlmostEqual(results["var"], samples.var(), delta=1e-6)
+        self.assertAlmostEqual(results["std"], samples.std(), delta=1e-6)
+        self.assertAlmostEqual(results["median"], np.median(samples), delta=2e-2)
+        np.testing.assert_allclose(results["percentiles"], np.percentile(samples, PERCENTILES), atol=5e-2)
+
+    def test_no_samples(self):
+        results = MetricStatistics(_metric()).results()
+        self.assertEqual(results["count"], 0)
+        self.assertEqual(results["mean"], 0)
+        self.assertEqual(results["median"], [])
+        self.assertEqual(results["percentiles"], [])
+
+    def test_buffer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "vector.csv")
+            for vector in [False, True]:
+                buffer = MetricBuffer(_metric(vector), flush_bytes=64)
+                for i in range(10):
+                    if buffer.append(float(i), i):
+                        buffer.flush(filename)
+                buffer.flush(filename)
+                results = buffer.statistics.results()
+                self.assertEqual(results["count"], 10)
+                self.assertEqual(results["median"], 4.5)
+                # only the metrics that collect the vector are written to a file
+                self.assertEqual(os.path.exists(filename), vector)
+                if vector:
+                    self.assertEqual(get_metrics_from_csv(_metric(vector), filename), results)
+
+                buffer.reset()
+                self.assertEqual(buffer.statistics.count, 0)
+
+
+class TestTimeWeightedStatistics(unittest.TestCase):
+
+    def test_accumulators(self):
+        statistics = TimeWeightedStatistics(_time_weighted())
+        statistics.update(np.array([2.0, 6.0]), np.array([0.0, 4.0]))
+        statistics.update(np.array([0.0]), np.array([6.0]))
+        statistics.advance(10)
+        results = statistics.results()
+        self.assertEqual(results["mean"], 2)
+        self.assertEqual(results["min"], 0)
+        self.assertEqual(results["max"], 6)
+        self.assertEqual(results["count"], 3)
+        self.assertEqual(results["histogram"], [0.4, 0.4, 0.2])
+
+        # after a restart the last value holds from the restart time on
+        statistics.restart(20)
+        statistics.update(np.array([4.0]), np.array([25.0]))
+        statistics.advance(30)
+        results = statistics.results()
+        self.assertEqual(results["mean"], 2)
+        self.assertEqual(results["count"], 1)
+        self.assertEqual(results["histogram"], [0.5, 0.5, 0])
+
+    def test_no_samples(self):
+        statistics = TimeWeightedStatistics(_time_weighted())
+        statistics.advance(10)
+        self.assertEqual(statistics.results(), {"mean": 0, "min": np.inf, "max": -np.inf, "count": 0,
+                                                "histogram": []})
+
+    def test_simulation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for filename, content in [("simple.yaml", SIMPLE), ("network.yaml", NETWORK)]:
+                with open(os.path.join(directory, filename), "w") as f:
+                    f.write(content)
+            for engine in ["simpy", "native"]:
+                with self.subTest(engine=engine):
+                    sim = Simulation(engine, [42], 0, [_time_weighted(vector=True)], directory + "/", 10, "error",
+                                     "s", os.path.join(directory, engine), {}, engine_params={"metric_flush_bytes": 16})
+                    collected = sim.start()["Length"]
+                    self.assertEqual(collected["mean"], 2)
+                    self.assertEqual(collected["max"], 6)
+                    self.assertEqual(collected["histogram"], [0.4, 0.4, 0.2])
+
+
+if __name__ == '__main__':
+    unittest.main()
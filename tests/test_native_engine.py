@@ -0,0 +1,71 @@
+r"""
+This file contains tests for the native simulation engine.
+"""
+
+import os
+import tempfile
+import unittest
+
+from omnetpypy.simulation import Simulation
+from omnetpypy.utilities import FutureMetric
+
+
+def _throughput_metric():
+    return FutureMetric(name="Throughput", vector=True, mean=True, median=False, std=False, var=False, min=False,
+                        max=False, count=True, percentiles=False, type="number", columns=None)
+
+
+def _run_ping_pong(engine, until=8000, engine_params=None):
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    yaml_directory = os.path.join(project_root, "omnetpypy", "examples", "ping_pong") + "/"
+    with tempfile.TemporaryDirectory() as output_dir:
+        sim = Simulation(engine, [42], 0, [_throughput_metric()], yaml_directory, until, "error", "s",
+                         output_dir, {}, engine_params)
+        collected = sim.start()
+        end_time = sim.time()
+    return collected, end_time
+
+
+class TestNativeEngine(unittest.TestCase):
+
+    def test_ping_pong_same_as_simpy(self):
+        native, native_end = _run_ping_pong("native")
+        simpy, simpy_end = _run_ping_pong("simpy")
+        self.assertEqual(native["Throughput"]["count"], simpy["Throughput"]["count"])
+        self.assertGreater(native["Throughput"]["count"], 0)
+        self.assertEqual(native_end, simpy_end)
+
+    def test_event_sets(self):
+        heap, _ = _run_ping_pong("native")
+        for event_set in ["calendar", "ladder"]:
+            other, _ = _run_ping_pong("native", engine_params={"event_set": event_set})
+            self.assertEqual(heap, other)
+
+    def test_run_and_resume(self):
+        # stopping and resuming the simulation many times gives the same result with every event set
+        expected, _ = _run_ping_pong("native", until=3000)
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        yaml_directory = os.path.join(project_root, "omnetpypy", "examples", "ping_pong") + "/"
+        for event_set in ["heap", "calendar", "ladder"]:
+            with self.subTest(event_set=event_set), tempfile.TemporaryDirectory() as output_dir:
+                sim = Simulation("native", [42], 0, [_throughput_metric()], yaml_directory, 3000, "error", "s",
+                                 output_dir, {}, {"event_set": event_set})
+                times = []
+                for until in range(7, 3000, 7):
+                    sim.run(until)
+                    times.append(sim.connector._next_time())
+                    self.assertGreaterEqual(times[-1], until)
+                self.assertEqual(sim.start(), expected)
+
+    def test_negative_port_delay(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        yaml_directory = os.path.join(project_root, "omnetpypy", "examples", "ping_pong") + "/"
+        sim = Simulation("native", [42], 0, [], yaml_directory, 10, "error", "s", None, {})
+        module = next(iter(sim.network.sub_modules.values()))
+        port = next(iter(module.ports.values()))
+        with self.assertRaises(ValueError):
+            sim.connector.schedule_port_input(port, None, -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
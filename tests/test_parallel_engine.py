@@ -0,0 +1,177 @@
+r"""
+This file contains tests for the parallel simulation engines.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from omnetpypy.simulation import Simulation
+from omnetpypy.utilities import FutureMetric
+
+RING_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "omnetpypy", "examples",
+                              "ring")
+
+# a ring of nodes connected without channels, that delay the tokens with self messages
+DIRECT_RING_NETWORK = """
+network:
+  - name: "DirectRingNetwork"
+    submodules:
+      - type: "RingNode"
+        name: "node0"
+        parameters:
+          tokens: 2
+          processing_delay: 1
+      - type: "RingNode"
+        name: "node1"
+        parameters:
+          tokens: 2
+          processing_delay: 1
+      - type: "RingNode"
+        name: "node2"
+        parameters:
+          tokens: 2
+          processing_delay: 1
+      - type: "RingNode"
+        name: "node3"
+        parameters:
+          tokens: 2
+          processing_delay: 1
+      - type: "RingNode"
+        name: "node4"
+        parameters:
+          tokens: 2
+          processing_delay: 1
+      - type: "RingNode"
+        name: "node5"
+        parameters:
+          tokens: 2
+          processing_delay: 1
+    connections:
+      - for i in 0 to 4:
+          source: "node{i}.out"
+          target: "node{i+1}.in"
+      - source: "node5.out"
+        target: "node0.in"
+"""
+
+# the same ring, with different tokens and processing delays at every node, so that many events are out of order
+# across partitions and are rolled back
+HETEROGENEOUS_RING_NETWORK = """
+network:
+  - name: "HeterogeneousRingNetwork"
+    submodules:
+      - type: "RingNode"
+        name: "node0"
+        parameters:
+          tokens: 1
+          processing_delay: 0.5
+      - type: "RingNode"
+        name: "node1"
+        parameters:
+          tokens: 3
+          processing_delay: 2
+      - type: "RingNode"
+        name: "node2"
+        parameters:
+          tokens: 2
+          processing_delay: 0.25
+      - type: "RingNode"
+        name: "node3"
+        parameters:
+          tokens: 4
+          processing_delay: 3
+      - type: "RingNode"
+        name: "node4"
+        parameters:
+          tokens: 1
+      - type: "RingNode"
+        name: "node5"
+        parameters:
+          tokens: 2
+          processing_delay: 1.5
+    connections:
+      - for i in 0 to 4:
+          source: "node{i}.out"
+          target: "node{i+1}.in"
+      - source: "node5.out"
+        target: "node0.in"
+"""
+
+
+def _hops_metric():
+    return FutureMetric(name="Hops", vector=True, mean=False, median=False, std=False, var=False, min=False,
+                        max=False, count=True, percentiles=False, type="number", columns=None)
+
+
+def _run(yaml_directory, engine, until=100, engine_params=None):
+    with tempfile.TemporaryDirectory() as output_dir:
+        sim = Simulation(engine, [42], 0, [_hops_metric()], yaml_directory + "/", until, "error", "s",
+                         output_dir, {}, engine_params)
+        collected = sim.start()
+    return collected, sim
+
+
+class TestParallelEngines(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.direct_ring_directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(RING_DIRECTORY, "simple.yaml"), cls.direct_ring_directory)
+        with open(os.path.join(cls.direct_ring_directory, "network.yaml"), "w") as f:
+            f.write(DIRECT_RING_NETWORK)
+        cls.heterogeneous_ring_directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(RING_DIRECTORY, "simple.yaml"), cls.heterogeneous_ring_directory)
+        with open(os.path.join(cls.heterogeneous_ring_directory, "network.yaml"), "w") as f:
+            f.write(HETEROGENEOUS_RING_NETWORK)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.direct_ring_directory)
+        shutil.rmtree(cls.heterogeneous_ring_directory)
+
+    def _check_same_as_native(self, yaml_directory, engine, params):
+        native, native_sim = _run(yaml_directory, "native")
+        parallel_sims = []
+        for engine_params in params:
+            with self.subTest(engine=engine, **engine_params):
+                parallel, parallel_sim = _run(yaml_directory, engine, engine_params=engine_params)
+                self.assertEqual(parallel["Hops"]["count"], native["Hops"]["count"])
+                self.assertEqual(parallel_sim.time(), native_sim.time())
+                parallel_sims.append(parallel_sim)
+        return parallel_sims
+
+    def test_conservative_ring(self):
+        self._check_same_as_native(RING_DIRECTORY, "conservative", [{"partitions": p} for p in [1, 2, 3]])
+
+    def test_timewarp_ring(self):
+        self._check_same_as_native(RING_DIRECTORY, "timewarp",
+                                   [{"partitions": 2, "window": 2}, {"partitions": 3, "batch": 7}])
+
+    def test_timewarp_direct_ring(self):
+        sims = self._check_same_as_native(self.direct_ring_directory, "timewarp",
+                                          [{"partitions": 2, "batch": 5}, {"partitions": 3, "batch": 50}])
+        # the straggler handling has been exercised
+        self.assertGreater(sims[-1].connector.rolled_back, 0)
+
+    def test_timewarp_event_sets(self):
+        # the rollbacks push events back before the last processed one, which every event set must keep in order
+        for yaml_directory in [self.direct_ring_directory, self.heterogeneous_ring_directory]:
+            sims = self._check_same_as_native(yaml_directory, "timewarp",
+                                              [{"partitions": 3, "batch": 50, "event_set": event_set}
+                                               for event_set in ["heap", "calendar", "ladder"]])
+            for sim in sims:
+                self.assertGreater(sim.connector.rolled_back, 0)
+
+    def test_conservative_rejects_direct_connections(self):
+        with self.assertRaises(ValueError):
+            _run(self.direct_ring_directory, "conservative")
+
+    def test_invalid_partitions(self):
+        with self.assertRaises(ValueError):
+            _run(RING_DIRECTORY, "conservative", engine_params={"partitions": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
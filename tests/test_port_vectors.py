@@ -0,0 +1,128 @@
+r"""
+This file contains tests for the port vectors.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from omnetpypy import SimpleModule, Message
+from omnetpypy.simulation import Simulation
+
+SIMPLE = """
+simple:
+  - name: "Hub"
+    package: "test_port_vectors"
+  - name: "Host"
+    package: "test_port_vectors"
+"""
+
+# four hosts connected to a hub nested in a rack, whose port vector is forwarded in bulk to the hub
+COMPOUND = """
+compound:
+  - name: "Rack"
+    ports:
+      - name: "eth"
+        size: 4
+    submodules:
+      - type: "Hub"
+        name: "hub"
+        parameters:
+          size: 1024
+    connections:
+      - source: "self.eth[0:4]"
+        target: "hub.eth[10:14]"
+        type: "forward input"
+      - source: "hub.eth[10:14]"
+        target: "self.eth[0:4]"
+        type: "forward output"
+"""
+
+NETWORK = """
+network:
+  - name: "StarNetwork"
+    submodules:
+      - type: "Rack"
+        name: "Rack"
+      - type: "Host"
+        name: "host0"
+      - type: "Host"
+        name: "host1"
+      - type: "Host"
+        name: "host2"
+      - type: "Host"
+        name: "host3"
+    connections:
+      - for i in 0 to 3:
+          source: "host{i}.nic"
+          target: "Rack.eth[{i}]"
+          channel: "default"
+          parameters:
+            delay: 1
+"""
+
+
+class Hub(SimpleModule):
+    # echoes every message on the port where it was received
+
+    def __init__(self, name, identifier, size=4):
+        super().__init__(name, identifier, port_names=[], port_vectors={"eth": size})
+        self.received = []
+
+    def handle_message(self, message, port_name):
+        self.received.append(port_name)
+        self.send(message, port_name)
+
+
+class Host(SimpleModule):
+
+    def __init__(self, name, identifier):
+        super().__init__(name, identifier, port_names=["nic"])
+        self.replies = []
+
+    def initialize(self, step=0):
+        if step == 0:
+            self.send(Message(fields=[self.name]), "nic")
+
+    def handle_message(self, message, port_name):
+        self.replies.append(message.fields[0])
+
+
+class TestPortVectors(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for filename, content in [("simple.yaml", SIMPLE), ("compound.yaml", COMPOUND), ("network.yaml", NETWORK)]:
+            with open(os.path.join(self.directory, filename), "w") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_star(self):
+        for engine in ["simpy", "native"]:
+            with self.subTest(engine=engine):
+                sim = Simulation(engine, [42], 0, [], self.directory + "/", 10, "error", "s", None, {})
+                sim.start()
+                hub = sim.network.sub_modules["Rack"].sub_modules["hub"]
+                self.assertEqual(sorted(hub.received), [("eth", i) for i in range(10, 14)])
+                for i in range(4):
+                    self.assertEqual(sim.network.sub_modules[f"host{i}"].replies, [f"host{i}"])
+
+                # only the connected ports of the vector are created
+                self.assertEqual(len(hub.port_vectors["eth"]), 1024)
+                self.assertEqual(len(hub.port_vectors["eth"].created()), 4)
+
+    def test_get_port(self):
+        hub = Hub("hub", 0, size=2)
+        self.assertIs(hub.get_port(("eth", 1)), hub.port_vectors["eth"][-1])
+        self.assertIs(hub.ports[("eth", 1)], hub.port_vectors["eth"][1])
+        with self.assertRaises(IndexError):
+            hub.get_port(("eth", 2))
+        with self.assertRaises(KeyError):
+            hub.get_port("eth")
+
+
+if __name__ == '__main__':
+    unittest.main()
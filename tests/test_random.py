@@ -0,0 +1,95 @@
+r"""
+This file contains tests for the buffered mode and the vectorized sampling of the random number generators.
+"""
+
+import pickle
+import unittest
+
+import numpy as np
+
+from omnetpypy.utilities import MultiRandom
+
+
+def _draws(rng, n=50):
+    return [(rng.random(1), rng.expovariate(2.0), rng.normalvariate(1.0, 2.0, generator=1)) for _ in range(n)]
+
+
+class TestBufferedRandom(unittest.TestCase):
+
+    def test_reproducible(self):
+        self.assertEqual(_draws(MultiRandom([1, 2], block_size=16)), _draws(MultiRandom([1, 2], block_size=16)))
+        self.assertNotEqual(_draws(MultiRandom([1, 2], block_size=16)), _draws(MultiRandom([3, 2], block_size=16)))
+
+    def test_distributions(self):
+        rng = MultiRandom(7, block_size=1000)
+        n = 20000
+        uniforms = [rng.random() for _ in range(n)]
+        self.assertTrue(all(0 <= value < 1 for value in uniforms))
+        self.assertAlmostEqual(sum(uniforms) / n, 0.5, delta=0.02)
+        self.assertAlmostEqual(sum(rng.expovariate(4.0) for _ in range(n)) / n, 0.25, delta=0.02)
+        self.assertAlmostEqual(sum(rng.gauss(3.0, 0.5) for _ in range(n)) / n, 3.0, delta=0.02)
+
+    def test_states(self):
+        # the values left in the blocks are part of the state, so restoring it in the middle of a block repeats the
+        # same draws
+        rng = MultiRandom([1, 2], block_size=16)
+        _draws(rng, 5)
+        states = rng.get_all_states()
+        copied = pickle.loads(pickle.dumps(rng))
+        expected = _draws(rng)
+        self.assertEqual(copied.block_size, 16)
+        self.assertEqual(_draws(copied), expected)
+        rng.set_all_states(states)
+        self.assertEqual(_draws(rng), expected)
+
+    def test_invalid_block_size(self):
+        with self.assertRaises(ValueError):
+            MultiRandom(1, block_size=0)
+
+
+class TestVectorizedRandom(unittest.TestCase):
+
+    def test_shapes_and_ranges(self):
+        rng = MultiRandom([1, 2])
+        n = 20000
+        samples = {
+            "random": rng.random(size=n),
+            "randint": rng.randint(1, 6, size=n),
+            "choice": rng.choice(["a", "b"], size=n),
+            "uniform": rng.uniform(2, 4, size=n),
+            "triangular": rng.triangular(0, 3, size=n),
+            "normalvariate": rng.normalvariate(1, 2, size=n),
+            "lognormvariate": rng.lognormvariate(0, 0.5, size=n),
+            "gauss": rng.gauss(1, 2, size=n),
+            "expovariate": rng.expovariate(4.0, size=n),
+            "vonmisesvariate": rng.vonmisesvariate(1, 4, size=n),
+            "gammavariate": rng.gammavariate(2, 3, size=n),
+            "betavariate": rng.betavariate(2, 2, size=n),
+            "paretovariate": rng.paretovariate(3, size=n),
+            "weibullvariate": rng.weibullvariate(2, 1, size=n),
+        }
+        for name, values in samples.items():
+            with self.subTest(method=name):
+                self.assertIsInstance(values, np.ndarray)
+                self.assertEqual(values.shape, (n,))
+        self.assertEqual(set(np.unique(samples["randint"])), {1, 2, 3, 4, 5, 6})
+        self.assertTrue(((samples["vonmisesvariate"] >= 0) & (samples["vonmisesvariate"] < 2 * np.pi)).all())
+        self.assertGreaterEqual(samples["paretovariate"].min(), 1)
+
+        # the vectorized draws follow the same distributions as the scalar ones
+        for name, args, expected in [("uniform", (2, 4), 3), ("expovariate", (4.0,), 0.25),
+                                     ("gammavariate", (2, 3), 6), ("paretovariate", (3,), 1.5),
+                                     ("weibullvariate", (2, 1), 2)]:
+            with self.subTest(method=name):
+                scalars = [getattr(rng, name)(*args) for _ in range(n)]
+                self.assertAlmostEqual(np.mean(samples[name]), expected, delta=0.05 * expected)
+                self.assertAlmostEqual(np.mean(scalars), expected, delta=0.05 * expected)
+
+    def test_streams(self):
+        self.assertTrue((MultiRandom([1, 2]).random(1, size=(2, 3)) ==
+                         MultiRandom([3, 2]).random(1, size=(2, 3))).all())
+        self.assertFalse((MultiRandom([1, 2]).random(0, size=10) == MultiRandom([1, 2]).random(1, size=10)).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
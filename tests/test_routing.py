@@ -0,0 +1,116 @@
+r"""
+This file contains tests for the compiled port routes.
+"""
+
+import unittest
+
+from omnetpypy.front_end.channel import Channel
+from omnetpypy.front_end.compound_module import CompoundModule
+from omnetpypy.front_end.message import Message
+from omnetpypy.front_end.port import compile_routes
+from omnetpypy.front_end.simple_module import SimpleModule
+
+
+class _Module(SimpleModule):
+
+    def handle_message(self, message, port_name):
+        pass
+
+
+class _UndelayedChannel(Channel):
+
+    def generate_delay(self, message, port_name):
+        return None
+
+
+class _Context:
+    # a simulation context whose connector collects the port inputs
+
+    def __init__(self):
+        self.connector = self
+        self.received = []
+        self.delays = []
+
+    def time(self):
+        return 0
+
+    def schedule_port_input(self, port, message, delay=0):
+        self.received.append((port.parent.name, port.name, message))
+        self.delays.append(delay)
+
+
+class TestRouting(unittest.TestCase):
+
+    def setUp(self):
+        # sender -> outer.in -> inner.in -> receiver.in, through two levels of compound modules
+        self.context = _Context()
+        self.network = CompoundModule("network", 0, [])
+        outer = CompoundModule("outer", 1, ["in"])
+        inner = CompoundModule("inner", 2, ["in"])
+        self.sender = _Module("sender", 3, ["out"])
+        self.receiver = _Module("receiver", 4, ["in"])
+        self.other = _Module("other", 5, ["in"])
+        self.network.add_sub_module(self.sender)
+        self.network.add_sub_module(outer)
+        self.network.add_sub_module(self.other)
+        outer.add_sub_module(inner)
+        inner.add_sub_module(self.receiver)
+        for entity in [self.sender, self.receiver, self.other]:
+            entity.set_sim_context(self.context)
+
+        inner.ports["in"].forward_input(self.receiver.ports["in"])
+        outer.ports["in"].forward_input(inner.ports["in"])
+        self.sender.ports["out"].connect(outer.ports["in"])
+
+    def test_compiled_routes(self):
+        compile_routes(self.network)
+        port = self.sender.ports["out"]
+        self.assertEqual(port.destinations(), [self.receiver.ports["in"]])
+        self.assertEqual(port._output_routes, (self.receiver.ports["in"],))
+
+        message = Message(fields=[1])
+        port.tx_output(message)
+        self.assertEqual(self.context.received, [("receiver", "in", message)])
+
+    def test_topology_change_invalidates_routes(self):
+        compile_routes(self.network)
+        port = self.sender.ports["out"]
+        port.disconnect(port.connected_port)
+        port.connect(self.other.ports["in"])
+        self.assertFalse(port._routing.valid)
+        self.assertFalse(self.receiver.ports["in"]._routing.valid)
+
+        port.tx_output(Message(fields=[1]))
+        self.assertEqual([received[0] for received in self.context.received], ["other"])
+
+    def test_channel_delivers_at_arrival_time(self):
+        # the delayed message is scheduled straight into the receiver, the channel schedules no self message
+        channel = Channel("channel", 6, delay=3)
+        channel.set_sim_context(self.context)
+        self.sender.ports["out"].disconnect(self.sender.ports["out"].connected_port)
+        self.sender.ports["out"].connect(channel.ports["A"])
+        channel.ports["B"].connect(self.other.ports["in"])
+        compile_routes(self.network)
+
+        message = Message(fields=[1])
+        channel.handle_message(message, "A")
+        self.assertEqual(self.context.received, [("other", "in", message)])
+        self.assertEqual(self.context.delays, [3])
+
+    def test_channel_without_generated_delay(self):
+        # a generated delay of None sends the message immediately
+        channel = _UndelayedChannel("channel", 6, delay=2)
+        channel.set_sim_context(self.context)
+        self.sender.ports["out"].disconnect(self.sender.ports["out"].connected_port)
+        self.sender.ports["out"].connect(channel.ports["A"])
+        channel.ports["B"].connect(self.other.ports["in"])
+        compile_routes(self.network)
+
+        message = Message(fields=[1])
+        channel.handle_message(message, "A")
+        self.assertEqual(self.context.received, [("other", "in", message)])
+        self.assertEqual(self.context.delays, [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
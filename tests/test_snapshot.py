@@ -0,0 +1,61 @@
+r"""
+This file contains tests for the snapshots of simulations.
+"""
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from omnetpypy.simulation import Simulation
+from omnetpypy.utilities import FutureMetric, MultiRandom
+
+
+def _throughput_metric():
+    return FutureMetric(name="Throughput", vector=True, mean=True, median=False, std=False, var=False, min=False,
+                        max=False, count=True, percentiles=False, type="number", columns=None)
+
+
+def _ping_pong(engine, output_dir, until=8000):
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    yaml_directory = os.path.join(project_root, "omnetpypy", "examples", "ping_pong") + "/"
+    return Simulation(engine, [42], 0, [_throughput_metric()], yaml_directory, until, "error", "s", output_dir, {})
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def _check(self, engine):
+        with tempfile.TemporaryDirectory() as output_dir:
+            expected = _ping_pong(engine, output_dir).start()
+
+        with tempfile.TemporaryDirectory() as output_dir, tempfile.TemporaryDirectory() as restored_dir:
+            sim = _ping_pong(engine, output_dir)
+            # warm up past the first dump of the metric buffer
+            sim.run(5000)
+            path = os.path.join(output_dir, "warm.snapshot")
+            sim.save_snapshot(path)
+
+            restored = Simulation.load_snapshot(path, output_dir=restored_dir)
+            self.assertEqual(restored.time(), 5000)
+            self.assertEqual(restored.start(), expected)
+            # the original simulation is unaffected by the snapshot
+            self.assertEqual(sim.start(), expected)
+
+    def test_native(self):
+        self._check("native")
+
+    def test_simpy(self):
+        self._check("simpy")
+
+    def test_multi_random_pickle(self):
+        rng = MultiRandom([1, 2, 3])
+        rng.random(generator=2)
+        rng.numpy_generators[1].random()
+        restored = pickle.loads(pickle.dumps(rng))
+        self.assertEqual(len(restored), 3)
+        self.assertEqual([restored.random(generator=i) for i in range(3)], [rng.random(generator=i) for i in range(3)])
+        self.assertEqual(restored.numpy_generators[1].random(), rng.numpy_generators[1].random())
+
+
+if __name__ == '__main__':
+    unittest.main()
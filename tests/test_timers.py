@@ -0,0 +1,90 @@
+r"""
+This file contains tests for the scheduling and cancellation of self messages.
+"""
+
+import types
+import unittest
+
+from omnetpypy import SimpleModule, Message
+from omnetpypy.backends.native_connector import NativeConnector
+from omnetpypy.backends.simpy_connector import SimPyConnector
+
+
+class TimerModule(SimpleModule):
+
+    def __init__(self, name, identifier, num_timers=100):
+        super().__init__(name, identifier, port_names=[])
+        self.num_timers = num_timers
+        self.timers = []
+        self.received = []
+
+    def initialize(self, step=0):
+        if step == 0:
+            for i in range(self.num_timers):
+                self.timers.append(self.schedule_message(Message(fields=[i]), delay=i + 1))
+            # cancel the odd timers, half through the handle and half through the message
+            for timer in self.timers[1::4]:
+                timer.cancel()
+            for timer in self.timers[3::4]:
+                self.cancel_scheduled(timer.message)
+
+    def handle_message(self, message, port_name):
+        self.received.append(message.fields[0])
+
+
+def _run(connector_class, module):
+    sim = types.SimpleNamespace(network=module, rng=None)
+    sim.connector = connector_class(simulation=sim)
+    sim.connector.add_entity(module)
+    sim.connector.start_simulation()
+    return sim.connector
+
+
+class TestTimers(unittest.TestCase):
+
+    def _check(self, connector_class):
+        module = TimerModule("timers", 0)
+        _run(connector_class, module)
+        self.assertEqual(module.received, list(range(0, module.num_timers, 2)))
+        self.assertTrue(all(not timer.pending for timer in module.timers))
+        self.assertFalse(module.is_scheduled(module.timers[0].message))
+
+    def test_native(self):
+        self._check(NativeConnector)
+
+    def test_simpy(self):
+        self._check(SimPyConnector)
+
+    def test_is_scheduled(self):
+        module = TimerModule("timers", 0, num_timers=0)
+        connector = _run(NativeConnector, module)
+        message = Message(fields=[])
+        timer = module.schedule_message(message, delay=5)
+        self.assertTrue(module.is_scheduled(message))
+        self.assertTrue(module.is_scheduled(timer))
+        timer.cancel()
+        self.assertFalse(module.is_scheduled(message))
+        self.assertFalse(module.is_scheduled(timer))
+        self.assertEqual(connector._timers, {})
+
+    def test_schedule_at(self):
+        for connector_class in [NativeConnector, SimPyConnector]:
+            with self.subTest(connector=connector_class.__name__):
+                module = TimerModule("timers", 0, num_timers=0)
+                connector = _run(connector_class, module)
+                # time zero is a valid time, not a missing one
+                timer = module.schedule_message(Message(fields=[0]), at=0)
+                self.assertEqual(timer.time, 0)
+                connector.resume_simulation(10)
+                self.assertEqual(module.received, [0])
+
+                message = Message(fields=[1])
+                for at in [0, 5]:
+                    with self.assertRaises(ValueError):
+                        module.schedule_message(message, at=at)
+                self.assertFalse(module.is_scheduled(message))
+                self.assertEqual(connector._timers, {})
+
+
+if __name__ == '__main__':
+    unittest.main()